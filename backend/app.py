@@ -1,14 +1,34 @@
+"""
+The Flask application
+
+``create_app()`` builds the app without touching the database or loading
+the API docs; see utils/schema.py and utils/apidocs.py. The module level
+``app`` (``gunicorn app:app``, ``from app import app``) is created on first
+access, so importing ``create_app`` does not build a second app.
+"""
 from flask import Flask, jsonify, send_from_directory
-from flask_sqlalchemy import SQLAlchemy
 from flask_jwt_extended import JWTManager
 from flask_cors import CORS
-from flasgger import Swagger
-from flask_caching import Cache
 from flask_mail import Mail
 
 from config import Config
 from models import db
-from utils.celery_tasks import init_celery
+from utils.tasks import init_tasks
+from utils.json_provider import FastJSONProvider
+from utils.log import init_logging
+from utils.cache import cache
+from utils.compression import init_compression
+from utils.assets import frontend_built, send_asset, send_index
+from utils.sql_instrumentation import init_sql_instrumentation
+from utils.metrics import init_metrics
+from utils.profiling import init_profiling
+from utils.passwords import init_passwords
+from utils.rate_limit import init_rate_limit
+from utils.revocation import init_revocation
+from utils.schema import create_schema, init_schema
+from utils.apidocs import init_apidocs
+from utils.storage import init_storage
+from utils.document_tasks import init_documents
 from routes.auth import auth_bp
 from routes.file import file_bp
 from routes.customer import customer_bp
@@ -20,6 +40,8 @@ def create_app():
     
     # Load configuration
     app.config.from_object(Config)
+    init_logging(app)
+    app.json = FastJSONProvider(app)
     
     # Set up static file handling
     app.static_folder = '../frontend/static'
@@ -28,13 +50,23 @@ def create_app():
     # Initialize extensions
     db.init_app(app)
     jwt = JWTManager(app)
+    init_revocation(app, jwt)
     CORS(app, resources={r"/*": {"origins": "*"}}, supports_credentials=True)
-    swagger = Swagger(app)
-    cache = Cache(app)
+    init_apidocs(app)
+    cache.init_app(app)
     mail = Mail(app)
+    init_compression(app)
+    init_metrics(app, db)
+    init_sql_instrumentation(app, db)
+    init_profiling(app)
+    init_passwords(app)
+    init_rate_limit(app)
+    init_storage(app)
+    init_schema(app, db)
+    init_documents(app)
     
-    # Initialize Celery
-    celery = init_celery(app)
+    # Set up the backend running the Celery tasks, Celery itself is loaded on the first task
+    init_tasks(app)
     
     # Register blueprints
     app.register_blueprint(auth_bp)
@@ -43,18 +75,21 @@ def create_app():
     app.register_blueprint(professional_bp)
     app.register_blueprint(admin_bp)
     
-    # Create database tables
-    with app.app_context():
-        db.create_all()
-    
     # Add root route
     @app.route('/')
     def index():
         """
-        Serve the frontend index.html file
+        Serve the frontend index.html file, the built one if build_assets.py has been run
         """
+        if frontend_built():
+            return send_index()
         return send_from_directory('../frontend', 'index.html')
     
+    # Serve the bundled, content hashed frontend assets
+    @app.route('/assets/<path:filename>')
+    def serve_asset(filename):
+        return send_asset(filename)
+    
     # Serve frontend JavaScript files
     @app.route('/components/<path:filename>')
     def serve_component(filename):
@@ -88,7 +123,15 @@ def create_app():
     
     return app
 
-app = create_app()
+def __getattr__(name):
+    if name == 'app':
+        global app
+        app = create_app()
+        return app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 if __name__ == '__main__':
-    app.run(debug=True)
\ No newline at end of file
+    app = create_app()
+    with app.app_context():
+        create_schema(db)
+    app.run(debug=True)
@@ -0,0 +1,6 @@
+"""
+Benchmarks for the application
+
+Run from the backend directory, e.g.
+    python -m benchmarks.serialization
+"""
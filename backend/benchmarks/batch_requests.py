@@ -0,0 +1,68 @@
+#!/usr/bin/env python
+"""
+Throughput benchmark for POST /customer/requests/batch.
+Compares one batch call of 10k service requests with the same work done
+through individual POST /customer/request calls.
+
+Usage:
+    python -m benchmarks.batch_requests [batch_size] [single_calls]
+"""
+import random
+import sys
+import time
+
+from benchmarks.harness import benchmark_app, auth_header
+
+def seed(app):
+    from models import db, User, Service, ProfessionalProfile
+    with app.app_context():
+        customer = User(username='bench_customer', password='x', role='Customer', approve=True, blocked=False)
+        db.session.add(customer)
+        pairs = []
+        for index, service_type in enumerate(['Cleaning', 'Plumbing', 'Electrical', 'Carpentry']):
+            service = Service(name=f'{service_type} service', price=100 + index, description='', service_type=service_type)
+            db.session.add(service)
+            for n in range(5):
+                user = User(username=f'bench_{service_type}_{n}', password='x', role='Professional', approve=True, blocked=False)
+                db.session.add(user)
+                db.session.flush()
+                db.session.add(ProfessionalProfile(
+                    user_id=user.id, full_name=f'{service_type} {n}', service_type=service_type,
+                    experience='1 year', filename='default.pdf', address='Street', pin_code='123456'
+                ))
+                pairs.append((service, user))
+        db.session.commit()
+        return customer.id, [(service.id, user.id) for service, user in pairs]
+
+def main():
+    batch_size = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    single_calls = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+    app = benchmark_app()
+    customer_id, pairs = seed(app)
+    headers = auth_header(app, customer_id)
+    client = app.test_client()
+    rng = random.Random(42)
+
+    items = [
+        {'service_id': service_id, 'professional_id': professional_id, 'remarks': f'Batch request {i}'}
+        for i, (service_id, professional_id) in enumerate(rng.choice(pairs) for _ in range(batch_size))
+    ]
+    start = time.perf_counter()
+    response = client.post('/customer/requests/batch', headers=headers, json={'requests': items})
+    batch_seconds = time.perf_counter() - start
+    created = sum(1 for result in response.get_json()['results'] if result['status'] == 'created')
+    assert response.status_code == 200 and created == batch_size, response.get_json().get('message')
+
+    start = time.perf_counter()
+    for item in items[:single_calls]:
+        client.post('/customer/request', headers=headers, json=item)
+    single_seconds = time.perf_counter() - start
+
+    batch_rate = batch_size / batch_seconds
+    single_rate = single_calls / single_seconds
+    print(f"Batch endpoint:  {batch_size} requests in {batch_seconds:.2f} s ({batch_rate:,.0f} requests/s)")
+    print(f"Single endpoint: {single_calls} requests in {single_seconds:.2f} s ({single_rate:,.0f} requests/s)")
+    print(f"Speedup: x{batch_rate / single_rate:.1f}")
+
+if __name__ == '__main__':
+    main()
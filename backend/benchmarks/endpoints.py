@@ -0,0 +1,478 @@
+#!/usr/bin/env python
+"""
+End-to-end benchmark of the HTTP API.
+
+Boots the app against a generated dataset (see generate_data.py) and drives
+every blueprint endpoint through the test client as the persona that uses
+it: customer, professional, admin or anonymous. Each endpoint is timed on
+its own, then a weighted mix of all of them is run. The p50/p95/p99 latency
+and the number of SQL queries per request (from the Server-Timing header)
+are reported and written to JSON.
+
+Passing --baseline compares the run with an earlier results file and exits
+with status 1 when an endpoint's p95 latency grew by more than --threshold,
+or when it issues more queries per request than before.
+
+The dataset is generated once per scale and copied for every run, so write
+endpoints never change the data the next run starts from.
+
+Usage:
+    python -m benchmarks.endpoints [--scale small|medium|large] [--iterations 30]
+    python -m benchmarks.endpoints --output before.json
+    python -m benchmarks.endpoints --baseline before.json --threshold 0.2
+"""
+import argparse
+import hashlib
+import io
+import json
+import os
+import platform
+import random
+import re
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+from benchmarks import generate_data
+from benchmarks.harness import benchmark_app, auth_header
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+RESULTS_DIR = os.path.join(BENCHMARK_DIR, 'results')
+
+SCALES = {
+    'small': {'customers': 1000, 'professionals': 100, 'requests': 20000},
+    'medium': {'customers': 10000, 'professionals': 1000, 'requests': 200000},
+    'large': {'customers': 100000, 'professionals': 10000, 'requests': 2000000},
+}
+
+SERVER_TIMING_RE = re.compile(r'desc="(\d+) queries"')
+
+# Differences below this are treated as noise by the regression check
+MIN_REGRESSION_MS = 1.0
+
+class Case:
+    """
+    One endpoint as a persona calls it. ``build(ctx, i)`` returns the keyword
+    arguments for the test client's ``open`` for the i-th call, or None when
+    the fixtures it needs are used up.
+    """
+
+    def __init__(self, name, method, persona, build, weight=1, iterations=None, expect=(200,)):
+        self.name = name
+        self.method = method
+        self.persona = persona
+        self.build = build
+        self.weight = weight
+        self.iterations = iterations
+        self.expect = expect
+
+# Endpoints deliberately not benchmarked
+SKIPPED = {
+    '/admin/test-export/<int:professional_id>': 'posts reminders to the chat webhook',
+    '/admin/tasks/<task_id>': 'polled by the report fixture',
+    '/admin/profiles': 'profiling infrastructure',
+    '/admin/profiles/<int:profile_id>': 'profiling infrastructure',
+    '/metrics': 'monitoring infrastructure',
+}
+
+def _take(pool):
+    return pool.pop() if pool else None
+
+def _path(path, **kwargs):
+    return lambda ctx, i: dict(path=path.format(ctx=ctx, i=i), **kwargs)
+
+def _json(path, body):
+    return lambda ctx, i: dict(path=path.format(ctx=ctx, i=i), json=body(ctx, i))
+
+def _consume(pool_name, path, body=None):
+    """Call ``path`` once per fixture in ``ctx.pools[pool_name]``"""
+    def build(ctx, i):
+        item = _take(ctx.pools[pool_name])
+        if item is None:
+            return None
+        kwargs = dict(path=path.format(ctx=ctx, i=i, item=item))
+        if body is not None:
+            kwargs['json'] = body(ctx, i, item)
+        return kwargs
+    return build
+
+def _professional_profile_form(ctx, i):
+    return dict(path='/professional/profile', data={
+        'full_name': f'Benchmark Professional {i}', 'service_type': ctx.professional_service_type,
+        'experience': '5 years', 'address': '1 Benchmark Street, City', 'pin_code': '123456',
+        'file': (io.BytesIO(b'%PDF-1.4 benchmark'), f'benchmark_{i}.pdf'),
+    }, content_type='multipart/form-data')
+
+CASES = [
+    # auth
+    Case('register', 'POST', None, _json('/register', lambda ctx, i: {
+        'username': f'bench_{ctx.run_id}_{i}', 'password': 'password123', 'role': 'Customer'})),
+    Case('login', 'POST', None, _json('/login', lambda ctx, i: {
+        'username': ctx.customer_username, 'password': 'password123'}), weight=2),
+    Case('admin login', 'POST', None, _json('/admin/login', lambda ctx, i: {
+        'username': 'admin', 'password': 'admin123'})),
+    # Logout revokes the token, so every call logs out a token of its own
+    Case('logout', 'POST', 'customer', lambda ctx, i: dict(path='/logout', headers=auth_header(ctx.app, ctx.customer_id))),
+    # Refresh tokens are single use too
+    Case('refresh', 'POST', None, lambda ctx, i: dict(
+        path='/refresh', headers=auth_header(ctx.app, ctx.customer_id, refresh=True))),
+    Case('get claims', 'GET', 'customer', _path('/get-claims')),
+    # customer
+    Case('customer profile', 'GET', 'customer', _path('/customer/profile'), weight=3),
+    Case('update customer profile', 'POST', 'customer', _json('/customer/profile', lambda ctx, i: {
+        'full_name': f'Benchmark Customer {i}', 'address': '1 Benchmark Avenue, City', 'pin_code': '123456'})),
+    Case('customer services', 'GET', 'customer', _path('/customer/services'), weight=5),
+    Case('professionals by service', 'GET', 'customer', _path('/customer/professionals/{ctx.service_type}'), weight=3),
+    Case('customer requests', 'GET', 'customer', _path('/customer/requests'), weight=8),
+    Case('search services', 'GET', 'customer', _path('/services/search?service_type={ctx.service_type}&location=City'), weight=4),
+    Case('reviews given', 'GET', 'customer', _path('/reviews/given'), weight=2),
+    Case('professional reviews', 'GET', 'customer', _path('/professional/{ctx.professional_id}/reviews'), weight=2),
+    Case('create request', 'POST', 'customer', _json('/customer/request', lambda ctx, i: {
+        'service_id': ctx.service_id, 'professional_id': ctx.professional_id, 'remarks': f'Benchmark {i}'}),
+        weight=2, expect=(200, 201)),
+    Case('create request batch (100)', 'POST', 'customer', _json('/customer/requests/batch', lambda ctx, i: {
+        'requests': [{'service_id': ctx.service_id, 'professional_id': ctx.professional_id} for _ in range(100)]})),
+    Case('close request', 'PUT', 'customer', _consume('customer_accepted', '/customer/request/{item}/close')),
+    Case('create review', 'POST', 'customer', _consume('customer_unreviewed', '/review/{item}',
+        lambda ctx, i, item: {'rating': 1 + i % 5, 'comment': 'Benchmark review'}), expect=(201,)),
+    # professional
+    Case('professional profile', 'GET', 'professional', _path('/professional/profile'), weight=3),
+    Case('update professional profile', 'POST', 'professional', _professional_profile_form, expect=(200, 201)),
+    Case('professional requests', 'GET', 'professional', _path('/professional/requests'), weight=8),
+    Case('update request status', 'PUT', 'professional', _consume('professional_requested', '/professional/request/{item}',
+        lambda ctx, i, item: {'status': 'accepted'}), weight=2),
+    Case('reviews received', 'GET', 'professional', _path('/reviews/received'), weight=2),
+    Case('review stats', 'GET', 'professional', _path('/reviews/stats')),
+    Case('professional search', 'POST', 'professional', _json('/professional/search', lambda ctx, i: {
+        'search_type': 'location', 'search_text': 'City'})),
+    Case('professional reviews summary', 'GET', 'professional', _path('/professional/summary/reviews/{ctx.professional_id}')),
+    Case('professional requests summary', 'GET', 'professional',
+         _path('/professional/summary/service_requests/{ctx.professional_id}')),
+    # admin
+    Case('admin profile', 'GET', 'admin', _path('/admin/profile')),
+    Case('admin professionals', 'GET', 'admin', _path('/admin/professionals'), weight=2),
+    Case('admin services', 'GET', 'admin', _path('/admin/services'), weight=2),
+    Case('admin service', 'GET', 'admin', _path('/admin/service/{ctx.service_id}')),
+    Case('admin service requests', 'GET', 'admin', _path('/admin/service-requests'), iterations=5),
+    Case('admin search services', 'POST', 'admin', _json('/admin/search', lambda ctx, i: {
+        'search_type': 'service', 'search_text': ctx.service_type}), weight=2),
+    Case('admin search professionals', 'POST', 'admin', _json('/admin/search', lambda ctx, i: {
+        'search_type': 'professional', 'search_text': 'Professional'}), weight=2),
+    Case('admin search customers', 'POST', 'admin', _json('/admin/search', lambda ctx, i: {
+        'search_type': 'customer', 'search_text': ctx.customer_name})),
+    Case('reviews summary', 'GET', 'admin', _path('/admin/summary/reviews')),
+    Case('ratings summary', 'GET', 'admin', _path('/admin/summary/ratings')),
+    Case('service requests summary', 'GET', 'admin', _path('/admin/summary/service_requests')),
+    Case('create service', 'POST', 'admin', _json('/admin/service', lambda ctx, i: {
+        'name': f'Benchmark Service {i}', 'price': 100 + i, 'description': 'Benchmark',
+        'service_type': ctx.service_type}), expect=(200, 201)),
+    Case('update service', 'PUT', 'admin', _json('/admin/service/{ctx.service_id}', lambda ctx, i: {
+        'name': 'Benchmark Service', 'price': 200 + i, 'description': 'Benchmark', 'service_type': ctx.service_type})),
+    Case('delete service', 'DELETE', 'admin', _consume('deletable_services', '/admin/service/{item}')),
+    Case('approve professional', 'PUT', 'admin', _json('/admin/professional/{ctx.other_professional_id}/approve',
+        lambda ctx, i: {'approve': i % 2 == 0})),
+    Case('block professional', 'PUT', 'admin', _json('/admin/professional/{ctx.other_professional_id}/block',
+        lambda ctx, i: {'blocked': i % 2 == 1})),
+    Case('bulk professionals (100)', 'PUT', 'admin', _json('/admin/professionals/bulk', lambda ctx, i: {
+        'action': 'approve', 'user_ids': ctx.professional_ids[:100]})),
+    Case('bulk services', 'PUT', 'admin', _json('/admin/services/bulk', lambda ctx, i: {
+        'services': [{'id': service_id, 'price': 100 + i} for service_id in ctx.service_ids]})),
+    Case('export professional', 'GET', 'admin', _path('/admin/export/{ctx.professional_id}'), iterations=5,
+         expect=(200, 202)),
+    Case('export service requests', 'POST', 'admin', _json('/admin/export-requests', lambda ctx, i: {
+        'status': 'completed'}), iterations=5, expect=(202,)),
+    Case('list reports', 'GET', 'admin', _path('/admin/reports/list')),
+    Case('download report', 'GET', 'admin', lambda ctx, i: dict(path=f'/admin/reports/download/{ctx.report()}')),
+    # files and misc
+    Case('download file', 'GET', 'customer', _path('/download/{ctx.upload}')),
+    Case('download file range', 'GET', 'customer', lambda ctx, i: dict(
+        path=f'/download/{ctx.upload}', headers={**ctx.headers['customer'], 'Range': 'bytes=0-1023'}), expect=(206,)),
+    Case('document preview', 'GET', 'admin', _path('/documents/{ctx.preview}/preview')),
+    Case('api index', 'GET', None, _path('/api')),
+]
+
+class Context:
+    """Personas, ids and fixture pools the cases are built from"""
+
+    def __init__(self, app, client):
+        from sqlalchemy import func
+        from models import db, User, Service, ServiceRequest, ProfessionalProfile, CustomerProfile, Review
+        self.app = app
+        self.client = client
+        self.run_id = int(time.time())
+
+        with app.app_context():
+            def typical(column):
+                # The user at the top decile of activity, busy but not the extreme outlier
+                counts = db.session.query(column, func.count()).group_by(column).order_by(func.count().desc()).all()
+                return counts[len(counts) // 10][0]
+
+            customer_id = typical(ServiceRequest.customer_id)
+            professional_id = typical(ServiceRequest.professional_id)
+            customer = db.session.get(User, customer_id)
+            profile = CustomerProfile.query.filter_by(user_id=customer_id).first()
+            professional_profile = ProfessionalProfile.query.filter_by(user_id=professional_id).first()
+            admin_id = User.query.filter_by(username='admin').first().id
+            service = Service.query.filter_by(service_type=professional_profile.service_type).first()
+
+            self.customer_id = customer_id
+            self.customer_username = customer.username
+            self.customer_name = profile.full_name
+            self.professional_id = professional_id
+            self.professional_service_type = professional_profile.service_type
+            self.service_id = service.id
+            self.service_type = service.service_type
+            self.service_ids = [row.id for row in Service.query.with_entities(Service.id)]
+            self.professional_ids = [
+                row.user_id for row in ProfessionalProfile.query.with_entities(ProfessionalProfile.user_id)
+            ]
+            self.other_professional_id = next(pid for pid in self.professional_ids if pid != professional_id)
+
+            reviewed = db.session.query(Review.service_request_id)
+            self.pools = {
+                'customer_accepted': [row.id for row in ServiceRequest.query.with_entities(ServiceRequest.id).filter_by(
+                    customer_id=customer_id, service_status='accepted')],
+                'customer_unreviewed': [row.id for row in ServiceRequest.query.with_entities(ServiceRequest.id).filter(
+                    ServiceRequest.customer_id == customer_id, ServiceRequest.service_status == 'completed',
+                    ServiceRequest.id.not_in(reviewed))],
+                'professional_requested': [row.id for row in ServiceRequest.query.with_entities(ServiceRequest.id).filter_by(
+                    professional_id=professional_id, service_status='requested')],
+            }
+            # Services without requests can be deleted
+            requested_services = db.session.query(ServiceRequest.service_id)
+            for index in range(50):
+                db.session.add(Service(name=f'Disposable {index}', price=1, description='', service_type='Cleaning'))
+            db.session.commit()
+            self.pools['deletable_services'] = [
+                row.id for row in Service.query.with_entities(Service.id).filter(Service.id.not_in(requested_services))
+            ]
+
+        self.headers = {
+            None: {},
+            'customer': auth_header(app, customer_id),
+            'professional': auth_header(app, professional_id),
+            'admin': auth_header(app, admin_id),
+        }
+
+        upload_dir = app.config['UPLOAD_FOLDER']
+        os.makedirs(upload_dir, exist_ok=True)
+        self.upload = 'benchmark.pdf'
+        with open(os.path.join(upload_dir, self.upload), 'wb') as f:
+            f.write(b'%PDF-1.4 benchmark' * 1000)
+        with app.app_context():
+            from utils.storage import preview_key, storage
+            self.preview = hashlib.sha256(b'benchmark preview').hexdigest()
+            storage().write(preview_key(self.preview), b'\x89PNG\r\n\x1a\n' + b'\0' * 4096)
+        self._report = None
+
+    def report(self):
+        """Name of an export written during this run, created on first use"""
+        if self._report is None:
+            response = self.client.get(f'/admin/export/{self.professional_id}', headers=self.headers['admin'])
+            data = response.get_json()
+            while 'task_id' in data and data.get('state') not in ('SUCCESS', 'FAILURE'):
+                time.sleep(0.05)
+                data = self.client.get(f"/admin/tasks/{data['task_id']}", headers=self.headers['admin']).get_json()
+            self._report = data['result']['filename'] if 'result' in data else data['filename']
+        return self._report
+
+def run_case(ctx, case, iterations):
+    """Call a case ``iterations`` times, returning latencies (s), query counts and status codes"""
+    latencies, queries, statuses = [], [], {}
+    for i in range(iterations):
+        kwargs = case.build(ctx, i)
+        if kwargs is None:
+            break
+        latency, query_count, status = call(ctx, case, kwargs)
+        latencies.append(latency)
+        if query_count is not None:
+            queries.append(query_count)
+        statuses[status] = statuses.get(status, 0) + 1
+    return latencies, queries, statuses
+
+def call(ctx, case, kwargs):
+    headers = kwargs.pop('headers', ctx.headers[case.persona])
+    start = time.perf_counter()
+    response = ctx.client.open(method=case.method, headers=headers, **kwargs)
+    latency = time.perf_counter() - start
+    match = SERVER_TIMING_RE.search(response.headers.get('Server-Timing', ''))
+    response.close()
+    return latency, int(match.group(1)) if match else None, response.status_code
+
+def summarize(latencies, queries, statuses):
+    if not latencies:
+        return None
+    if len(latencies) > 1:
+        cuts = statistics.quantiles(latencies, n=100, method='inclusive')
+        p50, p95, p99 = cuts[49], cuts[94], cuts[98]
+    else:
+        p50 = p95 = p99 = latencies[0]
+    return {
+        'count': len(latencies),
+        'p50_ms': round(p50 * 1000, 3),
+        'p95_ms': round(p95 * 1000, 3),
+        'p99_ms': round(p99 * 1000, 3),
+        'mean_ms': round(statistics.mean(latencies) * 1000, 3),
+        'queries_mean': round(statistics.mean(queries), 2) if queries else None,
+        'queries_max': max(queries) if queries else None,
+        'statuses': {str(status): count for status, count in sorted(statuses.items())},
+    }
+
+def run_mix(ctx, cases, requests, rng):
+    """Weighted random mix of all cases, as traffic would arrive"""
+    latencies, queries, statuses = [], [], {}
+    weights = [case.weight for case in cases]
+    counters = {case.name: 1000 for case in cases}  # continue numbering after the per-endpoint runs
+    for _ in range(requests):
+        case = rng.choices(cases, weights)[0]
+        counters[case.name] += 1
+        kwargs = case.build(ctx, counters[case.name])
+        if kwargs is None:
+            continue
+        latency, query_count, status = call(ctx, case, kwargs)
+        latencies.append(latency)
+        if query_count is not None:
+            queries.append(query_count)
+        statuses[status] = statuses.get(status, 0) + 1
+    return summarize(latencies, queries, statuses)
+
+def track_coverage(app):
+    """Record the URL rules that handled a request; returns the set that is filled in"""
+    exercised = set()
+
+    @app.after_request
+    def record_rule(response):
+        from flask import request
+        if request.url_rule is not None:
+            exercised.add(request.url_rule.rule)
+        return response
+    return exercised
+
+def uncovered(app, exercised):
+    """API blueprint rules that no case reached"""
+    api_rules = {rule.rule for rule in app.url_map.iter_rules() if '.' in rule.endpoint
+                 and not rule.endpoint.startswith('flasgger')}
+    return sorted(api_rules - exercised - set(SKIPPED))
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=BENCHMARK_DIR, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def compare(results, baseline, threshold):
+    """Return the regressions of ``results`` against ``baseline``"""
+    regressions = []
+    for name, current in results['endpoints'].items():
+        previous = baseline.get('endpoints', {}).get(name)
+        if not current or not previous:
+            continue
+        limit = previous['p95_ms'] * (1 + threshold)
+        if current['p95_ms'] > limit and current['p95_ms'] - previous['p95_ms'] > MIN_REGRESSION_MS:
+            regressions.append(f"{name}: p95 {previous['p95_ms']:.2f} ms -> {current['p95_ms']:.2f} ms")
+        if (current['queries_mean'] or 0) > (previous['queries_mean'] or 0):
+            regressions.append(f"{name}: queries per request {previous['queries_mean']} -> {current['queries_mean']}")
+    return regressions
+
+def prepare_database(scale, seed):
+    """Copy of the generated dataset for ``scale``, generating it on first use"""
+    source = os.path.join(BENCHMARK_DIR, f'endpoints-{scale}.sqlite')
+    if not os.path.exists(source):
+        print(f"Generating the {scale} dataset...")
+        sizes = SCALES[scale]
+        generate_data.main([
+            '--database', source, '--seed', str(seed), '--customers', str(sizes['customers']),
+            '--professionals', str(sizes['professionals']), '--requests', str(sizes['requests']),
+        ])
+    workdir = tempfile.mkdtemp(prefix='benchmark-endpoints-')
+    target = os.path.join(workdir, 'benchmark.sqlite')
+    shutil.copyfile(source, target)
+    return workdir, target
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='End-to-end HTTP benchmark')
+    parser.add_argument('--scale', choices=SCALES, default='small')
+    parser.add_argument('--iterations', type=int, default=30, help='calls per endpoint')
+    parser.add_argument('--mix', type=int, default=500, help='requests in the mixed traffic run, 0 to skip')
+    parser.add_argument('--only', help='run only the cases whose name contains this text')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', help='results file (default: benchmarks/results/endpoints-<commit>-<scale>.json)')
+    parser.add_argument('--baseline', help='earlier results file to compare with')
+    parser.add_argument('--threshold', type=float, default=0.2, help='allowed relative p95 growth (default: 0.2)')
+    args = parser.parse_args(argv)
+
+    workdir, database = prepare_database(args.scale, args.seed)
+    try:
+        app = benchmark_app(database)
+        app.config['UPLOAD_FOLDER'] = os.path.join(workdir, 'uploads')
+        exercised = track_coverage(app)
+        client = app.test_client()
+        ctx = Context(app, client)
+
+        cases = [case for case in CASES if not args.only or args.only in case.name]
+        results = {
+            'meta': {
+                'commit': git_commit(),
+                'date': datetime.now().isoformat(timespec='seconds'),
+                'scale': args.scale,
+                'iterations': args.iterations,
+                'python': platform.python_version(),
+                'skipped': SKIPPED,
+            },
+            'endpoints': {},
+        }
+
+        width = max(len(case.name) for case in cases)
+        print(f"{'endpoint':<{width}}  {'p50':>9}  {'p95':>9}  {'p99':>9}  {'queries':>7}  statuses")
+        unexpected = []
+        for case in cases:
+            iterations = min(args.iterations, case.iterations or args.iterations)
+            summary = summarize(*run_case(ctx, case, iterations))
+            results['endpoints'][case.name] = summary
+            if summary is None:
+                print(f"{case.name:<{width}}  no fixtures left in the dataset")
+                continue
+            queries = '-' if summary['queries_mean'] is None else f"{summary['queries_mean']:g}"
+            print(f"{case.name:<{width}}  {summary['p50_ms']:7.2f}ms  {summary['p95_ms']:7.2f}ms"
+                  f"  {summary['p99_ms']:7.2f}ms  {queries:>7}  {summary['statuses']}")
+            if any(int(status) not in case.expect for status in summary['statuses']):
+                unexpected.append(case.name)
+
+        if args.mix and not args.only:
+            mix = run_mix(ctx, cases, args.mix, random.Random(args.seed))
+            results['mix'] = mix
+            print(f"\nmixed traffic ({mix['count']} requests): p50 {mix['p50_ms']:.2f} ms  p95 {mix['p95_ms']:.2f} ms"
+                  f"  p99 {mix['p99_ms']:.2f} ms  queries {mix['queries_mean']}")
+        missing = [] if args.only else uncovered(app, exercised)
+        if missing:
+            print(f"\nEndpoints without a benchmark case: {', '.join(missing)}")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    output = args.output or os.path.join(RESULTS_DIR, f"endpoints-{results['meta']['commit'] or 'local'}-{args.scale}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f"\nResults written to {output}")
+
+    if unexpected:
+        print(f"Unexpected status codes for: {', '.join(unexpected)}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) against {args.baseline}:")
+            for regression in regressions:
+                print(f"  {regression}")
+            sys.exit(1)
+        print(f"No regressions against {args.baseline}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,315 @@
+#!/usr/bin/env python
+"""
+Synthetic data generator for benchmarks.
+
+Produces the same kind of data as populate_db.py at production volumes:
+users with profiles, services, service requests and reviews, inserted with
+executemany batches and explicit primary keys. The output only depends on
+the arguments and the seed.
+
+Requester and professional popularity follows a Zipf-like distribution
+(--skew, 0 for uniform), and request dates are spread over the last --days
+days before --end-date. Without --append the database is recreated. With --append
+the given numbers of rows are added on top of the existing data (only
+requests by default), and the new requests are spread over old and new
+users alike.
+
+Usage:
+    python -m benchmarks.generate_data --requests 10000000
+    python -m benchmarks.generate_data --requests 1000000 --append
+    python -m benchmarks.generate_data --database /tmp/big.sqlite --customers 50000 --skew 1.2
+
+Generated users share the password "password123"; an "admin" user
+(password "admin123") is created if missing.
+"""
+import argparse
+import bisect
+import itertools
+import os
+import random
+import time
+from datetime import datetime, timedelta
+
+from benchmarks.harness import benchmark_app
+
+DEFAULT_DATABASE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmark.sqlite')
+
+# Same catalogue as populate_db.py
+SERVICE_TYPES = {
+    "Cleaning": ["House Cleaning", "Office Cleaning", "Deep Cleaning", "Window Cleaning"],
+    "Plumbing": ["Pipe Repair", "Drain Cleaning", "Fixture Installation", "Water Heater Service"],
+    "Electrical": ["Wiring Installation", "Light Fixture Setup", "Circuit Repair", "Safety Inspection"],
+    "Carpentry": ["Furniture Assembly", "Cabinet Installation", "Wood Repair", "Custom Woodwork"],
+}
+
+STATUSES = ['requested', 'accepted', 'rejected', 'completed']
+STATUS_WEIGHTS = [0.15, 0.2, 0.1, 0.55]
+RATINGS = [5, 4, 3, 2, 1]
+RATING_WEIGHTS = [0.4, 0.3, 0.15, 0.1, 0.05]
+COMMENTS = {
+    5: "Excellent service! Very professional and punctual.",
+    4: "Great work, would definitely recommend!",
+    3: "Service was okay, got the job done.",
+    2: "Delayed and poor communication.",
+    1: "Disappointing service quality.",
+}
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--database', default=DEFAULT_DATABASE, help='SQLite file to fill (default: %(default)s)')
+    parser.add_argument('--customers', type=int, help='customers to create (default: 10000, 0 with --append)')
+    parser.add_argument('--professionals', type=int, help='professionals to create (default: 1000, 0 with --append)')
+    parser.add_argument('--services', type=int, help='services to create over the service types (default: 16, 0 with --append)')
+    parser.add_argument('--requests', type=int, default=100000)
+    parser.add_argument('--review-rate', type=float, default=0.8, help='share of completed requests with a review')
+    parser.add_argument('--approved-rate', type=float, default=0.9, help='share of approved professionals')
+    parser.add_argument('--skew', type=float, default=1.0, help='Zipf exponent of user popularity, 0 for uniform')
+    parser.add_argument('--days', type=int, default=365, help='date span of the requests')
+    parser.add_argument('--end-date', type=lambda value: datetime.strptime(value, '%Y-%m-%d'),
+                        default=datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0),
+                        help='last day of the date span, YYYY-MM-DD (default: today)')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--batch-size', type=int, default=50000)
+    parser.add_argument('--append', action='store_true', help='add to the existing data instead of recreating it')
+    args = parser.parse_args(argv)
+    for name, default in (('customers', 10000), ('professionals', 1000), ('services', 16)):
+        if getattr(args, name) is None:
+            setattr(args, name, 0 if args.append else default)
+    return args
+
+class Chooser:
+    """Weighted choice over a fixed population with a Zipf-like popularity"""
+
+    def __init__(self, population, skew, rng):
+        self.population = list(population)
+        rng.shuffle(self.population)  # popularity must not follow insertion order
+        weights = [1.0 / (rank ** skew) for rank in range(1, len(self.population) + 1)]
+        self.cum_weights = list(itertools.accumulate(weights))
+        self.total = self.cum_weights[-1] if self.cum_weights else 0
+
+    def __call__(self, rng):
+        return self.population[bisect.bisect(self.cum_weights, rng.random() * self.total)]
+
+def next_id(conn, table):
+    from sqlalchemy import func, select
+    return (conn.execute(select(func.max(table.c.id))).scalar() or 0) + 1
+
+def insert_batches(conn, table, rows, batch_size, label, total):
+    """executemany ``rows`` (an iterable of dicts) in batches, committing each one"""
+    written = 0
+    started = time.perf_counter()
+    while True:
+        batch = list(itertools.islice(rows, batch_size))
+        if not batch:
+            break
+        conn.execute(table.insert(), batch)
+        conn.commit()
+        written += len(batch)
+        if total >= batch_size * 4:
+            rate = written / (time.perf_counter() - started)
+            print(f"  {label}: {written:,}/{total:,} ({rate:,.0f} rows/s)", end='\r', flush=True)
+    if total >= batch_size * 4:
+        print()
+    return written
+
+def generate_users(conn, tables, args, rng, password):
+    users, customers, professionals = tables['users'], tables['customer_profiles'], tables['professional_profiles']
+    now = args.end_date
+    service_types = list(SERVICE_TYPES)
+
+    user_id = next_id(conn, users)
+    customer_ids = range(user_id, user_id + args.customers)
+    professional_ids = range(customer_ids.stop, customer_ids.stop + args.professionals)
+
+    def user_rows():
+        for uid in customer_ids:
+            yield {'id': uid, 'username': f'customer_{uid}', 'password': password, 'role': 'Customer',
+                   'date_created': now, 'approve': True, 'blocked': False}
+        for uid in professional_ids:
+            approved = rng.random() < args.approved_rate
+            yield {'id': uid, 'username': f'professional_{uid}', 'password': password, 'role': 'Professional',
+                   'date_created': now, 'approve': approved, 'blocked': not approved}
+
+    def customer_rows():
+        for uid in customer_ids:
+            yield {'user_id': uid, 'full_name': f'Customer {uid}',
+                   'address': f'{rng.randint(1, 999)} Customer Avenue, City',
+                   'pin_code': str(rng.randint(100000, 999999))}
+
+    def professional_rows():
+        for uid in professional_ids:
+            service_type = service_types[uid % len(service_types)]
+            yield {'user_id': uid, 'full_name': f'{service_type} Professional {uid}', 'service_type': service_type,
+                   'experience': f'{rng.randint(1, 15)} years', 'filename': 'default.pdf', 'uploaded_at': now,
+                   'address': f'{rng.randint(1, 999)} Professional Street, City',
+                   'pin_code': str(rng.randint(100000, 999999)), 'reviews': 0}
+
+    total = args.customers + args.professionals
+    insert_batches(conn, users, user_rows(), args.batch_size, 'users', total)
+    insert_batches(conn, customers, customer_rows(), args.batch_size, 'customer profiles', args.customers)
+    insert_batches(conn, professionals, professional_rows(), args.batch_size, 'professional profiles', args.professionals)
+
+def generate_services(conn, tables, args, rng):
+    services = tables['services']
+    service_id = next_id(conn, services)
+    names = [(service_type, name) for service_type, names in SERVICE_TYPES.items() for name in names]
+    rows = []
+    for index in range(args.services):
+        service_type, name = names[index % len(names)]
+        if index >= len(names):
+            name = f'{name} {index // len(names) + 1}'
+        rows.append({'id': service_id + index, 'name': name, 'price': rng.randint(500, 5000),
+                     'description': f'Professional {service_type} service - {name}', 'service_type': service_type})
+    if rows:
+        conn.execute(services.insert(), rows)
+        conn.commit()
+
+def load_population(conn, tables, args, rng):
+    """Choosers over all existing customers, services and approved professionals by service type"""
+    from sqlalchemy import select
+    users, services, professionals = tables['users'], tables['services'], tables['professional_profiles']
+    customer_ids = conn.execute(select(users.c.id).where(users.c.role == 'Customer')).scalars().all()
+    service_rows = conn.execute(select(services.c.id, services.c.service_type)).all()
+    professional_rows = conn.execute(
+        select(professionals.c.user_id, professionals.c.service_type)
+        .join(users, users.c.id == professionals.c.user_id)
+        .where(users.c.approve.is_(True), users.c.blocked.is_(False))
+    ).all()
+
+    by_type = {}
+    for user_id, service_type in professional_rows:
+        by_type.setdefault(service_type, []).append(user_id)
+    services_with_professionals = [(sid, stype) for sid, stype in service_rows if stype in by_type]
+    if not customer_ids or not services_with_professionals:
+        raise SystemExit("Need at least one customer and one service with an approved professional")
+    return (
+        Chooser(customer_ids, args.skew, rng),
+        Chooser(services_with_professionals, args.skew, rng),
+        {stype: Chooser(ids, args.skew, rng) for stype, ids in by_type.items()},
+    )
+
+def generate_requests(conn, tables, args, rng):
+    service_requests, reviews = tables['service_requests'], tables['reviews']
+    choose_customer, choose_service, professional_choosers = load_population(conn, tables, args, rng)
+    request_id = next_id(conn, service_requests)
+    review_id = next_id(conn, reviews)
+    now = args.end_date
+    span = args.days * 24 * 3600
+    status_cum = list(itertools.accumulate(STATUS_WEIGHTS))
+    rating_cum = list(itertools.accumulate(RATING_WEIGHTS))
+    pending_reviews = []
+
+    def request_rows():
+        nonlocal review_id
+        for rid in range(request_id, request_id + args.requests):
+            service_id, service_type = choose_service(rng)
+            customer_id = choose_customer(rng)
+            professional_id = professional_choosers[service_type](rng)
+            requested = now - timedelta(seconds=rng.randrange(span))
+            status = STATUSES[bisect.bisect(status_cum, rng.random() * status_cum[-1])]
+            accept_reject = completed = None
+            if status != 'requested':
+                accept_reject = requested + timedelta(days=rng.randint(1, 3))
+            if status == 'completed':
+                completed = accept_reject + timedelta(days=rng.randint(1, 7))
+                if rng.random() < args.review_rate:
+                    rating = RATINGS[bisect.bisect(rating_cum, rng.random() * rating_cum[-1])]
+                    pending_reviews.append({
+                        'id': review_id, 'service_request_id': rid, 'customer_id': customer_id,
+                        'professional_id': professional_id, 'rating': rating, 'comment': COMMENTS[rating],
+                        'created_at': completed + timedelta(days=rng.randint(1, 5)),
+                    })
+                    review_id += 1
+            yield {
+                'id': rid, 'service_id': service_id, 'customer_id': customer_id,
+                'professional_id': professional_id, 'date_of_request': requested,
+                'date_of_accept_reject': accept_reject, 'date_of_completion': completed,
+                'service_status': status, 'remarks': f'Service request {rid}',
+            }
+
+    rows = request_rows()
+    written = reviewed = 0
+    started = time.perf_counter()
+    while True:
+        batch = list(itertools.islice(rows, args.batch_size))
+        if not batch:
+            break
+        conn.execute(service_requests.insert(), batch)
+        if pending_reviews:
+            conn.execute(reviews.insert(), pending_reviews)
+            reviewed += len(pending_reviews)
+            pending_reviews.clear()
+        conn.commit()
+        written += len(batch)
+        rate = written / (time.perf_counter() - started)
+        print(f"  service requests: {written:,}/{args.requests:,} ({rate:,.0f} rows/s)", end='\r', flush=True)
+    print()
+    return written, reviewed
+
+def update_ratings(conn, tables):
+    """Recompute every professional's average rating from one aggregate query"""
+    from sqlalchemy import bindparam, func, select, update
+    reviews, professionals = tables['reviews'], tables['professional_profiles']
+    averages = conn.execute(
+        select(reviews.c.professional_id, func.round(func.avg(reviews.c.rating), 1))
+        .group_by(reviews.c.professional_id)
+    ).all()
+    if averages:
+        conn.execute(
+            update(professionals).where(professionals.c.user_id == bindparam('professional_id'))
+            .values(reviews=bindparam('average')),
+            [{'professional_id': professional_id, 'average': average} for professional_id, average in averages]
+        )
+        conn.commit()
+
+def ensure_admin(conn, tables):
+    from sqlalchemy import select
+    from werkzeug.security import generate_password_hash
+    users = tables['users']
+    if conn.execute(select(users.c.id).where(users.c.username == 'admin')).first() is None:
+        conn.execute(users.insert(), [{'username': 'admin', 'password': generate_password_hash('admin123'),
+                                       'role': 'Admin', 'approve': True, 'blocked': False}])
+        conn.commit()
+
+def generate(app, args):
+    from werkzeug.security import generate_password_hash
+    from models import db
+    rng = random.Random(args.seed)
+
+    with app.app_context():
+        if args.append:
+            # Continue deterministically from the current size of the data
+            with db.engine.connect() as conn:
+                rng.seed(f"{args.seed}:{next_id(conn, db.metadata.tables['service_requests'])}")
+
+        tables = db.metadata.tables
+        # Hashing is deliberately slow, all generated users share one hash
+        password = generate_password_hash('password123')
+
+        with db.engine.connect() as conn:
+            if conn.dialect.name == 'sqlite':
+                conn.exec_driver_sql('PRAGMA synchronous=OFF')
+                conn.exec_driver_sql('PRAGMA journal_mode=MEMORY')
+            ensure_admin(conn, tables)
+            generate_services(conn, tables, args, rng)
+            generate_users(conn, tables, args, rng, password)
+            written, reviewed = generate_requests(conn, tables, args, rng)
+            update_ratings(conn, tables)
+    return written, reviewed
+
+def main(argv=None):
+    args = parse_args(argv)
+    database = os.path.abspath(args.database)
+    if os.path.basename(database) == 'db.sqlite':
+        raise SystemExit("Refusing to write benchmark data to the application database")
+    if not args.append and os.path.exists(database):
+        os.remove(database)
+    app = benchmark_app(database)
+
+    started = time.perf_counter()
+    written, reviewed = generate(app, args)
+    elapsed = time.perf_counter() - started
+    print(f"Wrote {written:,} service requests and {reviewed:,} reviews in {elapsed:.1f}s to {database}")
+
+if __name__ == '__main__':
+    main()
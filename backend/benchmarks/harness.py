@@ -0,0 +1,73 @@
+"""
+Small timing harness shared by the benchmark scripts
+"""
+import gc
+import os
+import statistics
+import tempfile
+import time
+
+def measure(fn, repeat=5, number=1):
+    """
+    Run ``fn`` ``number`` times per round for ``repeat`` rounds.
+    Returns the best, median and mean seconds per round.
+    """
+    timings = []
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for _ in range(repeat):
+            start = time.perf_counter()
+            for _ in range(number):
+                fn()
+            timings.append(time.perf_counter() - start)
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+    return {
+        "best": min(timings),
+        "median": statistics.median(timings),
+        "mean": statistics.mean(timings),
+        "rounds": repeat
+    }
+
+def print_results(title, results):
+    """
+    Print a table of results as returned by ``measure``, keyed by case name
+    """
+    print(title)
+    width = max(len(name) for name in results)
+    baseline = None
+    for name, result in results.items():
+        if baseline is None:
+            baseline = result['median']
+        speedup = baseline / result['median'] if result['median'] else float('inf')
+        print(f"  {name:<{width}}  best {result['best'] * 1000:9.2f} ms"
+              f"  median {result['median'] * 1000:9.2f} ms  x{speedup:.2f}")
+
+def benchmark_app(database_path=None):
+    """
+    Create the app against a throwaway SQLite database (or ``database_path``)
+    with an in-process cache and task pool, so benchmarks never touch db.sqlite or Redis
+    """
+    path = database_path or os.path.join(tempfile.mkdtemp(prefix='benchmark-'), 'benchmark.sqlite')
+    os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.abspath(path)
+    os.environ.setdefault('CACHE_TYPE', 'SimpleCache')
+    os.environ.setdefault('TASK_BACKEND', 'thread')
+    # Every benchmark client comes from one address and logs in far more often than a person would
+    os.environ.setdefault('RATE_LIMIT_ENABLED', '0')
+    os.environ.setdefault('LOG_LEVEL', 'WARNING')
+    from app import create_app
+    from models import db
+    from utils.schema import create_schema
+    app = create_app()
+    with app.app_context():
+        create_schema(db)
+    return app
+
+def auth_header(app, user_id, refresh=False):
+    """Authorization header with a fresh access (or ``refresh``) token for ``user_id``"""
+    from flask_jwt_extended import create_access_token, create_refresh_token
+    create_token = create_refresh_token if refresh else create_access_token
+    with app.app_context():
+        return {'Authorization': f'Bearer {create_token(identity=str(user_id))}'}
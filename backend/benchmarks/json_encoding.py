@@ -0,0 +1,92 @@
+#!/usr/bin/env python
+"""
+Benchmark JSON encoding of the largest list responses.
+Compares Flask's default provider with ``FastJSONProvider`` on payloads
+shaped like ``/admin/service-requests`` and ``/customer/requests``, and
+reports encode time and memory allocated per response.
+
+Usage:
+    python -m benchmarks.json_encoding [rows]
+"""
+import sys
+import tracemalloc
+
+from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+
+from models import ServiceRequest, ProfessionalProfile
+from utils.json_provider import FastJSONProvider
+from benchmarks.harness import measure, print_results
+from benchmarks.serialization import make_rows
+
+def admin_service_requests_payload(rows):
+    serialize_req = ServiceRequest.serializer()
+    serialize_prof = ProfessionalProfile.serializer()
+    professionals = {
+        i: serialize_prof(ProfessionalProfile(
+            id=i, user_id=i, full_name=f'Professional {i}', service_type='Cleaning',
+            experience='5 years', filename='default.pdf', address='1 Street, City',
+            pin_code='123456', reviews=4.5
+        ))
+        for i in range(40)
+    }
+    return {"requests": [serialize_req(r) for r in rows], "professionals": professionals}
+
+def customer_requests_payload(rows):
+    serialize = ServiceRequest.serializer()
+    result = []
+    for row in rows:
+        data = serialize(row)
+        data.update({
+            'service_name': 'House Cleaning',
+            'service_description': 'Professional Cleaning service - House Cleaning',
+            'service_price': 1500.0,
+            'service_type': 'Cleaning',
+            'professional_name': 'Cleaning Professional 1'
+        })
+        result.append(data)
+    return result
+
+def allocations(app, payload):
+    """Return (bytes allocated at peak, number of live blocks) for one response"""
+    with app.app_context():
+        tracemalloc.start()
+        try:
+            before = tracemalloc.take_snapshot()
+            response = app.json.response(payload)
+            after = tracemalloc.take_snapshot()
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        blocks = sum(stat.count_diff for stat in after.compare_to(before, 'filename'))
+        del response
+    return peak, blocks
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    rows = make_rows(count)
+    payloads = {
+        "/admin/service-requests": admin_service_requests_payload(rows),
+        "/customer/requests": customer_requests_payload(rows),
+    }
+
+    default_app = Flask('default')
+    default_app.json = DefaultJSONProvider(default_app)
+    fast_app = Flask('fast')
+    fast_app.json = FastJSONProvider(fast_app)
+    apps = {"flask default": default_app, "FastJSONProvider": fast_app}
+
+    for endpoint, payload in payloads.items():
+        results = {}
+        for name, app in apps.items():
+            def encode(app=app):
+                with app.app_context():
+                    app.json.response(payload)
+            results[name] = measure(encode)
+        print_results(f"Encoding {endpoint} with {count} rows", results)
+        for name, app in apps.items():
+            peak, blocks = allocations(app, payload)
+            print(f"  {name:<17} peak {peak / 1024:9.1f} KiB  blocks allocated {blocks}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,644 @@
+#!/usr/bin/env python
+"""
+Load test: how many concurrent users one node supports.
+
+Virtual users follow the real flows of the three personas over HTTP:
+
+- customer: registers, creates a profile, then browses and searches
+  services, books a professional, checks their requests, closes accepted
+  ones and reviews completed ones
+- professional: logs in as one of the dataset's professionals and polls
+  their requests, accepting new ones and completing accepted ones
+- admin: logs in and searches, looks at the dashboards and exports a
+  professional's requests
+
+Users are started and stopped following a ramp-up schedule of stages
+("DURATION:USERS", ramping linearly to USERS over DURATION seconds), each
+waiting a random think time between steps. Throughput, latency percentiles
+and errors are reported per interval together with the number of users,
+followed by a saturation report: the throughput knee (the fewest users
+reaching 95% of the peak throughput) and the first interval over the p95
+latency or error rate limits.
+
+The generator is plain asyncio with keep-alive HTTP/1.1 connections, one
+per virtual user, so it needs nothing beyond the standard library. It runs
+against a server started separately on a dataset from generate_data.py, or
+with --serve starts the development server on a copy of one:
+
+    python -m benchmarks.load serve --scale small --port 5000
+    python -m benchmarks.load run --url http://127.0.0.1:5000 --stages 30:10,60:50,60:100
+
+    python -m benchmarks.load run --serve small --stages 20:20,20:40 --p95-limit 500
+
+To measure a production setup, start gunicorn with DATABASE_URL pointing at
+a generated dataset and RATE_LIMIT_ENABLED=0 (all virtual users share one
+address) and pass its --url instead. Professionals log in with the
+generated usernames (professional_<id>) and password.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import shutil
+import signal
+import statistics
+import subprocess
+import sys
+import time
+import urllib.request
+from datetime import datetime
+from urllib.parse import quote, urlsplit
+
+from benchmarks.endpoints import RESULTS_DIR, SCALES, git_commit, prepare_database
+
+DEFAULT_STAGES = '30:10,30:25,30:50,30:100'
+DEFAULT_MIX = 'customer=70,professional=20,admin=10'
+
+class HTTPClient:
+    """Minimal HTTP/1.1 client keeping one connection alive between requests"""
+
+    def __init__(self, url, timeout):
+        parts = urlsplit(url)
+        self.host = parts.hostname
+        self.port = parts.port or 80
+        self.timeout = timeout
+        self.reader = self.writer = None
+        self.cached = {}  # path -> (ETag, decoded body) of the last 200 answer to a GET
+
+    async def request(self, method, path, body=None, token=None):
+        """
+        Send a request, returning the status and the decoded JSON body (or None).
+        A 304 comes with the body of the cached 200, like a browser's cache serves it.
+        """
+        payload = b'' if body is None else json.dumps(body).encode('utf-8')
+        lines = [f'{method} {path} HTTP/1.1', f'Host: {self.host}:{self.port}', 'Accept: application/json']
+        if token:
+            lines.append(f'Authorization: Bearer {token}')
+        if method == 'GET' and path in self.cached:
+            # Like a browser revalidating its cached copy
+            lines.append(f'If-None-Match: {self.cached[path][0]}')
+        if body is not None or method in ('POST', 'PUT'):
+            lines.append('Content-Type: application/json')
+            lines.append(f'Content-Length: {len(payload)}')
+        message = ('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1') + payload
+
+        reused = self.writer is not None
+        try:
+            return await asyncio.wait_for(self._exchange(method, path, message), self.timeout)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            self.close()
+            if not reused:
+                raise
+            # The server closed the idle connection, retry once on a new one
+            return await asyncio.wait_for(self._exchange(method, path, message), self.timeout)
+        except BaseException:
+            self.close()
+            raise
+
+    async def _exchange(self, method, path, message):
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+        self.writer.write(message)
+        await self.writer.drain()
+
+        status_line = await self.reader.readuntil(b'\r\n')
+        version, status = status_line.decode('latin-1').split(' ', 2)[:2]
+        headers = {}
+        while True:
+            line = await self.reader.readuntil(b'\r\n')
+            if line == b'\r\n':
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+
+        if headers.get('transfer-encoding', '').lower() == 'chunked':
+            chunks = []
+            while True:
+                size = int((await self.reader.readuntil(b'\r\n')).split(b';')[0], 16)
+                chunk = await self.reader.readexactly(size + 2)
+                if size == 0:
+                    break
+                chunks.append(chunk[:-2])
+            content = b''.join(chunks)
+        elif 'content-length' in headers:
+            content = await self.reader.readexactly(int(headers['content-length']))
+        else:
+            content = await self.reader.read()
+            headers['connection'] = 'close'
+
+        keep_alive = version == 'HTTP/1.1' and headers.get('connection', '').lower() != 'close'
+        if not keep_alive:
+            self.close()
+
+        status = int(status)
+        if status == 304 and path in self.cached:
+            return status, self.cached[path][1]
+        data = None
+        if headers.get('content-type', '').startswith('application/json') and content:
+            data = json.loads(content)
+        if status == 200 and method == 'GET' and 'etag' in headers:
+            self.cached[path] = (headers['etag'], data)
+        return status, data
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+        self.reader = self.writer = None
+
+class Stats:
+    """Every request's completion time, endpoint, latency and outcome"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.records = []
+        self.users = {}  # second -> highest number of running users
+
+    def record(self, name, latency, status):
+        self.records.append((time.perf_counter() - self.started, name, latency, status))
+
+    def sample_users(self, count):
+        second = int(time.perf_counter() - self.started)
+        self.users[second] = max(self.users.get(second, 0), count)
+
+def percentiles(latencies):
+    if len(latencies) > 1:
+        cuts = statistics.quantiles(latencies, n=100, method='inclusive')
+        return cuts[49], cuts[94], cuts[98]
+    return latencies[0], latencies[0], latencies[0]
+
+def is_error(status):
+    # 4xx are answers to the flow's requests, failures are 5xx, timeouts and connection errors
+    return not isinstance(status, int) or status >= 500
+
+class Shared:
+    """State all virtual users draw from, fetched once before the ramp-up"""
+
+    def __init__(self, args):
+        self.url = args.url
+        self.timeout = args.timeout
+        self.password = args.password
+        self.admin_password = args.admin_password
+        self.think = (args.think_min, args.think_max)
+        self.run_id = int(time.time())
+        self.professionals = []  # (user_id, service_type) of the professional personas
+        self.services = {}  # service_type -> [service ids]
+
+    async def load(self, stats, size, rng):
+        user = AdminUser(self, stats, rng)
+        await user.login()
+        _, professionals = await user.call('GET', '/admin/professionals')
+        _, services = await user.call('GET', '/admin/services')
+        user.client.close()
+        for service in services:
+            self.services.setdefault(service['service_type'], []).append(service['id'])
+        bookable = [p for p in professionals if p.get('has_profile') and p['approve'] and not p['blocked']
+                    and p['service_type'] in self.services]
+        if not bookable:
+            raise SystemExit('The server has no approved professionals to book, load it with generate_data.py')
+        self.professionals = [(p['user_id'], p['service_type']) for p in rng.sample(bookable, min(size, len(bookable)))]
+
+class VirtualUser:
+    """
+    A persona's scripted session; ``run`` loops until the user is stopped.
+    Personas log in at ``login_path`` as ``username`` with ``password``.
+    """
+    login_path = '/login'
+
+    def __init__(self, shared, stats, rng, username, password):
+        self.shared = shared
+        self.stats = stats
+        self.rng = rng
+        self.username = username
+        self.password = password
+        self.client = HTTPClient(shared.url, shared.timeout)
+        self.token = None
+        self.refresh_token = None
+
+    async def call(self, method, path, body=None, name=None, relogin=True):
+        name = name or f'{method} {path}'
+        start = time.perf_counter()
+        try:
+            status, data = await self.client.request(method, path, body, self.token)
+        except asyncio.TimeoutError:
+            status, data = 'timeout', None
+        except (OSError, asyncio.IncompleteReadError, ValueError) as e:
+            status, data = type(e).__name__, None
+        self.stats.record(name, time.perf_counter() - start, status)
+        if status == 401 and self.token and relogin:
+            # The access token expired during a long run, renew it like the frontend does
+            if not await self.refresh():
+                await self.login()
+            return await self.call(method, path, body, name, relogin=False)
+        return status, data
+
+    def store_tokens(self, data):
+        self.token = (data or {}).get('access_token')
+        self.refresh_token = (data or {}).get('refresh_token')
+
+    async def refresh(self):
+        if not self.refresh_token:
+            return False
+        self.token = self.refresh_token
+        status, data = await self.call('POST', '/refresh', relogin=False)
+        self.store_tokens(data if status == 200 else None)
+        return status == 200
+
+    async def think(self):
+        await asyncio.sleep(self.rng.uniform(*self.shared.think))
+
+    async def login(self):
+        _, data = await self.call('POST', self.login_path, {'username': self.username, 'password': self.password},
+                                  relogin=False)
+        self.store_tokens(data)
+
+    async def run(self):
+        try:
+            await self.session()
+        finally:
+            self.client.close()
+
+class CustomerUser(VirtualUser):
+    def __init__(self, shared, stats, rng, number):
+        super().__init__(shared, stats, rng, f'load_{shared.run_id}_{number}', shared.password)
+        self.reviewed = set()
+
+    async def session(self):
+        await self.call('POST', '/register', {'username': self.username, 'password': self.password,
+                                              'role': 'Customer'})
+        await self.login()
+        if not self.token:
+            return
+        await self.call('POST', '/customer/profile', {
+            'full_name': f'Load Customer {self.username}', 'address': '1 Load Test Road, City', 'pin_code': '123456'})
+        while True:
+            await self.think()
+            professional_id, service_type = self.rng.choice(self.shared.professionals)
+            await self.call('GET', '/customer/services')
+            await self.call('GET', f'/services/search?service_type={quote(service_type)}&location=City',
+                            name='GET /services/search')
+            await self.call('GET', f'/customer/professionals/{quote(service_type)}',
+                            name='GET /customer/professionals/<service_type>')
+            await self.think()
+            await self.call('POST', '/customer/request', {
+                'service_id': self.rng.choice(self.shared.services[service_type]),
+                'professional_id': professional_id, 'remarks': 'Load test booking'})
+            await self.think()
+            _, requests = await self.call('GET', '/customer/requests')
+            for service_request in requests or []:
+                if service_request['service_status'] == 'accepted':
+                    await self.call('PUT', f"/customer/request/{service_request['id']}/close",
+                                    name='PUT /customer/request/<id>/close')
+                elif service_request['service_status'] == 'completed' and service_request['id'] not in self.reviewed:
+                    self.reviewed.add(service_request['id'])
+                    await self.call('POST', f"/review/{service_request['id']}", {
+                        'rating': self.rng.randint(1, 5), 'comment': 'Load test review'}, name='POST /review/<id>')
+
+class ProfessionalUser(VirtualUser):
+    def __init__(self, shared, stats, rng, number):
+        self.user_id = shared.professionals[number % len(shared.professionals)][0]
+        super().__init__(shared, stats, rng, f'professional_{self.user_id}', shared.password)
+
+    async def session(self):
+        await self.login()
+        if not self.token:
+            return
+        await self.call('GET', '/professional/profile')
+        while True:
+            await self.think()
+            status, data = await self.call('GET', '/professional/requests?fields=id,service_status',
+                                           name='GET /professional/requests')
+            if status not in (200, 304):
+                continue
+            pending = [r['id'] for r in data['requests'] if r['service_status'] == 'requested']
+            accepted = [r['id'] for r in data['requests'] if r['service_status'] == 'accepted']
+            for request_id in pending[-3:]:
+                await self.call('PUT', f'/professional/request/{request_id}',
+                                {'status': 'accepted' if self.rng.random() < 0.9 else 'rejected'},
+                                name='PUT /professional/request/<id>')
+            if accepted and self.rng.random() < 0.5:
+                await self.call('PUT', f'/professional/request/{self.rng.choice(accepted)}', {'status': 'completed'},
+                                name='PUT /professional/request/<id>')
+            if self.rng.random() < 0.2:
+                await self.call('GET', '/reviews/received')
+
+class AdminUser(VirtualUser):
+    login_path = '/admin/login'
+
+    def __init__(self, shared, stats, rng, number=0):
+        super().__init__(shared, stats, rng, 'admin', shared.admin_password)
+
+    async def session(self):
+        await self.login()
+        if not self.token:
+            return
+        actions = [
+            (4, self.search),
+            (2, lambda: self.call('GET', '/admin/professionals')),
+            (2, lambda: self.call('GET', '/admin/services')),
+            (1, lambda: self.call('GET', '/admin/summary/service_requests')),
+            (1, lambda: self.call('GET', '/admin/summary/ratings')),
+            (1, lambda: self.call('GET', '/admin/service-requests')),
+            (1, self.export),
+        ]
+        weights = [weight for weight, _ in actions]
+        while True:
+            await self.think()
+            await self.rng.choices(actions, weights)[0][1]()
+
+    async def search(self):
+        professional_id, service_type = self.rng.choice(self.shared.professionals)
+        search_type, text = self.rng.choice([
+            ('service', service_type), ('professional', 'Professional'), ('customer', 'Customer'),
+        ])
+        await self.call('POST', '/admin/search', {'search_type': search_type, 'search_text': text},
+                        name=f'POST /admin/search ({search_type})')
+
+    async def export(self):
+        professional_id, _ = self.rng.choice(self.shared.professionals)
+        await self.call('GET', f'/admin/export/{professional_id}', name='GET /admin/export/<professional_id>')
+
+PERSONAS = {'customer': CustomerUser, 'professional': ProfessionalUser, 'admin': AdminUser}
+
+def parse_stages(text):
+    stages = []
+    for stage in text.split(','):
+        duration, users = stage.split(':')
+        stages.append((float(duration), int(users)))
+    return stages
+
+def parse_mix(text):
+    mix = {}
+    for item in text.split(','):
+        persona, weight = item.split('=')
+        if persona not in PERSONAS:
+            raise argparse.ArgumentTypeError(f'unknown persona {persona}')
+        mix[persona] = float(weight)
+    return mix
+
+def target_users(stages, elapsed):
+    """Users that should be running ``elapsed`` seconds into the schedule, None once it is over"""
+    previous = 0
+    for duration, users in stages:
+        if elapsed < duration:
+            return round(previous + (users - previous) * elapsed / duration)
+        elapsed -= duration
+        previous = users
+    return None
+
+async def drive(shared, stats, stages, mix, seed):
+    """Start and stop virtual users following the schedule"""
+    running = []  # (persona, task), newest last
+    started = {persona: 0 for persona in mix}
+    total_weight = sum(mix.values())
+    schedule_start = time.perf_counter()
+    try:
+        while True:
+            target = target_users(stages, time.perf_counter() - schedule_start)
+            if target is None:
+                break
+            running = [(persona, task) for persona, task in running if not task.done()]
+            while len(running) < target:
+                # The persona furthest below its share of the running users
+                counts = {persona: sum(1 for p, _ in running if p == persona) for persona in mix}
+                persona = min(mix, key=lambda p: counts[p] / (len(running) + 1) - mix[p] / total_weight)
+                number = started[persona]
+                started[persona] += 1
+                rng = random.Random(f'{seed}-{persona}-{number}')
+                user = PERSONAS[persona](shared, stats, rng, number)
+                running.append((persona, asyncio.create_task(user.run())))
+            while len(running) > target:
+                running.pop()[1].cancel()
+            stats.sample_users(len(running))
+            await asyncio.sleep(0.5)
+    finally:
+        for _, task in running:
+            task.cancel()
+        await asyncio.gather(*(task for _, task in running), return_exceptions=True)
+
+def interval_report(stats, interval):
+    rows = []
+    duration = max([second for second in stats.users] + [0]) + 1
+    for start in range(0, int(duration), interval):
+        records = [r for r in stats.records if start <= r[0] < start + interval]
+        users = max([count for second, count in stats.users.items() if start <= second < start + interval] or [0])
+        if not records:
+            rows.append({'start_s': start, 'users': users, 'requests': 0})
+            continue
+        latencies = [r[2] for r in records]
+        p50, p95, p99 = percentiles(latencies)
+        errors = sum(1 for r in records if is_error(r[3]))
+        rows.append({
+            'start_s': start,
+            'users': users,
+            'requests': len(records),
+            'rps': round(len(records) / interval, 2),
+            'p50_ms': round(p50 * 1000, 2),
+            'p95_ms': round(p95 * 1000, 2),
+            'p99_ms': round(p99 * 1000, 2),
+            'error_rate': round(errors / len(records), 4),
+        })
+    return rows
+
+def endpoint_report(stats):
+    by_name = {}
+    for _, name, latency, status in stats.records:
+        by_name.setdefault(name, []).append((latency, status))
+    report = {}
+    for name, calls in sorted(by_name.items()):
+        p50, p95, p99 = percentiles([latency for latency, _ in calls])
+        statuses = {}
+        for _, status in calls:
+            statuses[str(status)] = statuses.get(str(status), 0) + 1
+        report[name] = {
+            'count': len(calls),
+            'p50_ms': round(p50 * 1000, 2),
+            'p95_ms': round(p95 * 1000, 2),
+            'p99_ms': round(p99 * 1000, 2),
+            'statuses': statuses,
+        }
+    return report
+
+def saturation_report(rows, p95_limit, max_error_rate):
+    """Throughput knee and the first interval over the latency or error limits"""
+    loaded = [row for row in rows if row['requests']]
+    if not loaded:
+        return None
+    peak = max(loaded, key=lambda row: row['rps'])
+    knee = min((row for row in loaded if row['rps'] >= 0.95 * peak['rps']), key=lambda row: row['users'])
+    breach = next((row for row in loaded if row['p95_ms'] > p95_limit or row['error_rate'] > max_error_rate), None)
+    healthy = [row for row in loaded if row['p95_ms'] <= p95_limit and row['error_rate'] <= max_error_rate
+               and (breach is None or row['start_s'] < breach['start_s'])]
+    return {
+        'peak_rps': peak['rps'],
+        'peak_users': peak['users'],
+        'knee_users': knee['users'],
+        'breach': breach,
+        'max_healthy_users': max((row['users'] for row in healthy), default=0),
+        'p95_limit_ms': p95_limit,
+        'max_error_rate': max_error_rate,
+    }
+
+def print_report(rows, endpoints, saturation):
+    print(f"{'time':>6}  {'users':>5}  {'req/s':>8}  {'p50':>9}  {'p95':>9}  {'p99':>9}  errors")
+    for row in rows:
+        if not row['requests']:
+            print(f"{row['start_s']:>5}s  {row['users']:>5}  {'-':>8}")
+            continue
+        print(f"{row['start_s']:>5}s  {row['users']:>5}  {row['rps']:>8.1f}  {row['p50_ms']:7.1f}ms"
+              f"  {row['p95_ms']:7.1f}ms  {row['p99_ms']:7.1f}ms  {row['error_rate']:.2%}")
+
+    width = max(len(name) for name in endpoints)
+    print(f"\n{'endpoint':<{width}}  {'count':>6}  {'p50':>9}  {'p95':>9}  statuses")
+    for name, summary in endpoints.items():
+        print(f"{name:<{width}}  {summary['count']:>6}  {summary['p50_ms']:7.1f}ms  {summary['p95_ms']:7.1f}ms"
+              f"  {summary['statuses']}")
+
+    print('\nSaturation')
+    if saturation is None:
+        print('  no requests completed')
+        return
+    print(f"  peak throughput {saturation['peak_rps']:.1f} req/s with {saturation['peak_users']} users")
+    print(f"  throughput knee at {saturation['knee_users']} users (95% of peak)")
+    breach = saturation['breach']
+    if breach is None:
+        print(f"  p95 stayed under {saturation['p95_limit_ms']:g} ms and errors under "
+              f"{saturation['max_error_rate']:.1%} up to {saturation['max_healthy_users']} users")
+    else:
+        print(f"  limits exceeded at {breach['users']} users (p95 {breach['p95_ms']:.1f} ms, "
+              f"errors {breach['error_rate']:.2%}); last healthy interval had {saturation['max_healthy_users']} users")
+
+def wait_for_server(url, process, timeout=60):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise SystemExit('The server exited during startup')
+        try:
+            urllib.request.urlopen(url + '/api', timeout=1).close()
+            return
+        except OSError:
+            time.sleep(0.5)
+    raise SystemExit(f'The server did not answer on {url} within {timeout}s')
+
+def stop_server(process, timeout=10):
+    """Stop the server and every process it started, e.g. the password hashing pool"""
+    try:
+        os.killpg(process.pid, signal.SIGTERM)
+        process.wait(timeout)
+    except subprocess.TimeoutExpired:
+        os.killpg(process.pid, signal.SIGKILL)
+        process.wait()
+    except ProcessLookupError:
+        pass
+    try:
+        os.killpg(process.pid, signal.SIGKILL)  # whatever outlived the server
+    except ProcessLookupError:
+        pass
+
+def run(args):
+    stages = parse_stages(args.stages)
+    mix = parse_mix(args.mix)
+    server = None
+    if args.serve:
+        port = urlsplit(args.url).port or 80
+        server = subprocess.Popen([sys.executable, '-m', 'benchmarks.load', 'serve', '--scale', args.serve,
+                                   '--port', str(port)], cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                  start_new_session=True)
+    try:
+        if server is not None:
+            wait_for_server(args.url, server)
+        stats = Stats()
+        shared = Shared(args)
+        rng = random.Random(args.seed)
+
+        async def main():
+            await shared.load(stats, args.professionals, rng)
+            stats.records.clear()
+            stats.started = time.perf_counter()
+            await drive(shared, stats, stages, mix, args.seed)
+        print(f"Ramping {', '.join(f'to {users} users over {duration:g}s' for duration, users in stages)} "
+              f"against {args.url}")
+        asyncio.run(main())
+    finally:
+        if server is not None:
+            stop_server(server)
+
+    rows = interval_report(stats, args.interval)
+    endpoints = endpoint_report(stats)
+    saturation = saturation_report(rows, args.p95_limit, args.max_error_rate)
+    print_report(rows, endpoints, saturation)
+
+    output = args.output or os.path.join(RESULTS_DIR, f"load-{git_commit() or 'local'}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump({
+            'meta': {
+                'commit': git_commit(),
+                'date': datetime.now().isoformat(timespec='seconds'),
+                'url': args.url,
+                'stages': stages,
+                'mix': mix,
+                'think_s': [args.think_min, args.think_max],
+                'python': platform.python_version(),
+            },
+            'intervals': rows,
+            'endpoints': endpoints,
+            'saturation': saturation,
+        }, f, indent=2)
+    print(f"\nResults written to {output}")
+
+def serve(args):
+    """Run the development server on a copy of a generated dataset"""
+    import logging
+    from benchmarks.harness import benchmark_app
+    import utils.export_tasks as export_tasks
+    workdir, database = prepare_database(args.scale, args.seed)
+    try:
+        app = benchmark_app(database)
+        app.config['UPLOAD_FOLDER'] = os.path.join(workdir, 'uploads')
+        export_tasks.REPORTS_DIR = os.path.join(workdir, 'reports')
+        os.makedirs(export_tasks.REPORTS_DIR, exist_ok=True)
+        # The access log of every request would be part of the measured work
+        logging.getLogger('werkzeug').setLevel(logging.WARNING)
+        print(f"Serving the {args.scale} dataset on http://{args.host}:{args.port}", flush=True)
+        app.run(host=args.host, port=args.port, threaded=True, use_reloader=False)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Load test with customer, professional and admin personas')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = commands.add_parser('run', help='run the load test against a server')
+    run_parser.add_argument('--url', default='http://127.0.0.1:5000')
+    run_parser.add_argument('--serve', choices=SCALES, help='start the development server on a dataset of this scale')
+    run_parser.add_argument('--stages', default=DEFAULT_STAGES,
+                            help=f'ramp-up schedule as DURATION:USERS,... (default: {DEFAULT_STAGES})')
+    run_parser.add_argument('--mix', default=DEFAULT_MIX, help=f'persona weights (default: {DEFAULT_MIX})')
+    run_parser.add_argument('--professionals', type=int, default=20,
+                            help='professionals customers book and professional users log in as')
+    run_parser.add_argument('--think-min', type=float, default=0.5, help='shortest think time in seconds')
+    run_parser.add_argument('--think-max', type=float, default=2.0, help='longest think time in seconds')
+    run_parser.add_argument('--timeout', type=float, default=30.0, help='request timeout in seconds')
+    run_parser.add_argument('--interval', type=int, default=5, help='report interval in seconds')
+    run_parser.add_argument('--p95-limit', type=float, default=1000.0, help='p95 latency limit in ms (default: 1000)')
+    run_parser.add_argument('--max-error-rate', type=float, default=0.01, help='error rate limit (default: 0.01)')
+    run_parser.add_argument('--password', default='password123', help='password of the generated users')
+    run_parser.add_argument('--admin-password', default='admin123')
+    run_parser.add_argument('--seed', type=int, default=42)
+    run_parser.add_argument('--output', help='results file (default: benchmarks/results/load-<commit>.json)')
+    run_parser.set_defaults(handler=run)
+
+    serve_parser = commands.add_parser('serve', help='run the development server on a generated dataset')
+    serve_parser.add_argument('--scale', choices=SCALES, default='small')
+    serve_parser.add_argument('--host', default='127.0.0.1')
+    serve_parser.add_argument('--port', type=int, default=5000)
+    serve_parser.add_argument('--seed', type=int, default=42)
+    serve_parser.set_defaults(handler=serve)
+
+    args = parser.parse_args(argv)
+    args.handler(args)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,118 @@
+#!/usr/bin/env python
+"""
+Login throughput under concurrent load.
+
+Logs in with ``--concurrency`` threads at once for each password hashing
+pool size in ``--workers`` (0 hashes on the request threads), while a probe
+thread keeps calling the cheap /api endpoint. Reports logins per second,
+login latency, logins refused with 503 because the hashing queue was full,
+and the probe latency, which shows how much the hashing starves other
+requests.
+
+Usage:
+    python -m benchmarks.login_throughput [--workers 0,1,2,4] [--concurrency 16] [--logins 200]
+    python -m benchmarks.login_throughput --method pbkdf2:sha256:600000
+"""
+import argparse
+import os
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.harness import benchmark_app
+
+def seed(app, users, method):
+    from werkzeug.security import generate_password_hash
+    from models import db, User
+    with app.app_context():
+        password = generate_password_hash('password123', method)
+        db.session.add_all([
+            User(username=f'login_{i}', password=password, role='Customer', approve=True, blocked=False)
+            for i in range(users)
+        ])
+        db.session.commit()
+
+def percentile_ms(latencies, percent):
+    if len(latencies) < 2:
+        return (latencies[0] if latencies else 0) * 1000
+    return statistics.quantiles(latencies, n=100, method='inclusive')[percent - 1] * 1000
+
+def run(app, workers, concurrency, logins, users):
+    from utils.passwords import PasswordHasher
+    config = app.config
+    hasher = PasswordHasher(config['PASSWORD_HASH_METHOD'], workers, config['PASSWORD_HASH_QUEUE_LIMIT'],
+                            config['PASSWORD_HASH_TIMEOUT'])
+    app.extensions['password_hasher'] = hasher
+    if workers:
+        # Start the pool processes outside of the measurement
+        list(hasher._pool().map(abs, range(workers)))
+
+    stop = threading.Event()
+    probe_latencies = []
+
+    def probe():
+        client = app.test_client()
+        while not stop.is_set():
+            start = time.perf_counter()
+            client.get('/api')
+            probe_latencies.append(time.perf_counter() - start)
+            time.sleep(0.01)
+
+    local = threading.local()
+
+    def login(i):
+        if not hasattr(local, 'client'):
+            local.client = app.test_client()
+        start = time.perf_counter()
+        response = local.client.post('/login', json={'username': f'login_{i % users}', 'password': 'password123'})
+        return time.perf_counter() - start, response.status_code
+
+    prober = threading.Thread(target=probe)
+    prober.start()
+    start = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as executor:
+        results = list(executor.map(login, range(logins)))
+    elapsed = time.perf_counter() - start
+    stop.set()
+    prober.join()
+    if hasher._executor is not None:
+        hasher._executor.shutdown()
+
+    latencies = [latency for latency, status in results if status == 200]
+    return {
+        'succeeded': len(latencies),
+        'refused': sum(1 for _, status in results if status == 503),
+        'logins_per_s': len(latencies) / elapsed,
+        'login_p50_ms': percentile_ms(latencies, 50),
+        'login_p95_ms': percentile_ms(latencies, 95),
+        'probe_p50_ms': percentile_ms(probe_latencies, 50),
+        'probe_p95_ms': percentile_ms(probe_latencies, 95),
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Login throughput under concurrent load')
+    parser.add_argument('--workers', default='0,1,2,4', help='hashing pool sizes to compare, 0 hashes inline')
+    parser.add_argument('--concurrency', type=int, default=16, help='concurrent logins')
+    parser.add_argument('--logins', type=int, default=200, help='logins per run')
+    parser.add_argument('--users', type=int, default=50)
+    parser.add_argument('--method', help='hash method (default: PASSWORD_HASH_METHOD)')
+    args = parser.parse_args(argv)
+
+    app = benchmark_app()
+    if args.method:
+        app.config['PASSWORD_HASH_METHOD'] = args.method
+    seed(app, args.users, app.config['PASSWORD_HASH_METHOD'])
+
+    print(f"{args.logins} logins, {args.concurrency} at a time, {app.config['PASSWORD_HASH_METHOD']}, "
+          f"{os.cpu_count()} CPUs")
+    print(f"  {'workers':>7}  {'logins/s':>8}  {'p50':>9}  {'p95':>9}  {'refused':>7}  {'/api p50':>9}  {'/api p95':>9}")
+    for workers in (int(value) for value in args.workers.split(',')):
+        result = run(app, workers, args.concurrency, args.logins, args.users)
+        label = 'inline' if workers == 0 else str(workers)
+        print(f"  {label:>7}  {result['logins_per_s']:8.1f}  {result['login_p50_ms']:7.1f}ms"
+              f"  {result['login_p95_ms']:7.1f}ms  {result['refused']:>7}"
+              f"  {result['probe_p50_ms']:7.1f}ms  {result['probe_p95_ms']:7.1f}ms")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,222 @@
+#!/usr/bin/env python
+"""
+Microbenchmarks for the hot internals.
+
+Each benchmark times one internal function on a fixed dataset size, so an
+optimization of that function can be measured in isolation from HTTP,
+routing and the rest of the request. The dataset is generated with a fixed
+seed (see generate_data.py) into a temporary database.
+
+Results can be saved as a named baseline and later runs compared with it;
+--compare exits with status 1 when a benchmark's median got slower than
+--threshold.
+
+Usage:
+    python -m benchmarks.micro [--only jwt] [--rounds 5]
+    python -m benchmarks.micro --save-baseline before
+    python -m benchmarks.micro --compare before --threshold 0.1
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+from datetime import datetime
+
+from benchmarks import generate_data
+from benchmarks.harness import benchmark_app, measure
+
+BASELINE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baselines')
+
+# Fixed dataset, changing it invalidates saved baselines
+DATASET = ['--customers', '200', '--professionals', '20', '--requests', '20000', '--seed', '7']
+SERIALIZED_ROWS = 10000
+EXPORT_ROWS = 5000
+
+BENCHMARKS = {}
+
+def microbenchmark(name, number=1):
+    """
+    Register ``setup(ctx)``, which prepares the data and returns the function
+    to time. ``number`` calls of it are timed per round.
+    """
+    def register(setup):
+        BENCHMARKS[name] = (setup, number)
+        return setup
+    return register
+
+class Context:
+    """The app and the ids the benchmarks run on"""
+
+    def __init__(self, app, workdir):
+        from sqlalchemy import func
+        from models import db, ServiceRequest, Review
+        self.app = app
+        self.workdir = workdir
+        with app.app_context():
+            self.customer_id = (
+                db.session.query(ServiceRequest.customer_id)
+                .filter(ServiceRequest.service_status == 'completed')
+                .group_by(ServiceRequest.customer_id).order_by(func.count().desc()).limit(1).scalar()
+            )
+            self.professional_id = (
+                db.session.query(Review.professional_id)
+                .group_by(Review.professional_id).order_by(func.count().desc()).limit(1).scalar()
+            )
+            self.export_professional_id = (
+                db.session.query(ServiceRequest.professional_id)
+                .group_by(ServiceRequest.professional_id)
+                .having(func.count() <= EXPORT_ROWS).order_by(func.count().desc()).limit(1).scalar()
+            )
+
+@microbenchmark('as_dict (10k ServiceRequest)')
+def bench_as_dict(ctx):
+    from models import ServiceRequest
+    with ctx.app.app_context():
+        rows = ServiceRequest.query.limit(SERIALIZED_ROWS).all()
+    return lambda: [row.as_dict() for row in rows]
+
+@microbenchmark('update_average_rating')
+def bench_update_average_rating(ctx):
+    from models import ProfessionalProfile
+    def run():
+        with ctx.app.app_context():
+            ProfessionalProfile.query.filter_by(user_id=ctx.professional_id).first().update_average_rating()
+    return run
+
+@microbenchmark('generate_customer_report')
+def bench_generate_customer_report(ctx):
+    from utils.celery_tasks import generate_customer_report
+    def run():
+        with ctx.app.app_context():
+            generate_customer_report(ctx.customer_id)
+    return run
+
+@microbenchmark('generate_report_html', number=1000)
+def bench_generate_report_html(ctx):
+    from utils.helpers import generate_report_html
+    report = {'services_used': 42, 'total_spent': 12345.5}
+    return lambda: generate_report_html(report)
+
+def _export_tasks(ctx):
+    from celery import Celery
+    import utils.export_tasks as export_tasks
+    export_tasks.REPORTS_DIR = ctx.workdir  # keep the CSV files out of reports/
+    return export_tasks.register_export_tasks(Celery('microbenchmarks'))
+
+@microbenchmark(f'export professional (<= {EXPORT_ROWS} rows)')
+def bench_export_professional(ctx):
+    task = _export_tasks(ctx)['export_service_professional']
+    def run():
+        with ctx.app.app_context():
+            task(ctx.export_professional_id)
+    return run
+
+@microbenchmark('export service requests (completed)')
+def bench_export_requests(ctx):
+    task = _export_tasks(ctx)['export_service_requests']
+    def run():
+        with ctx.app.app_context():
+            task({'status': 'completed'})
+    return run
+
+@microbenchmark('password hash (register)')
+def bench_password_hash(ctx):
+    from werkzeug.security import generate_password_hash
+    return lambda: generate_password_hash('password123')
+
+@microbenchmark('password check (login)')
+def bench_password_check(ctx):
+    from werkzeug.security import generate_password_hash, check_password_hash
+    hashed = generate_password_hash('password123')
+    return lambda: check_password_hash(hashed, 'password123')
+
+@microbenchmark('jwt encode', number=1000)
+def bench_jwt_encode(ctx):
+    from flask_jwt_extended import create_access_token
+    def run():
+        with ctx.app.app_context():
+            create_access_token(identity=str(ctx.customer_id))
+    return run
+
+@microbenchmark('jwt decode', number=1000)
+def bench_jwt_decode(ctx):
+    from flask_jwt_extended import create_access_token, decode_token
+    with ctx.app.app_context():
+        token = create_access_token(identity=str(ctx.customer_id))
+    def run():
+        with ctx.app.app_context():
+            decode_token(token)
+    return run
+
+def baseline_path(name):
+    return os.path.join(BASELINE_DIR, f'{name}.json')
+
+def compare(results, baseline, threshold):
+    regressions = []
+    for name, current in results.items():
+        previous = baseline['benchmarks'].get(name)
+        if previous and current['median'] > previous['median'] * (1 + threshold):
+            regressions.append(f"{name}: {previous['median'] * 1000:.3f} ms -> {current['median'] * 1000:.3f} ms")
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Microbenchmarks for the hot internals')
+    parser.add_argument('--only', help='run only the benchmarks whose name contains this text')
+    parser.add_argument('--rounds', type=int, default=5)
+    parser.add_argument('--save-baseline', metavar='NAME', help='save the results as benchmarks/baselines/NAME.json')
+    parser.add_argument('--compare', metavar='NAME', help='compare with a saved baseline')
+    parser.add_argument('--threshold', type=float, default=0.1, help='allowed relative slowdown (default: 0.1)')
+    args = parser.parse_args(argv)
+
+    baseline = None
+    if args.compare:
+        with open(baseline_path(args.compare)) as f:
+            baseline = json.load(f)
+
+    workdir = tempfile.mkdtemp(prefix='microbenchmarks-')
+    try:
+        database = os.path.join(workdir, 'micro.sqlite')
+        generate_data.main(['--database', database] + DATASET)
+        ctx = Context(benchmark_app(database), workdir)
+
+        results = {}
+        width = max(len(name) for name in BENCHMARKS)
+        for name, (setup, number) in BENCHMARKS.items():
+            if args.only and args.only not in name:
+                continue
+            result = measure(setup(ctx), repeat=args.rounds, number=number)
+            # Per call timings, so numbers stay comparable if ``number`` changes
+            result = {key: value / number if key != 'rounds' else value for key, value in result.items()}
+            results[name] = result
+            line = f"{name:<{width}}  median {result['median'] * 1000:10.4f} ms  best {result['best'] * 1000:10.4f} ms"
+            previous = baseline['benchmarks'].get(name) if baseline else None
+            if previous:
+                line += f"  x{previous['median'] / result['median']:.2f} vs {args.compare}"
+            print(line)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    if args.save_baseline:
+        os.makedirs(BASELINE_DIR, exist_ok=True)
+        with open(baseline_path(args.save_baseline), 'w') as f:
+            json.dump({
+                'date': datetime.now().isoformat(timespec='seconds'),
+                'python': platform.python_version(),
+                'benchmarks': results,
+            }, f, indent=2)
+        print(f"Baseline saved to {baseline_path(args.save_baseline)}")
+
+    if baseline:
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) against {args.compare}:")
+            for regression in regressions:
+                print(f"  {regression}")
+            sys.exit(1)
+        print(f"No regressions against {args.compare}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,54 @@
+#!/usr/bin/env python
+"""
+Microbenchmark for model serialization.
+Compares the old reflection based ``as_dict`` (a getattr per column per row)
+with the precompiled serializers from ``SerializerMixin``.
+
+Usage:
+    python -m benchmarks.serialization [rows]
+"""
+import sys
+from datetime import datetime, timedelta
+
+from models import ServiceRequest
+from benchmarks.harness import measure, print_results
+
+def make_rows(count):
+    now = datetime.now()
+    return [
+        ServiceRequest(
+            id=i,
+            service_id=i % 16,
+            customer_id=i % 500,
+            professional_id=i % 40,
+            date_of_request=now - timedelta(minutes=i),
+            date_of_accept_reject=now,
+            date_of_completion=None,
+            service_status='completed',
+            remarks='Service request remarks ' * 4
+        )
+        for i in range(count)
+    ]
+
+def reflection_as_dict(obj):
+    return {c.key: getattr(obj, c.key) for c in obj.__table__.columns}
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    rows = make_rows(count)
+    serialize = ServiceRequest.serializer()
+    fields = ServiceRequest.select_fields({'id', 'service_status', 'date_of_request'})
+    serialize_fields = ServiceRequest.serializer(fields)
+
+    # Both paths must produce the same output
+    assert reflection_as_dict(rows[0]) == serialize(rows[0])
+
+    results = {
+        "reflection as_dict": measure(lambda: [reflection_as_dict(r) for r in rows]),
+        "compiled serializer": measure(lambda: [serialize(r) for r in rows]),
+        "compiled, 3 fields": measure(lambda: [serialize_fields(r) for r in rows]),
+    }
+    print_results(f"Serializing {count} ServiceRequest rows", results)
+
+if __name__ == '__main__':
+    main()
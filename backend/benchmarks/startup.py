@@ -0,0 +1,103 @@
+#!/usr/bin/env python
+"""
+Process startup time.
+
+Starts a fresh interpreter with ``python -X importtime`` for each way a
+process boots (a web worker importing the app and creating it, a Celery
+worker importing the tasks, a script that only needs ``create_app``, a web
+worker answering its first API docs request) and reports the wall time, the
+total import time and the direct imports of the booted module with the
+largest cumulative import time. Exits with status 1 when a case's median
+wall time is over its budget, so a heavy import at module level shows up.
+
+Creating the app must not touch the database: the cases run against a
+database path that must still not exist afterwards.
+
+Usage:
+    python -m benchmarks.startup [--rounds 5] [--top 10]
+    python -m benchmarks.startup --budget-scale 1.5
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# name: (statement, budget in ms for the median wall time)
+CASES = {
+    'import create_app': ('from app import create_app', 700),
+    'web worker (create_app)': ('from app import app', 800),
+    'celery worker': ('import utils.celery_tasks', 800),
+    'first /apidocs request': ("from app import app; client = app.test_client(); "
+                               "client.get('/apidocs/'); client.get('/apispec_1.json')", 900),
+}
+
+def parse_importtime(stderr):
+    """
+    Cumulative microseconds of the imports made by the top level imports,
+    and the total of the top level imports
+    """
+    imports = {}
+    total = 0
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        # Each level of nesting is indented by two more spaces
+        depth = (len(name) - len(name.lstrip(' ')) - 1) // 2
+        if depth == 0:
+            total += int(cumulative)
+        elif depth == 1:
+            imports[name.strip()] = int(cumulative)
+    return imports, total
+
+def run_case(statement, env):
+    started = time.perf_counter()
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', statement], cwd=BACKEND_DIR, env=env,
+                            capture_output=True, text=True)
+    wall = time.perf_counter() - started
+    if result.returncode != 0:
+        raise RuntimeError(f"{statement!r} failed:\n{result.stderr[-2000:]}")
+    imports, total = parse_importtime(result.stderr)
+    return wall, total, imports
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Process startup time')
+    parser.add_argument('--rounds', type=int, default=5)
+    parser.add_argument('--top', type=int, default=8, help='slowest top level imports to list per case')
+    parser.add_argument('--budget-scale', type=float, default=1.0, help='multiply the budgets, for slow machines')
+    args = parser.parse_args(argv)
+
+    workdir = tempfile.mkdtemp(prefix='benchmark-startup-')
+    database = os.path.join(workdir, 'startup.sqlite')
+    env = dict(os.environ, DATABASE_URL='sqlite:///' + database, TASK_BACKEND='thread',
+               CACHE_TYPE='SimpleCache', RATE_LIMIT_STORAGE='memory', LOG_LEVEL='WARNING')
+
+    over_budget = []
+    for name, (statement, budget_ms) in CASES.items():
+        walls = []
+        for _ in range(args.rounds):
+            wall, total, imports = run_case(statement, env)
+            walls.append(wall)
+        median_ms = statistics.median(walls) * 1000
+        budget_ms *= args.budget_scale
+        status = 'ok' if median_ms <= budget_ms else 'OVER BUDGET'
+        print(f"{name}: median {median_ms:.0f} ms, best {min(walls) * 1000:.0f} ms "
+              f"(budget {budget_ms:.0f} ms, {status}), imports {total / 1000:.0f} ms")
+        for module, cumulative in sorted(imports.items(), key=lambda item: -item[1])[:args.top]:
+            print(f"    {cumulative / 1000:8.1f} ms  {module}")
+        if median_ms > budget_ms:
+            over_budget.append(name)
+
+    if os.path.exists(database):
+        print("Creating the app touched the database")
+        over_budget.append('database')
+    if over_budget:
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,53 @@
+#!/usr/bin/env python
+"""
+Build the OpenAPI spec.
+
+Builds the spec from the YAML in the route docstrings with flasgger and
+writes it to APISPEC_FILE (apispec.json), which the app serves at
+/apispec_1.json instead of parsing the docstrings in every process, see
+utils/apidocs.py. Re-run it after changing a route or its docstring and
+commit the result; --check fails when the file is out of date, e.g. in CI.
+
+Usage:
+    python build_apispec.py
+    python build_apispec.py --check
+"""
+import argparse
+import os
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+
+def build_spec():
+    """The spec of the app's routes as written to APISPEC_FILE, and the file's path"""
+    sys.path.insert(0, BACKEND_DIR)
+    from app import create_app
+    from utils.apidocs import apispec, apispec_path, dump_apispec
+    app = create_app()
+    with app.test_request_context():
+        return dump_apispec(apispec()), apispec_path(app)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Build the OpenAPI spec from the route docstrings')
+    parser.add_argument('--check', action='store_true', help='only check that the built spec is up to date')
+    args = parser.parse_args(argv)
+
+    spec, path = build_spec()
+    if args.check:
+        try:
+            with open(path, encoding='utf-8') as f:
+                current = f.read()
+        except FileNotFoundError:
+            current = None
+        if current != spec:
+            print(f"{path} is out of date with the route docstrings, run python build_apispec.py")
+            sys.exit(1)
+        print(f"{path} is up to date")
+        return
+
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(spec)
+    print(f"API spec written to {path} ({len(spec.encode('utf-8')) / 1024:.1f} KiB)")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,294 @@
+#!/usr/bin/env python
+"""
+Build the frontend for production.
+
+Bundles the Vue page modules reachable from static/app.js into a single
+script, minifies it, and writes content hashed files with precompressed
+.gz/.br siblings to frontend/dist/assets. index.html is rewritten to
+reference the hashed files and written to frontend/dist/index.html.
+
+When frontend/dist/index.html exists the app serves the built frontend,
+see utils/assets.py. Delete frontend/dist to go back to the source files.
+
+Usage:
+    python build_assets.py
+"""
+import gzip
+import hashlib
+import json
+import os
+import re
+import shutil
+import sys
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+FRONTEND_DIR = os.path.join(os.path.dirname(BACKEND_DIR), 'frontend')
+DIST_DIR = os.path.join(FRONTEND_DIR, 'dist')
+ASSETS_DIR = os.path.join(DIST_DIR, 'assets')
+
+ENTRY = os.path.join(FRONTEND_DIR, 'static', 'app.js')
+STYLESHEET = os.path.join(FRONTEND_DIR, 'static', 'css', 'styles.css')
+
+IMPORT_RE = re.compile(r'^import\s+(\w+)\s+from\s+["\']([^"\']+)["\'];?\s*$', re.MULTILINE)
+EXPORT_DEFAULT_RE = re.compile(r'^export\s+default\s+', re.MULTILINE)
+OTHER_EXPORT_RE = re.compile(r'^export\s+(?!default\s)', re.MULTILINE)
+
+# Characters after which a "/" starts a regex literal rather than a division
+REGEX_PRECEDERS = set('(,=:[!&|?{};+-*%<>~^') | {''}
+
+def resolve_import(specifier, importer):
+    """Map an import specifier to a file in the frontend directory"""
+    if specifier.startswith('/'):
+        return os.path.normpath(os.path.join(FRONTEND_DIR, specifier.lstrip('/')))
+    return os.path.normpath(os.path.join(os.path.dirname(importer), specifier))
+
+def collect_modules(entry):
+    """Return the modules reachable from ``entry``, dependencies first"""
+    ordered = []
+    visiting = set()
+
+    def visit(path):
+        if path in ordered:
+            return
+        if path in visiting:
+            raise ValueError(f"Circular import involving {path}")
+        visiting.add(path)
+        with open(path, encoding='utf-8') as f:
+            source = f.read()
+        for _, specifier in IMPORT_RE.findall(source):
+            visit(resolve_import(specifier, path))
+        visiting.discard(path)
+        ordered.append(path)
+
+    visit(entry)
+    return ordered
+
+def bundle(entry):
+    """
+    Concatenate the ES modules into one script. Each module becomes a function
+    scope whose default export is stored in a module variable, and imports
+    become references to those variables.
+    """
+    modules = collect_modules(entry)
+    names = {path: f'__module_{index}' for index, path in enumerate(modules)}
+    parts = []
+    for path in modules:
+        with open(path, encoding='utf-8') as f:
+            source = f.read()
+        if OTHER_EXPORT_RE.search(source):
+            raise ValueError(f"{path}: only default exports are supported")
+
+        source = IMPORT_RE.sub(
+            lambda m: f'const {m.group(1)} = {names[resolve_import(m.group(2), path)]};',
+            source
+        )
+        source = EXPORT_DEFAULT_RE.sub('__default = ', source)
+        relative = os.path.relpath(path, FRONTEND_DIR).replace(os.sep, '/')
+        parts.append(
+            f'/* {relative} */\n'
+            f'const {names[path]} = (() => {{\nlet __default;\n{source}\nreturn __default;\n}})();\n'
+        )
+    return '\n'.join(parts)
+
+def _scan_lines(source):
+    """
+    Scan JavaScript source and return, for each line, whether it starts inside
+    a template literal, a string or a block comment, where indentation must
+    not be touched. Also returns the set of lines that are only a // comment.
+    """
+    protected = []
+    comment_lines = set()
+    state = None          # None, 'template', "'", '"', 'block', 'line', 'regex', 'regex_class'
+    template_depth = []   # brace depth stack for ${ } inside templates
+    brace_depth = 0
+    last_significant = ''
+    line_no = 0
+    line_has_code = False
+    protected.append(False)
+    i = 0
+    n = len(source)
+    while i < n:
+        ch = source[i]
+        nxt = source[i + 1] if i + 1 < n else ''
+        if ch == '\n':
+            if state == 'line':
+                state = None
+            line_no += 1
+            protected.append(state in ('template', "'", '"', 'block'))
+            line_has_code = False
+            i += 1
+            continue
+        if state == 'line':
+            i += 1
+            continue
+        if state == 'block':
+            if ch == '*' and nxt == '/':
+                state = None
+                i += 2
+                continue
+            i += 1
+            continue
+        if state in ("'", '"'):
+            if ch == '\\':
+                i += 2
+                continue
+            if ch == state:
+                state = None
+                last_significant = ch
+            i += 1
+            continue
+        if state == 'regex':
+            if ch == '\\':
+                i += 2
+                continue
+            if ch == '[':
+                state = 'regex_class'
+            elif ch == '/':
+                state = None
+                last_significant = ch
+            i += 1
+            continue
+        if state == 'regex_class':
+            if ch == '\\':
+                i += 2
+                continue
+            if ch == ']':
+                state = 'regex'
+            i += 1
+            continue
+        if state == 'template':
+            if ch == '\\':
+                i += 2
+                continue
+            if ch == '`':
+                state = None
+                last_significant = ch
+            elif ch == '$' and nxt == '{':
+                template_depth.append(brace_depth)
+                brace_depth += 1
+                state = None
+                i += 2
+                continue
+            i += 1
+            continue
+
+        # Code
+        if ch == '/' and nxt == '/':
+            if not line_has_code:
+                comment_lines.add(line_no)
+            state = 'line'
+            i += 2
+            continue
+        if ch == '/' and nxt == '*':
+            state = 'block'
+            i += 2
+            continue
+        if ch.isspace():
+            i += 1
+            continue
+        line_has_code = True
+        if ch.isalnum() or ch in '_$':
+            # Keywords such as "return" may precede a regex literal
+            j = i
+            while j < n and (source[j].isalnum() or source[j] in '_$'):
+                j += 1
+            last_significant = '' if source[i:j] in ('return', 'typeof', 'case', 'else') else 'a'
+            i = j
+            continue
+        if ch in ("'", '"'):
+            state = ch
+        elif ch == '`':
+            state = 'template'
+        elif ch == '/' and last_significant in REGEX_PRECEDERS:
+            state = 'regex'
+        elif ch == '{':
+            brace_depth += 1
+        elif ch == '}':
+            brace_depth -= 1
+            if template_depth and brace_depth == template_depth[-1]:
+                template_depth.pop()
+                state = 'template'
+        last_significant = ch
+        i += 1
+    if state is not None:
+        raise ValueError(f"Unterminated {state} in bundle")
+    return protected, comment_lines
+
+def minify(source):
+    """
+    Conservative minifier: drops indentation, blank lines and whole line
+    comments outside of strings. Indentation inside template literals is
+    kept if any template contains a <pre> block.
+    """
+    protected, comment_lines = _scan_lines(source)
+    keep_template_whitespace = '<pre' in source
+    output = []
+    for line_no, line in enumerate(source.split('\n')):
+        if protected[line_no]:
+            output.append(line if keep_template_whitespace else line.lstrip())
+            continue
+        if line_no in comment_lines:
+            continue
+        stripped = line.strip()
+        if stripped:
+            output.append(stripped)
+    return '\n'.join(output) + '\n'
+
+def write_asset(name, extension, content):
+    """Write a content hashed asset and its precompressed siblings"""
+    data = content.encode('utf-8')
+    digest = hashlib.sha256(data).hexdigest()[:12]
+    filename = f'{name}.{digest}.{extension}'
+    path = os.path.join(ASSETS_DIR, filename)
+    with open(path, 'wb') as f:
+        f.write(data)
+    with open(path + '.gz', 'wb') as f:
+        f.write(gzip.compress(data, compresslevel=9, mtime=0))
+    if brotli is not None:
+        with open(path + '.br', 'wb') as f:
+            f.write(brotli.compress(data, quality=11))
+    return filename
+
+def build():
+    if os.path.exists(DIST_DIR):
+        shutil.rmtree(DIST_DIR)
+    os.makedirs(ASSETS_DIR)
+
+    script = minify(bundle(ENTRY))
+    with open(STYLESHEET, encoding='utf-8') as f:
+        stylesheet = f.read()
+
+    manifest = {
+        'static/app.js': 'assets/' + write_asset('app', 'js', script),
+        'static/css/styles.css': 'assets/' + write_asset('styles', 'css', stylesheet),
+    }
+
+    with open(os.path.join(FRONTEND_DIR, 'index.html'), encoding='utf-8') as f:
+        index = f.read()
+    for source, built in manifest.items():
+        if f'/{source}"' not in index:
+            raise ValueError(f"index.html does not reference /{source}")
+        index = index.replace(f'/{source}"', f'/{built}"')
+    with open(os.path.join(DIST_DIR, 'index.html'), 'w', encoding='utf-8') as f:
+        f.write(index)
+    with open(os.path.join(DIST_DIR, 'manifest.json'), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+if __name__ == '__main__':
+    try:
+        manifest = build()
+    except (OSError, ValueError) as e:
+        print(f"Error building assets: {e}")
+        sys.exit(1)
+    for source, built in manifest.items():
+        size = os.path.getsize(os.path.join(DIST_DIR, built))
+        print(f"  {source} -> {built} ({size / 1024:.1f} KiB)")
+    if brotli is None:
+        print("brotli is not installed, only .gz files were written")
+    print(f"Frontend built in {DIST_DIR}")
@@ -1,28 +1,117 @@
 import os
+from datetime import timedelta
 
 class Config:
     # Flask Configuration
     UPLOAD_FOLDER = 'uploads/'
+    # Uploads are stored by content hash, under UPLOAD_FOLDER ('local') or in an S3 bucket ('s3');
+    # S3_ENDPOINT_URL points at a compatible stand-in such as MinIO, credentials come from the AWS_* variables
+    STORAGE_BACKEND = os.environ.get('STORAGE_BACKEND', 'local')
+    S3_BUCKET = os.environ.get('S3_BUCKET', 'household-services-uploads')
+    S3_ENDPOINT_URL = os.environ.get('S3_ENDPOINT_URL')
+    
+    # Downloads, see utils/downloads.py: '' sends files from the app, 'x-accel-redirect' (nginx) or
+    # 'x-sendfile' (Apache, lighttpd) let the web server send them and free the worker at once
+    DOWNLOAD_OFFLOAD = os.environ.get('DOWNLOAD_OFFLOAD', '')
+    USE_X_SENDFILE = DOWNLOAD_OFFLOAD == 'x-sendfile'
+    DOWNLOAD_ACCEL_LOCATIONS = {  # nginx internal locations aliasing the download directories
+        'uploads': '/protected/uploads/',
+        'reports': '/protected/reports/',
+    }
+    DOCUMENT_MAX_AGE = 365 * 24 * 3600  # documents are stored by content hash and never change
+    DOCUMENT_PREVIEW_SIZE = 320  # pixels, longest side of document previews
+    DOCUMENT_TEXT_LIMIT = 100000  # characters of text kept per document for search
+    DOCUMENT_REQUEUE_AFTER = 15 * 60  # seconds a queued document may stay pending before it is queued again
     MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16MB max file size
+    MAX_BATCH_SERVICE_REQUESTS = 10000  # max items per POST /customer/requests/batch
     ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'pdf'}
     
     # Database Configuration
-    SQLALCHEMY_DATABASE_URI = 'sqlite:///' + os.path.join(os.path.abspath(os.path.dirname(__file__)), 'db.sqlite')
+    SQLALCHEMY_DATABASE_URI = os.environ.get(
+        'DATABASE_URL',
+        'sqlite:///' + os.path.join(os.path.abspath(os.path.dirname(__file__)), 'db.sqlite')
+    )
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     
     # JWT Configuration
     JWT_SECRET_KEY = 'your_secret_key'
+    # Access tokens carry the claims the frontend routes on and are renewed with the refresh token,
+    # which re-reads the user; a change of approval or profile shows within the access token lifetime
+    JWT_ACCESS_TOKEN_EXPIRES = timedelta(minutes=15)
+    JWT_REFRESH_TOKEN_EXPIRES = timedelta(days=7)
+    JWT_REVOCATION_SYNC_INTERVAL = 1  # seconds before a revocation made by another worker applies
+    
+    # Password hashing in a process pool, see utils/passwords.py
+    PASSWORD_HASH_METHOD = os.environ.get('PASSWORD_HASH_METHOD', 'scrypt:32768:8:1')  # stored hashes are upgraded on login
+    PASSWORD_HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS', 2))  # 0 hashes on the request thread
+    PASSWORD_HASH_QUEUE_LIMIT = 32  # hashes waiting or running per web process before answering 503
+    PASSWORD_HASH_TIMEOUT = 10  # seconds
     
     # Celery and Redis Configuration
-    BROKER_URL = 'redis://localhost:6379/0'
-    RESULT_BACKEND = 'redis://localhost:6379/0'
+    REDIS_URL = os.environ.get('REDIS_URL', 'redis://localhost:6379/0')
+    BROKER_URL = REDIS_URL
+    RESULT_BACKEND = REDIS_URL
+    # Give up on an unreachable Redis after a few attempts instead of blocking the
+    # dispatching request on the default 20 reconnection retries
+    CELERY_RESULT_BACKEND_TRANSPORT_OPTIONS = {
+        'retry_policy': {'max_retries': 2, 'interval_start': 0, 'interval_step': 0.2, 'interval_max': 0.5}
+    }
+    
+    # Background tasks: 'celery' sends them to the broker, 'thread' or 'process' runs them in a
+    # local pool without Redis (single node and test deployments, one web process)
+    TASK_BACKEND = os.environ.get('TASK_BACKEND', 'celery')
+    TASK_WORKERS = 2  # local pool size
+    TASK_STATUS_LIMIT = 1000  # task statuses kept by the local pools, oldest are dropped
     
-    # Cache Configuration
-    CACHE_TYPE = 'RedisCache'
+    # Rate limiting, token buckets per client IP and per user, see utils/rate_limit.py
+    RATE_LIMIT_ENABLED = os.environ.get('RATE_LIMIT_ENABLED', '1') == '1'
+    RATE_LIMIT_STORAGE = os.environ.get('RATE_LIMIT_STORAGE', 'redis' if TASK_BACKEND == 'celery' else 'memory')
+    RATE_LIMITS = {  # endpoint: rate requests per `per` seconds, bursts of up to `burst`
+        'auth.login': {'rate': 10, 'per': 60, 'burst': 5},
+        'auth.admin_login': {'rate': 10, 'per': 60, 'burst': 5},
+        'auth.register': {'rate': 5, 'per': 60, 'burst': 5},
+        'auth.refresh': {'rate': 20, 'per': 60, 'burst': 10},
+        'admin.search': {'rate': 60, 'per': 60, 'burst': 20},
+        'customer.search_services': {'rate': 60, 'per': 60, 'burst': 20},
+    }
+    
+    # Cache Configuration, in process when running without Redis
+    CACHE_TYPE = os.environ.get('CACHE_TYPE', 'RedisCache' if TASK_BACKEND == 'celery' else 'SimpleCache')
     CACHE_DEFAULT_TIMEOUT = 30
-    CACHE_REDIS_HOST = 'localhost'
-    CACHE_REDIS_PORT = 6379
-    CACHE_REDIS_DB = 0
+    CACHE_REDIS_URL = REDIS_URL
+    
+    # Conditional GET: ETags derived from per-table data version counters kept in the cache.
+    # Needs a cache shared by all workers (RedisCache) to be safe with more than one process.
+    DATA_VERSION_ETAGS = True
+    
+    # Logging: JSON lines on stdout, written from a background thread
+    LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO')  # DEBUG enables the per request debug messages
+    
+    # SQL instrumentation: per request query count and time in Server-Timing headers and logs
+    SQL_INSTRUMENTATION = True
+    SQL_N_PLUS_ONE_THRESHOLD = 10  # same statement shape repeated this often in one request is logged
+    SQL_QUERY_BUDGET = None  # max queries per request, None for no limit
+    SQL_QUERY_BUDGET_ENFORCE = False  # test mode: fail requests exceeding their budget with a 500
+    
+    # Prometheus metrics at /metrics, set PROMETHEUS_MULTIPROC_DIR when running several workers
+    METRICS_ENABLED = True
+    METRICS_CELERY_QUEUES = ['celery']  # broker queues whose length is reported, empty to skip
+    
+    # Request profiling: admins send "X-Profile: 1" or ?_profile=1, see /admin/profiles
+    PROFILING_ENABLED = True
+    PROFILE_SAMPLE_RATE = 0  # also profile 1 in N requests, 0 to disable sampling
+    PROFILE_BUFFER_SIZE = 50  # profiles kept per process, oldest are evicted
+    PROFILER = 'cprofile'  # or 'pyinstrument' if installed
+    
+    # API docs: the OpenAPI spec written by build_apispec.py (relative to the backend directory),
+    # served at /apispec_1.json instead of building it from the route docstrings in every process
+    APISPEC_FILE = 'apispec.json'
+    
+    # Response compression
+    COMPRESS_MIN_SIZE = 500  # bytes, smaller responses are sent uncompressed
+    COMPRESS_MAX_SIZE = 8 * 1024 * 1024  # bytes, larger responses are sent uncompressed
+    COMPRESS_LEVEL = 6  # gzip level
+    COMPRESS_BR_QUALITY = 4  # brotli quality, higher levels are too slow for dynamic responses
     
     # Mail Configuration
     MAIL_SERVER = 'smtp.sendgrid.net'
@@ -1,8 +1,65 @@
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy.orm import load_only
 
 db = SQLAlchemy()
 
-class User(db.Model):
+def _compile_serializer(keys):
+    """
+    Generate a function that turns a row into a dict of the given column keys.
+    The generated body is a single dict literal, e.g.
+    ``return {'id': obj.id, 'name': obj.name}``
+    """
+    body = ', '.join(f'{key!r}: obj.{key}' for key in keys)
+    namespace = {}
+    exec(f'def serialize(obj):\n    return {{{body}}}\n', namespace)
+    return namespace['serialize']
+
+class SerializerMixin:
+    """
+    Precompiled serializers for models.
+    A serializer is compiled once per model and field selection and then
+    cached on the model class, instead of reflecting over
+    ``__table__.columns`` for every row.
+    """
+
+    @classmethod
+    def select_fields(cls, fields):
+        """
+        Return the requested fields that are columns of this model, in
+        column order, or None when no projection was requested. A projection
+        naming none of the columns keeps only the primary key.
+        """
+        if not fields:
+            return None
+        selected = tuple(key for key in cls.__table__.columns.keys() if key in fields)
+        return selected or tuple(column.key for column in cls.__table__.primary_key)
+
+    @classmethod
+    def serializer(cls, fields=None):
+        """Return the compiled serializer for the given field selection"""
+        serializers = cls.__dict__.get('_serializers')
+        if serializers is None:
+            serializers = {}
+            cls._serializers = serializers
+        key = tuple(fields) if fields else None
+        serialize = serializers.get(key)
+        if serialize is None:
+            serialize = _compile_serializer(key or cls.__table__.columns.keys())
+            serializers[key] = serialize
+        return serialize
+
+    @classmethod
+    def load_fields(cls, fields, *required):
+        """
+        Loader option narrowing the SELECT to the selected fields plus any
+        columns the caller still needs (e.g. foreign keys used for lookups)
+        """
+        return load_only(*(getattr(cls, key) for key in (*fields, *required)))
+
+    def as_dict(self, fields=None):
+        return self.serializer(fields)(self)
+
+class User(SerializerMixin, db.Model):
     __tablename__ = 'users'
     id = db.Column(db.Integer, primary_key=True)
     username = db.Column(db.String(100), nullable=False, unique=True)
@@ -15,10 +72,7 @@ class User(db.Model):
     def __repr__(self):
         return f'<User {self.username}>'
 
-    def as_dict(self):
-        return {c.key: getattr(self, c.key) for c in self.__table__.columns}
-
-class Service(db.Model):
+class Service(SerializerMixin, db.Model):
     __tablename__ = 'services'
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), nullable=False)
@@ -29,11 +83,8 @@ class Service(db.Model):
     def __repr__(self):
         return f'<Service {self.name}>'
     
-    def as_dict(self):
-        return {c.key: getattr(self, c.key) for c in self.__table__.columns}
-
 
-class ServiceRequest(db.Model):
+class ServiceRequest(SerializerMixin, db.Model):
     __tablename__ = 'service_requests'
     id = db.Column(db.Integer, primary_key=True)
     service_id = db.Column(db.Integer, db.ForeignKey('services.id'))
@@ -44,14 +95,15 @@ class ServiceRequest(db.Model):
     date_of_completion = db.Column(db.DateTime, nullable=True)
     service_status = db.Column(db.String(20))  # requested, accepted, rejected , completed
     remarks = db.Column(db.String(200))
+    # Bumped by every write, see utils/request_status.py; ORM updates check it too
+    version = db.Column(db.Integer, nullable=False, server_default='1')
+
+    __mapper_args__ = {'version_id_col': version}
 
     def __repr__(self):
         return f'<ServiceRequest {self.id} - {self.service_status}>'
 
-    def as_dict(self):
-        return {c.key: getattr(self, c.key) for c in self.__table__.columns}
-
-class Review(db.Model):
+class Review(SerializerMixin, db.Model):
     __tablename__ = 'reviews'
     id = db.Column(db.Integer, primary_key=True)
     service_request_id = db.Column(db.Integer, db.ForeignKey('service_requests.id'), nullable=False)
@@ -69,17 +121,15 @@ class Review(db.Model):
     def __repr__(self):
         return f'<Review {self.id} - Rating: {self.rating}>'
 
-    def as_dict(self):
-        return {c.key: getattr(self, c.key) for c in self.__table__.columns}
-
-class ProfessionalProfile(db.Model):
+class ProfessionalProfile(SerializerMixin, db.Model):
     __tablename__ = 'professional_profiles'
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'))
     full_name = db.Column(db.String(100), nullable=False)
     service_type = db.Column(db.String(100), nullable=False)
     experience = db.Column(db.String(100), nullable=False)
-    filename = db.Column(db.String(120), nullable=False)
+    filename = db.Column(db.String(120), nullable=False)  # name of the uploaded document
+    content_hash = db.Column(db.String(64), index=True)  # sha256 of the stored document, see utils/storage.py
     uploaded_at = db.Column(db.DateTime, default=db.func.current_timestamp())
     address = db.Column(db.String(200),nullable=False)
     pin_code = db.Column(db.String(6), nullable=False)
@@ -88,9 +138,6 @@ class ProfessionalProfile(db.Model):
     def __repr__(self):
         return f'<ProfessionalProfile {self.user_id} - {self.service_type}>'
     
-    def as_dict(self):
-        return {c.key: getattr(self, c.key) for c in self.__table__.columns}
-
     def update_average_rating(self):
         """Update the average rating based on all reviews"""
         from sqlalchemy import func
@@ -100,7 +147,24 @@ class ProfessionalProfile(db.Model):
         self.reviews = float(avg_rating) if avg_rating else 0.0
         db.session.commit()
 
-class CustomerProfile(db.Model):
+class Document(SerializerMixin, db.Model):
+    """What the processing pipeline found in an uploaded document, see utils/document_tasks.py"""
+    __tablename__ = 'documents'
+    content_hash = db.Column(db.String(64), primary_key=True)  # one row per stored content
+    status = db.Column(db.String(20), nullable=False, default='pending')  # pending, valid, invalid or failed
+    mime_type = db.Column(db.String(50))  # detected from the magic bytes
+    expected_type = db.Column(db.String(50))  # named by the extension of the filename it is checked against
+    size = db.Column(db.Integer)
+    has_preview = db.Column(db.Boolean, nullable=False, default=False)
+    text = db.Column(db.Text)  # extracted text, searched by the admin professional search
+    error = db.Column(db.String(200))
+    queued_at = db.Column(db.DateTime)  # when processing was last queued, None if queuing failed
+    processed_at = db.Column(db.DateTime)
+
+    def __repr__(self):
+        return f'<Document {self.content_hash[:12]} - {self.status}>'
+
+class CustomerProfile(SerializerMixin, db.Model):
     __tablename__ = 'customer_profiles'
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'))
@@ -111,6 +175,3 @@ class CustomerProfile(db.Model):
     def __repr__(self):
         return f'<CustomerProfile {self.full_name} - {self.pin_code}>'
 
-    def as_dict(self):
-        return {c.key: getattr(self, c.key) for c in self.__table__.columns}
-    
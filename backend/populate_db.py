@@ -9,6 +9,7 @@ sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from app import create_app, db
 from models import User, CustomerProfile, ProfessionalProfile, Service, ServiceRequest, Review
+from utils.schema import create_schema
 
 def populate_database():
     print("Clearing existing data...")
@@ -248,5 +249,5 @@ def populate_database():
 if __name__ == "__main__":
     app = create_app()
     with app.app_context():
-        db.create_all()
+        create_schema(db)
         populate_database()
@@ -1,11 +1,20 @@
-from flask import Blueprint, request, jsonify, send_from_directory
+from flask import Blueprint, request, jsonify, current_app
 from flask_jwt_extended import jwt_required, get_jwt
-from models import db, Service, User, ProfessionalProfile, ServiceRequest, CustomerProfile, Review
+from models import db, Service, User, ProfessionalProfile, ServiceRequest, CustomerProfile, Review, Document
 from functools import wraps
+import math
 import os
 from datetime import datetime, timedelta
+from werkzeug.exceptions import NotFound
 from werkzeug.utils import secure_filename
-from sqlalchemy import or_, func
+from sqlalchemy import or_, func, update
+from utils.downloads import send_download
+from utils.helpers import requested_fields
+from utils.http_cache import etag_cached
+from utils.metrics import record_export
+from utils.profiling import profile_store, pstats_text
+from utils.tasks import submit_task, task_backend, task_status
+from utils.revocation import restore_user_tokens, revoke_user_tokens
 
 admin_bp = Blueprint('admin', __name__)
 
@@ -150,7 +159,7 @@ def update_service(service_id):
         }), 200
     except Exception as e:
         db.session.rollback()
-        print(f"Error updating service {service_id}: {str(e)}")  # Log the error
+        current_app.logger.exception("Error updating service %s", service_id)
         return jsonify({"category": "danger", "message": f"Error updating service: {str(e)}"}), 500
 
 @admin_bp.route('/admin/service/<int:service_id>', methods=['DELETE'])
@@ -196,12 +205,13 @@ def delete_service(service_id):
         
     except Exception as e:
         db.session.rollback()
-        print(f"Error deleting service {service_id}: {str(e)}")  # Log the error
+        current_app.logger.exception("Error deleting service %s", service_id)
         return jsonify({"category": "danger", "message": f"Error deleting service: {str(e)}"}), 500
 
 @admin_bp.route('/admin/professionals', methods=['GET'])
 @jwt_required()
 @admin_required()
+@etag_cached(User, ProfessionalProfile, Document)
 def get_professionals():
     """
     Get all professionals, including those who haven't created profiles yet
@@ -213,21 +223,29 @@ def get_professionals():
         description: List of professionals
     """
     try:
-        # First, get all users with the role "Professional"
-        professional_users = User.query.filter_by(role="Professional").all()
+        # Get all users with the role "Professional" together with their profile, if any
+        # and the processing state of their document, without its text
+        professional_users = (
+            db.session.query(User, ProfessionalProfile, Document.status, Document.has_preview)
+            .outerjoin(ProfessionalProfile, ProfessionalProfile.user_id == User.id)
+            .outerjoin(Document, Document.content_hash == ProfessionalProfile.content_hash)
+            .filter(User.role == "Professional")
+            .all()
+        )
         
+        serialize = ProfessionalProfile.serializer()
         result = []
-        for user in professional_users:
+        for user, profile, document_status, has_preview in professional_users:
             # Check if the professional has created a profile
-            profile = ProfessionalProfile.query.filter_by(user_id=user.id).first()
-            
             if profile:
                 # If profile exists, include all profile data plus user approval status
-                prof_data = profile.as_dict()
+                prof_data = serialize(profile)
                 prof_data.update({
                     'approve': user.approve,
                     'blocked': user.blocked,
-                    'has_profile': True
+                    'has_profile': True,
+                    'document_status': document_status,
+                    'has_preview': bool(has_preview)
                 })
             else:
                 # If no profile exists yet, include basic user data
@@ -244,7 +262,7 @@ def get_professionals():
             
         return jsonify(result), 200
     except Exception as e:
-        print(f"Error fetching professionals: {str(e)}")
+        current_app.logger.exception("Error fetching professionals")
         return jsonify({"category": "danger", "message": f"Error retrieving professionals: {str(e)}"}), 500
 
 @admin_bp.route('/admin/professional/<int:user_id>/approve', methods=['PUT'])
@@ -305,6 +323,8 @@ def approve_professional(user_id):
             user.blocked = False
         
         db.session.commit()
+        if data['approve']:
+            restore_user_tokens(user_id)
         
         # Set response message based on whether profile exists
         if prof_profile:
@@ -321,7 +341,7 @@ def approve_professional(user_id):
         
     except Exception as e:
         db.session.rollback()
-        print(f"Error approving professional {user_id}: {str(e)}")  # Log the error
+        current_app.logger.exception("Error approving professional %s", user_id)
         return jsonify({"category": "danger", "message": f"Database error: {str(e)}"}), 500
 
 @admin_bp.route('/admin/professional/<int:user_id>/block', methods=['PUT'])
@@ -382,6 +402,10 @@ def block_professional(user_id):
             user.approve = False
         
         db.session.commit()
+        if data['blocked']:
+            revoke_user_tokens(user_id)
+        else:
+            restore_user_tokens(user_id)
         
         # Set response message based on whether profile exists
         if prof_profile:
@@ -397,59 +421,317 @@ def block_professional(user_id):
         }), 200
     except Exception as e:
         db.session.rollback()
-        print(f"Error updating block status for professional {user_id}: {str(e)}")
+        current_app.logger.exception("Error updating block status for professional %s", user_id)
+        return jsonify({"category": "danger", "message": f"Database error: {str(e)}"}), 500
+
+# Column values set by each bulk professional action, matching the single id endpoints
+BULK_PROFESSIONAL_ACTIONS = {
+    'approve': {'approve': True, 'blocked': False},
+    'reject': {'approve': False},
+    'block': {'blocked': True, 'approve': False},
+    'unblock': {'blocked': False},
+}
+
+# Largest number of ids bound into a single IN (...) clause
+BULK_CHUNK_SIZE = 500
+
+def _chunks(items, size=BULK_CHUNK_SIZE):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+# Text fields of a bulk service update: whether they may be empty
+BULK_SERVICE_TEXT_FIELDS = {'name': False, 'description': True, 'service_type': False}
+
+def _service_values(item):
+    """Return the validated column values of a bulk service item, or an error message"""
+    values = {}
+    for key, may_be_empty in BULK_SERVICE_TEXT_FIELDS.items():
+        if key not in item:
+            continue
+        value = item[key]
+        max_length = Service.__table__.columns[key].type.length
+        if not isinstance(value, str) or (not may_be_empty and not value.strip()):
+            return f"{key} must be a {'' if may_be_empty else 'non-empty '}string"
+        if len(value) > max_length:
+            return f"{key} must be at most {max_length} characters"
+        values[key] = value
+    if 'price' in item:
+        if isinstance(item['price'], bool):
+            return "Invalid price format"
+        try:
+            price = float(item['price'])
+        except (ValueError, TypeError):
+            return "Invalid price format"
+        if not math.isfinite(price):
+            return "Invalid price format"
+        if price < 0:
+            return "Price cannot be negative"
+        values['price'] = price
+    if not values:
+        return "No fields to update"
+    return values
+
+def _parse_ids(values):
+    """Return the unique integer ids in request order, or None if any id is invalid"""
+    if not isinstance(values, list) or not values:
+        return None
+    ids = []
+    for value in values:
+        if isinstance(value, bool) or not isinstance(value, int):
+            return None
+        ids.append(value)
+    return list(dict.fromkeys(ids))
+
+@admin_bp.route('/admin/professionals/bulk', methods=['PUT'])
+@jwt_required()
+@admin_required()
+def bulk_update_professionals():
+    """
+    Approve, reject, block or unblock many professionals at once
+    ---
+    tags:
+      - Admin
+    parameters:
+      - name: bulk
+        in: body
+        required: true
+        schema:
+          type: object
+          properties:
+            user_ids:
+              type: array
+              items:
+                type: integer
+            action:
+              type: string
+              enum: [approve, reject, block, unblock]
+    responses:
+      200:
+        description: Per id results, status is one of updated, not_found, not_professional
+      400:
+        description: Invalid input data
+    """
+    try:
+        data = request.get_json()
+        if not data:
+            return jsonify({"category": "danger", "message": "No data provided"}), 400
+        if not isinstance(data, dict):
+            return jsonify({"category": "danger", "message": "Request body must be a JSON object"}), 400
+
+        action = data.get('action')
+        if action not in BULK_PROFESSIONAL_ACTIONS:
+            return jsonify({
+                "category": "danger",
+                "message": f"Action must be one of: {', '.join(BULK_PROFESSIONAL_ACTIONS)}"
+            }), 400
+
+        user_ids = _parse_ids(data.get('user_ids'))
+        if user_ids is None:
+            return jsonify({"category": "danger", "message": "user_ids must be a non-empty list of integers"}), 400
+
+        # One lookup per chunk to classify the ids
+        roles = {}
+        for chunk in _chunks(user_ids):
+            roles.update(db.session.query(User.id, User.role).filter(User.id.in_(chunk)).all())
+        professional_ids = [user_id for user_id in user_ids if roles.get(user_id) == 'Professional']
+
+        # Set based update, committed once
+        values = BULK_PROFESSIONAL_ACTIONS[action]
+        for chunk in _chunks(professional_ids):
+            db.session.execute(
+                update(User).where(User.id.in_(chunk)).values(**values),
+                execution_options={"synchronize_session": False}
+            )
+        db.session.commit()
+        if 'blocked' in values:
+            for user_id in professional_ids:
+                (revoke_user_tokens if values['blocked'] else restore_user_tokens)(user_id)
+
+        results = []
+        for user_id in user_ids:
+            if user_id not in roles:
+                results.append({"user_id": user_id, "status": "not_found"})
+            elif roles[user_id] != 'Professional':
+                results.append({"user_id": user_id, "status": "not_professional"})
+            else:
+                results.append({"user_id": user_id, "status": "updated", **values})
+
+        return jsonify({
+            "category": "success",
+            "message": f"{len(professional_ids)} of {len(user_ids)} professionals updated",
+            "results": results
+        }), 200
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.exception("Error in bulk professional update")
+        return jsonify({"category": "danger", "message": f"Database error: {str(e)}"}), 500
+
+@admin_bp.route('/admin/services/bulk', methods=['PUT'])
+@jwt_required()
+@admin_required()
+def bulk_update_services():
+    """
+    Update many services at once
+    ---
+    tags:
+      - Admin
+    parameters:
+      - name: bulk
+        in: body
+        required: true
+        schema:
+          type: object
+          properties:
+            services:
+              type: array
+              items:
+                type: object
+                properties:
+                  id:
+                    type: integer
+                  name:
+                    type: string
+                  price:
+                    type: number
+                  description:
+                    type: string
+                  service_type:
+                    type: string
+    responses:
+      200:
+        description: Per id results, status is one of updated, not_found, invalid
+      400:
+        description: Invalid input data
+    """
+    try:
+        data = request.get_json()
+        items = data.get('services') if isinstance(data, dict) else None
+        if not isinstance(items, list) or not items:
+            return jsonify({"category": "danger", "message": "services must be a non-empty list"}), 400
+
+        results = []
+        updates = {}
+        for item in items:
+            service_id = item.get('id') if isinstance(item, dict) else None
+            if isinstance(service_id, bool) or not isinstance(service_id, int):
+                results.append({"id": service_id, "status": "invalid", "message": "id must be an integer"})
+                continue
+            values = _service_values(item)
+            if isinstance(values, str):
+                results.append({"id": service_id, "status": "invalid", "message": values})
+                continue
+            updates.setdefault(service_id, {}).update(values)
+            results.append({"id": service_id, "status": "updated"})
+
+        # Keep only services that exist
+        existing = set()
+        service_ids = list(updates)
+        for chunk in _chunks(service_ids):
+            existing.update(service_id for (service_id,) in db.session.query(Service.id).filter(Service.id.in_(chunk)))
+        for result in results:
+            if result['status'] == 'updated' and result['id'] not in existing:
+                result['status'] = 'not_found'
+
+        # Bulk UPDATE by primary key, one executemany per set of updated columns
+        groups = {}
+        for service_id in service_ids:
+            if service_id in existing:
+                values = updates[service_id]
+                groups.setdefault(tuple(sorted(values)), []).append({"id": service_id, **values})
+        for rows in groups.values():
+            db.session.execute(update(Service), rows)
+        db.session.commit()
+
+        return jsonify({
+            "category": "success",
+            "message": f"{sum(len(rows) for rows in groups.values())} services updated",
+            "results": results
+        }), 200
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.exception("Error in bulk service update")
         return jsonify({"category": "danger", "message": f"Database error: {str(e)}"}), 500
 
 @admin_bp.route('/admin/services', methods=['GET'])
 @jwt_required()
 @admin_required()
+@etag_cached(Service)
 def get_services():
     """
     Get all services
     ---
     tags:
       - Admin
+    parameters:
+      - name: fields
+        in: query
+        type: string
+        required: false
+        description: Comma separated list of columns to return, e.g. id,name,price
     responses:
       200:
         description: List of all services
     """
     try:
-        services = Service.query.all()
-        return jsonify([service.as_dict() for service in services]), 200
+        service_fields = Service.select_fields(requested_fields())
+        query = Service.query
+        if service_fields:
+            query = query.options(Service.load_fields(service_fields))
+        serialize = Service.serializer(service_fields)
+        return jsonify([serialize(service) for service in query.all()]), 200
     except Exception as e:
         return jsonify({"category": "danger", "message": str(e)}), 500
 
 @admin_bp.route('/admin/service-requests', methods=['GET'])
 @jwt_required()
 @admin_required()
+@etag_cached(ServiceRequest, ProfessionalProfile)
 def get_service_requests():
     """
     Get all service requests with professional details
     ---
     tags:
       - Admin
+    parameters:
+      - name: fields
+        in: query
+        type: string
+        required: false
+        description: Comma separated list of columns to return, e.g. id,service_status,full_name
     responses:
       200:
         description: List of all service requests and professional details
     """
     try:
+        fields = requested_fields()
+        req_fields = ServiceRequest.select_fields(fields)
+        prof_fields = ProfessionalProfile.select_fields(fields)
+
         # Get all service requests
-        requests = ServiceRequest.query.all()
+        query = ServiceRequest.query
+        if req_fields:
+            query = query.options(ServiceRequest.load_fields(req_fields, 'professional_id'))
+        requests = query.all()
         
         # Get all professionals involved in these requests
         professional_ids = set(req.professional_id for req in requests)
-        professionals = ProfessionalProfile.query.filter(
+        query = ProfessionalProfile.query.filter(
             ProfessionalProfile.user_id.in_(professional_ids)
-        ).all()
+        )
+        if prof_fields:
+            query = query.options(ProfessionalProfile.load_fields(prof_fields, 'user_id'))
+        professionals = query.all()
         
         # Create a dictionary of professional profiles
+        serialize_prof = ProfessionalProfile.serializer(prof_fields)
         prof_dict = {
-            prof.user_id: prof.as_dict()
+            prof.user_id: serialize_prof(prof)
             for prof in professionals
         }
         
+        serialize_req = ServiceRequest.serializer(req_fields)
         return jsonify({
-            "requests": [req.as_dict() for req in requests],
+            "requests": [serialize_req(req) for req in requests],
             "professionals": prof_dict
         }), 200
     except Exception as e:
@@ -481,22 +763,14 @@ def export_service_requests(professional_id):
         if not professional:
             return jsonify({"category": "danger", "message": "Professional not found"}), 404
 
-        # Import the Celery instance
-        from app import app as flask_app
-        from utils.celery_tasks import init_celery
-        
-        # Initialize Celery and get export task
-        celery = init_celery(flask_app)
-        export_task = celery.tasks.get('export.service_professional')
-        
-        if export_task:
+        if task_backend().has('export.service_professional'):
             # Start the export task asynchronously
-            task = export_task.delay(professional_id)
+            task_id = submit_task('export.service_professional', professional_id)
             
             return jsonify({
                 "category": "success", 
                 "message": "Export task started. You'll be able to download the file once it's ready.",
-                "task_id": task.id
+                "task_id": task_id
             }), 202
         else:
             # Fallback to synchronous export if task is not available
@@ -516,6 +790,7 @@ def export_service_requests(professional_id):
                 # Write data
                 for req in requests:
                     f.write(f'{req.id},{req.service_status},{req.date_of_request},{req.date_of_accept_reject or ""},{req.date_of_completion or ""},{req.remarks or ""}\n')
+            record_export('service_professional', len(requests))
             
             return jsonify({
                 "category": "success",
@@ -569,22 +844,14 @@ def export_all_service_requests():
             'date_to': data.get('date_to')
         }
         
-        # Import the Celery instance
-        from app import app as flask_app
-        from utils.celery_tasks import init_celery
-        
-        # Initialize Celery and get export task
-        celery = init_celery(flask_app)
-        export_task = celery.tasks.get('export.service_requests')
-        
-        if export_task:
+        if task_backend().has('export.service_requests'):
             # Start the export task asynchronously
-            task = export_task.delay(filters)
+            task_id = submit_task('export.service_requests', filters)
             
             return jsonify({
                 "category": "success", 
                 "message": "Export task started. You'll be able to download the file once it's ready.",
-                "task_id": task.id
+                "task_id": task_id
             }), 202
         else:
             return jsonify({"category": "danger", "message": "Export task not found"}), 500
@@ -592,6 +859,31 @@ def export_all_service_requests():
     except Exception as e:
         return jsonify({"category": "danger", "message": str(e)}), 500
 
+@admin_bp.route('/admin/tasks/<task_id>', methods=['GET'])
+@jwt_required()
+@admin_required()
+def get_task_status(task_id):
+    """
+    Status of a background task started by an export
+    ---
+    tags:
+      - Admin
+    parameters:
+      - name: task_id
+        in: path
+        type: string
+        required: true
+    responses:
+      200:
+        description: Task state (PENDING, STARTED, SUCCESS or FAILURE) with its result or error once finished
+      404:
+        description: Task not found
+    """
+    status = task_status(task_id)
+    if status is None:
+        return jsonify({"category": "danger", "message": "Task not found"}), 404
+    return jsonify(status), 200
+
 @admin_bp.route('/admin/reports/list', methods=['GET'])
 @jwt_required()
 @admin_required()
@@ -618,6 +910,8 @@ def list_reports():
 def download_report(filename):
     """
     Download a specific report
+
+    Supports Range and conditional requests.
     ---
     tags:
       - Admin
@@ -629,14 +923,74 @@ def download_report(filename):
     responses:
       200:
         description: Report file
+      206:
+        description: Requested byte range of the report
+      304:
+        description: Report not modified
       404:
         description: Report not found
     """
     try:
-        return send_from_directory(REPORTS_DIR, filename, as_attachment=True)
-    except Exception as e:
+        return send_download(REPORTS_DIR, filename, 'reports')
+    except NotFound as e:
         return jsonify({"category": "danger", "message": str(e)}), 404
 
+@admin_bp.route('/admin/profiles', methods=['GET'])
+@jwt_required()
+@admin_required()
+def list_profiles():
+    """
+    List the stored request profiles, most recent first
+    ---
+    tags:
+      - Admin
+    responses:
+      200:
+        description: Profiled requests with their route, status and duration
+    """
+    if 'profiles' not in current_app.extensions:
+        return jsonify({"category": "danger", "message": "Profiling is disabled"}), 404
+    return jsonify({"profiles": profile_store().list()}), 200
+
+@admin_bp.route('/admin/profiles/<int:profile_id>', methods=['GET'])
+@jwt_required()
+@admin_required()
+def download_profile(profile_id):
+    """
+    Download a stored request profile
+    ---
+    tags:
+      - Admin
+    parameters:
+      - name: profile_id
+        in: path
+        type: integer
+        required: true
+      - name: format
+        in: query
+        type: string
+        required: false
+        description: "text for a pstats report of a cProfile profile"
+    responses:
+      200:
+        description: .prof file (cProfile, readable with pstats or snakeviz) or .html file (pyinstrument)
+      404:
+        description: Profile not found
+    """
+    if 'profiles' not in current_app.extensions:
+        return jsonify({"category": "danger", "message": "Profiling is disabled"}), 404
+    profile = profile_store().get(profile_id)
+    if not profile:
+        return jsonify({"category": "danger", "message": "Profile not found, it may have been evicted"}), 404
+
+    if profile['engine'] == 'pyinstrument':
+        return current_app.response_class(profile['data'], mimetype='text/html')
+    if request.args.get('format') == 'text':
+        return current_app.response_class(pstats_text(profile), mimetype='text/plain')
+    response = current_app.response_class(profile['data'], mimetype='application/octet-stream')
+    response.headers['Content-Disposition'] = f'attachment; filename=profile_{profile_id}.prof'
+    return response
+
 @admin_bp.route('/admin/profile', methods=['GET'])
 @jwt_required()
 @admin_required()
@@ -700,6 +1054,11 @@ def search():
               enum: [customer, service, professional]
             search_text:
               type: string
+      - name: fields
+        in: query
+        type: string
+        required: false
+        description: Comma separated list of columns to return for each entity, e.g. id,full_name,service_status
     responses:
       200:
         description: Search results
@@ -717,6 +1076,22 @@ def search():
                 "message": "Search type is required"
             }), 400
 
+        # Each model keeps the requested fields that are its own columns
+        fields = requested_fields()
+        service_fields = Service.select_fields(fields)
+        prof_fields = ProfessionalProfile.select_fields(fields)
+        cust_fields = CustomerProfile.select_fields(fields)
+        req_fields = ServiceRequest.select_fields(fields)
+        serialize_service = Service.serializer(service_fields)
+        serialize_prof = ProfessionalProfile.serializer(prof_fields)
+        serialize_cust = CustomerProfile.serializer(cust_fields)
+        serialize_req = ServiceRequest.serializer(req_fields)
+
+        def narrow(query, model, model_fields, *required):
+            if model_fields:
+                query = query.options(model.load_fields(model_fields, *required))
+            return query
+
         response_data = {
             "customers": [],
             "professionals": [],
@@ -730,47 +1105,49 @@ def search():
 
         # Search based on type
         if search_type == 'service':
-            services = Service.query.filter(
+            services = narrow(Service.query.filter(
                 or_(
                     Service.name.ilike(f'%{search_text}%'),
                     Service.service_type.ilike(f'%{search_text}%'),
                     Service.description.ilike(f'%{search_text}%')
                 )
-            ).all()
-            response_data['services'] = [service.as_dict() for service in services]
+            ), Service, service_fields).all()
+            response_data['services'] = [serialize_service(service) for service in services]
 
         elif search_type == 'professional':
-            professionals = (
+            professionals = narrow(
                 ProfessionalProfile.query
                 .join(User, ProfessionalProfile.user_id == User.id)
+                .outerjoin(Document, Document.content_hash == ProfessionalProfile.content_hash)
                 .filter(
                     or_(
                         ProfessionalProfile.full_name.ilike(f'%{search_text}%'),
                         ProfessionalProfile.service_type.ilike(f'%{search_text}%'),
-                        User.username.ilike(f'%{search_text}%')
+                        User.username.ilike(f'%{search_text}%'),
+                        Document.text.ilike(f'%{search_text}%')
                     )
-                )
-                .all()
-            )
-            response_data['professionals'] = [prof.as_dict() for prof in professionals]
+                ),
+                ProfessionalProfile, prof_fields, 'user_id'
+            ).all()
+            response_data['professionals'] = [serialize_prof(prof) for prof in professionals]
 
             # Get associated service requests
             prof_ids = [prof.user_id for prof in professionals]
             if prof_ids:
-                service_requests = ServiceRequest.query.filter(
+                service_requests = narrow(ServiceRequest.query.filter(
                     ServiceRequest.professional_id.in_(prof_ids)
-                ).all()
-                response_data['service_requests'] = [req.as_dict() for req in service_requests]
+                ), ServiceRequest, req_fields).all()
+                response_data['service_requests'] = [serialize_req(req) for req in service_requests]
 
                 # Get service types for professionals
-                services = Service.query.all()
+                services = narrow(Service.query, Service, service_fields, 'id').all()
                 response_data['service_type'] = {
-                    service.id: service.as_dict()
+                    service.id: serialize_service(service)
                     for service in services
                 }
 
         elif search_type == 'customer':
-            customers = (
+            customers = narrow(
                 CustomerProfile.query
                 .join(User, CustomerProfile.user_id == User.id)
                 .filter(
@@ -779,42 +1156,45 @@ def search():
                         User.username.ilike(f'%{search_text}%'),
                         CustomerProfile.pin_code.ilike(f'%{search_text}%')
                     )
-                )
-                .all()
-            )
-            response_data['customers'] = [cust.as_dict() for cust in customers]
+                ),
+                CustomerProfile, cust_fields, 'user_id'
+            ).all()
+            response_data['customers'] = [serialize_cust(cust) for cust in customers]
 
             # Get associated service requests
             cust_ids = [cust.user_id for cust in customers]
             if cust_ids:
-                service_requests = ServiceRequest.query.filter(
+                service_requests = narrow(ServiceRequest.query.filter(
                     ServiceRequest.customer_id.in_(cust_ids)
-                ).all()
-                response_data['service_requests'] = [req.as_dict() for req in service_requests]
+                ), ServiceRequest, req_fields, 'professional_id', 'service_id').all()
+                response_data['service_requests'] = [serialize_req(req) for req in service_requests]
 
                 # Get customer details
                 response_data['cust_dict'] = {
-                    cust.user_id: cust.as_dict()
+                    cust.user_id: serialize_cust(cust)
                     for cust in customers
                 }
 
                 # Get professional details for these requests
                 prof_ids = set(req.professional_id for req in service_requests if req.professional_id)
                 if prof_ids:
-                    professionals = ProfessionalProfile.query.filter(
+                    professionals = narrow(ProfessionalProfile.query.filter(
                         ProfessionalProfile.user_id.in_(prof_ids)
-                    ).all()
+                    ), ProfessionalProfile, prof_fields, 'user_id').all()
                     response_data['prof_dict'] = {
-                        prof.user_id: prof.as_dict()
+                        prof.user_id: serialize_prof(prof)
                         for prof in professionals
                     }
 
                 # Get service details
                 service_ids = set(req.service_id for req in service_requests)
                 if service_ids:
-                    services = Service.query.filter(Service.id.in_(service_ids)).all()
+                    services = narrow(
+                        Service.query.filter(Service.id.in_(service_ids)),
+                        Service, service_fields, 'id'
+                    ).all()
                     response_data['service_dict'] = {
-                        service.id: service.as_dict()
+                        service.id: serialize_service(service)
                         for service in services
                     }
 
@@ -909,7 +1289,7 @@ def get_ratings_summary():
         return jsonify(counts), 200
 
     except Exception as e:
-        print(f"Error fetching ratings summary: {str(e)}")
+        current_app.logger.exception("Error fetching ratings summary")
         return jsonify({
             "category": "danger",
             "message": f"Error fetching ratings summary: {str(e)}"
@@ -938,9 +1318,7 @@ def get_service_requests_summary():
             func.strftime('%Y-%m-%d', ServiceRequest.date_of_request)
         ).all()
 
-        # Debugging: Check data types
-        print("requests_by_date:", requests_by_date)
-        print("Type of first date value:", type(requests_by_date[0][0]) if requests_by_date else "No data")
+        current_app.logger.debug("Service requests by date: %s", requests_by_date)
 
         # Convert results into a dictionary (No strftime needed since it's already a string)
         date_counts = {date: count for date, count in requests_by_date}
@@ -1011,30 +1389,22 @@ def test_async_export(professional_id):
         description: Professional not found
     """
     try:
-        # Import the Celery instance
-        from app import app as flask_app
-        from utils.celery_tasks import init_celery
-        
         # Check if professional exists
         professional = ProfessionalProfile.query.filter_by(user_id=professional_id).first()
         if not professional:
             return jsonify({"category": "danger", "message": "Professional not found"}), 404
             
-        # Initialize Celery
-        celery = init_celery(flask_app)
-        
         # Get the export task 
-        # Note: This is just to verify if we can access Celery properly
+        # Note: This is just to verify if we can access the task backend properly
         # In a real implementation, you would have a dedicated export task
-        send_daily_reminders = celery.tasks.get('tasks.send_daily_reminders')
-        if send_daily_reminders:
+        if task_backend().has('tasks.send_daily_reminders'):
             # Start the task asynchronously
-            task = send_daily_reminders.delay()
+            task_id = submit_task('tasks.send_daily_reminders')
             
             return jsonify({
                 "category": "success", 
                 "message": "Export task started successfully",
-                "task_id": task.id
+                "task_id": task_id
             }), 202
         else:
             return jsonify({"category": "danger", "message": "Export task not found"}), 500
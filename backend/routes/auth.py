@@ -1,10 +1,52 @@
 from flask import Blueprint, request, jsonify
-from flask_jwt_extended import create_access_token, jwt_required, get_jwt
-from werkzeug.security import generate_password_hash, check_password_hash
+from flask_jwt_extended import create_access_token, create_refresh_token, decode_token, jwt_required, get_jwt
 from models import db, User, CustomerProfile, ProfessionalProfile
+from utils.passwords import hash_password, verify_password
+from utils.revocation import revoke_token
 
 auth_bp = Blueprint('auth', __name__)
 
+# Bump when the claims carried by access tokens change, so the frontend refreshes older tokens
+CLAIMS_VERSION = 1
+
+def user_claims(user):
+    """Role, profile and approval state the frontend routes on"""
+    redirect = None
+    if user.role in ['Customer', 'Professional']:
+        # For customers and professionals, check if profile is complete
+        if user.role == 'Customer':
+            profile = CustomerProfile.query.filter_by(user_id=user.id).first()
+        else:
+            profile = ProfessionalProfile.query.filter_by(user_id=user.id).first()
+
+        if not profile:
+            redirect = f"{user.role.lower()}_profile"
+        else:
+            redirect = f"{user.role.lower()}_dashboard"
+
+    return {
+        "cv": CLAIMS_VERSION,
+        "role": user.role,
+        "redirect": redirect,
+        "approved": user.approve,
+        "blocked": user.blocked
+    }
+
+def issue_tokens(user):
+    """A short-lived access token carrying the user's claims and a refresh token to renew it"""
+    return {
+        "access_token": create_access_token(identity=str(user.id), additional_claims=user_claims(user)),
+        "refresh_token": create_refresh_token(identity=str(user.id))
+    }
+
+def check_password(user, password):
+    """Verify the password, upgrading the stored hash if it was made with other hash parameters"""
+    valid, new_hash = verify_password(user.password, password)
+    if new_hash:
+        user.password = new_hash
+        db.session.commit()
+    return valid
+
 @auth_bp.route('/register', methods=['POST'])
 def register():
     """
@@ -40,7 +82,7 @@ def register():
     if User.query.filter_by(username=data['username']).first():
         return jsonify({"category": "danger", "message": "Username already exists"}), 400
         
-    hashed_password = generate_password_hash(data['password'])
+    hashed_password = hash_password(data['password'])
     
     # Set defaults based on role
     approve = True
@@ -103,17 +145,16 @@ def login():
         
     user = User.query.filter_by(username=data['username']).first()
     
-    if not user or not check_password_hash(user.password, data['password']):
+    if not user or not check_password(user, data['password']):
         return jsonify({"category": "danger", "message": "Invalid username or password"}), 401
         
     if user.blocked:
         return jsonify({"category": "danger", "message": "Your account is blocked"}), 401
         
-    access_token = create_access_token(identity=str(user.id))
     return jsonify({
         "category": "success",
         "message": "Login successful",
-        "access_token": access_token,
+        **issue_tokens(user),
         "role": user.role,
         "approve": user.approve
     }), 200
@@ -126,17 +167,68 @@ def logout():
     ---
     tags:
       - Authentication
+    parameters:
+      - name: tokens
+        in: body
+        required: false
+        schema:
+          type: object
+          properties:
+            refresh_token:
+              type: string
     responses:
       200:
         description: Logout successful
     """
+    claims = get_jwt()
+    revoke_token(claims)
+    refresh_token = (request.get_json(silent=True) or {}).get('refresh_token')
+    if refresh_token:
+        try:
+            refresh_claims = decode_token(refresh_token)
+        except Exception:
+            refresh_claims = None
+        if refresh_claims and refresh_claims['type'] == 'refresh' and refresh_claims['sub'] == claims['sub']:
+            revoke_token(refresh_claims)
     return jsonify({"category": "success", "message": "Logout successful"}), 200
 
+@auth_bp.route('/refresh', methods=['POST'])
+@jwt_required(refresh=True)
+def refresh():
+    """
+    Exchange a refresh token for a new access and refresh token
+    ---
+    tags:
+      - Authentication
+    security:
+      - Bearer: []
+    responses:
+      200:
+        description: New tokens issued, the refresh token sent is revoked
+      401:
+        description: Invalid, revoked or missing refresh token, or the account is blocked
+    """
+    claims = get_jwt()
+    user = db.session.get(User, int(claims['sub']))
+
+    if not user or user.blocked:
+        return jsonify({"category": "danger", "message": "Your account is blocked"}), 401
+
+    # Refresh tokens are single use, a new one comes with every access token
+    revoke_token(claims)
+    return jsonify({
+        "category": "success",
+        "message": "Tokens refreshed",
+        **issue_tokens(user)
+    }), 200
+
 @auth_bp.route('/get-claims', methods=['GET'])
 @jwt_required()
 def get_claims():
     """
     Get user claims from JWT token
+
+    The access tokens issued at login and refresh carry the same claims.
     ---
     tags:
       - Authentication
@@ -157,31 +249,11 @@ def get_claims():
                 "category": "danger",
                 "message": "User not found"
             }), 404
-            
-        redirect = None
-        if user.role in ['Customer', 'Professional']:
-            # For customers and professionals, check if profile is complete
-            profile = None
-            if user.role == 'Customer':
-                profile = CustomerProfile.query.filter_by(user_id=user.id).first()
-            else:
-                profile = ProfessionalProfile.query.filter_by(user_id=user.id).first()
-                
-            if not profile:
-                redirect = f"{user.role.lower()}_profile"
-            else:
-                redirect = f"{user.role.lower()}_dashboard"
         
         return jsonify({
             "category": "success",
             "message": "Claims retrieved successfully",
-            "claims": {
-                "user_id": user.id,
-                "role": user.role,
-                "redirect": redirect,
-                "approved": user.approve,
-                "blocked": user.blocked
-            }
+            "claims": {"user_id": user.id, **user_claims(user)}
         }), 200
         
     except Exception as e:
@@ -221,16 +293,15 @@ def admin_login():
         
     user = User.query.filter_by(username=data['username']).first()
     
-    if not user or not check_password_hash(user.password, data['password']):
+    if not user or not check_password(user, data['password']):
         return jsonify({"category": "danger", "message": "Invalid username or password"}), 401
         
     if user.role != 'Admin':
         return jsonify({"category": "danger", "message": "Access denied. Admin privileges required."}), 403
         
-    access_token = create_access_token(identity=str(user.id))
     return jsonify({
         "category": "success",
         "message": "Login successful",
-        "access_token": access_token,
+        **issue_tokens(user),
         "role": user.role
     }), 200 
\ No newline at end of file
@@ -1,10 +1,15 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app
 from flask_jwt_extended import jwt_required, get_jwt, get_jwt_identity
 from models import db, CustomerProfile, ServiceRequest, Service, ProfessionalProfile, User, Review
-from datetime import datetime
+from sqlalchemy import insert
+from utils.helpers import requested_fields
+from utils.http_cache import etag_cached
+from utils.request_status import TransitionRefused, transition
 
 customer_bp = Blueprint('customer', __name__)
 
+REMARKS_MAX_LENGTH = ServiceRequest.remarks.type.length
+
 @customer_bp.route('/customer/profile', methods=['GET'])
 @jwt_required()
 def get_customer_profile():
@@ -110,21 +115,33 @@ def create_customer_profile():
 
 @customer_bp.route('/customer/services', methods=['GET'])
 @jwt_required()
+@etag_cached(Service)
 def get_services():
     """
     Get all available services
     ---
     tags:
       - Customer
+    parameters:
+      - name: fields
+        in: query
+        type: string
+        required: false
+        description: Comma separated list of columns to return, e.g. id,name,price
     responses:
       200:
         description: List of services
     """
-    services = Service.query.all()
-    return jsonify([service.as_dict() for service in services]), 200
+    service_fields = Service.select_fields(requested_fields())
+    query = Service.query
+    if service_fields:
+        query = query.options(Service.load_fields(service_fields))
+    serialize = Service.serializer(service_fields)
+    return jsonify([serialize(service) for service in query.all()]), 200
 
 @customer_bp.route('/customer/professionals/<service_type>', methods=['GET'])
 @jwt_required()
+@etag_cached(ProfessionalProfile, User)
 def get_professionals_by_service(service_type):
     """
     Get professionals by service type
@@ -150,7 +167,8 @@ def get_professionals_by_service(service_type):
         )
         .all()
     )
-    return jsonify([prof.as_dict() for prof in professionals]), 200
+    serialize = ProfessionalProfile.serializer()
+    return jsonify([serialize(prof) for prof in professionals]), 200
 
 @customer_bp.route('/customer/request', methods=['POST'])
 @jwt_required()
@@ -201,8 +219,137 @@ def create_service_request():
         db.session.rollback()
         return jsonify({"category": "danger", "message": str(e)}), 500
 
+@customer_bp.route('/customer/requests/batch', methods=['POST'])
+@jwt_required()
+def create_service_requests_batch():
+    """
+    Create many service requests at once
+    ---
+    tags:
+      - Customer
+    parameters:
+      - name: batch
+        in: body
+        required: true
+        schema:
+          type: object
+          properties:
+            requests:
+              type: array
+              items:
+                type: object
+                properties:
+                  service_id:
+                    type: integer
+                  professional_id:
+                    type: integer
+                  remarks:
+                    type: string
+                    maxLength: 200
+    responses:
+      200:
+        description: Per item results, status is created or invalid
+      400:
+        description: Invalid input data
+    """
+    data = request.get_json()
+    user_id = int(get_jwt()['sub'])
+    items = data.get('requests') if isinstance(data, dict) else None
+    
+    if not isinstance(items, list) or not items:
+        return jsonify({"category": "danger", "message": "requests must be a non-empty list"}), 400
+    
+    max_items = current_app.config['MAX_BATCH_SERVICE_REQUESTS']
+    if len(items) > max_items:
+        return jsonify({"category": "danger", "message": f"At most {max_items} requests per batch"}), 400
+    
+    # Load everything needed for validation up front, one query per table
+    def is_id(value):
+        return isinstance(value, int) and not isinstance(value, bool)
+
+    def valid_item(item):
+        return isinstance(item, dict) and is_id(item.get('service_id')) and is_id(item.get('professional_id'))
+    service_ids = {item['service_id'] for item in items if valid_item(item)}
+    professional_ids = {item['professional_id'] for item in items if valid_item(item)}
+    service_types = dict(
+        db.session.query(Service.id, Service.service_type)
+        .filter(Service.id.in_(service_ids))
+        .all()
+    )
+    professional_types = dict(
+        db.session.query(ProfessionalProfile.user_id, ProfessionalProfile.service_type)
+        .join(User, ProfessionalProfile.user_id == User.id)
+        .filter(
+            ProfessionalProfile.user_id.in_(professional_ids),
+            User.approve == True,
+            User.blocked == False
+        )
+        .all()
+    )
+    
+    results = []
+    rows = []
+    for index, item in enumerate(items):
+        if not valid_item(item):
+            results.append({"index": index, "status": "invalid", "message": "service_id and professional_id must be integers"})
+            continue
+        remarks = item.get('remarks')
+        if remarks is None:
+            remarks = ''
+        if not isinstance(remarks, str) or len(remarks) > REMARKS_MAX_LENGTH:
+            results.append({"index": index, "status": "invalid", "message": f"remarks must be a string of at most {REMARKS_MAX_LENGTH} characters"})
+            continue
+        service_type = service_types.get(item['service_id'])
+        if service_type is None:
+            results.append({"index": index, "status": "invalid", "message": "Service not found"})
+            continue
+        professional_type = professional_types.get(item['professional_id'])
+        if professional_type is None:
+            results.append({"index": index, "status": "invalid", "message": "Professional not found or not approved"})
+            continue
+        if professional_type != service_type:
+            results.append({"index": index, "status": "invalid", "message": "Professional does not offer this service type"})
+            continue
+        results.append({"index": index, "status": "created"})
+        rows.append({
+            "service_id": item['service_id'],
+            "customer_id": user_id,
+            "professional_id": item['professional_id'],
+            "service_status": 'requested',
+            "remarks": remarks
+        })
+    
+    try:
+        if rows:
+            # Single bulk INSERT returning the new ids. SQLAlchemy can only keep
+            # RETURNING in row order on SQLite by inserting one row at a time,
+            # but SQLite assigns the rowids of the batch in row order while the
+            # transaction holds the write lock, so sorting the ids is enough there.
+            ordered = db.session.get_bind().dialect.name != 'sqlite'
+            created_ids = db.session.execute(
+                insert(ServiceRequest).returning(ServiceRequest.id, sort_by_parameter_order=ordered),
+                rows
+            ).scalars().all()
+            if not ordered:
+                created_ids.sort()
+            created = iter(created_ids)
+            for result in results:
+                if result['status'] == 'created':
+                    result['id'] = next(created)
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({"category": "danger", "message": str(e)}), 500
+    
+    return jsonify({
+        "category": "success",
+        "message": f"{len(rows)} of {len(items)} requests created",
+        "results": results
+    }), 200
+
 @customer_bp.route('/customer/requests', methods=['GET'])
 @jwt_required()
+@etag_cached(ServiceRequest, Service, ProfessionalProfile)
 def get_customer_requests():
     """
     Get all service requests for a customer with detailed information
@@ -234,28 +381,25 @@ def get_customer_requests():
             .all()
         )
         
-        # Format the results
+        # Format the results, dates are serialized as ISO-8601 by the JSON provider
+        serialize = ServiceRequest.serializer()
         result = []
         for req, service_name, service_description, service_price, service_type, professional_name in service_requests_with_details:
-            request_data = req.as_dict()
+            request_data = serialize(req)
             # Add the joined data
             request_data.update({
                 'service_name': service_name,
                 'service_description': service_description,
                 'service_price': service_price,
                 'service_type': service_type,
-                'professional_name': professional_name or "Unknown Professional",
-                # Format dates for better readability
-                'date_of_request_formatted': req.date_of_request.strftime('%Y-%m-%d %H:%M') if req.date_of_request else None,
-                'date_of_accept_reject_formatted': req.date_of_accept_reject.strftime('%Y-%m-%d %H:%M') if req.date_of_accept_reject else None,
-                'date_of_completion_formatted': req.date_of_completion.strftime('%Y-%m-%d %H:%M') if req.date_of_completion else None
+                'professional_name': professional_name or "Unknown Professional"
             })
             result.append(request_data)
         
         return jsonify(result), 200
         
     except Exception as e:
-        print(f"Error fetching customer requests: {str(e)}")
+        current_app.logger.exception("Error fetching customer requests")
         return jsonify({
             "category": "danger", 
             "message": f"Error retrieving service requests: {str(e)}"
@@ -292,11 +436,12 @@ def search_services():
         pin_code = request.args.get('pin_code', '').strip()
         service_type = request.args.get('service_type', '').strip()
         
-        print(f"Debug - Search parameters: location='{location}', pin_code='{pin_code}', service_type='{service_type}'")
+        current_app.logger.debug(
+            "Service search: location=%r pin_code=%r service_type=%r", location, pin_code, service_type
+        )
         
         # Start with base query for all services if no filters are applied
         if not any([location, pin_code, service_type]):
-            print("Debug - No search criteria, returning all services")
             services = Service.query.all()
             return jsonify([service.as_dict() for service in services])
         
@@ -305,7 +450,6 @@ def search_services():
         
         # Apply service_type filter directly to Service table
         if service_type:
-            print(f"Debug - Filtering by service_type: {service_type}")
             query = query.filter(Service.service_type.ilike(f'%{service_type}%'))
         
         # If location or pin_code are specified, we need to join with professionals
@@ -325,28 +469,25 @@ def search_services():
             )
             
             if location:
-                print(f"Debug - Filtering by location: {location}")
                 query = query.filter(ProfessionalProfile.address.ilike(f'%{location}%'))
             
             if pin_code:
-                print(f"Debug - Filtering by pin_code: {pin_code}")
                 query = query.filter(ProfessionalProfile.pin_code == pin_code)
         
         # Execute the query
         services = query.all()
-        print(f"Debug - Found {len(services)} services matching criteria")
+        current_app.logger.debug("Service search found %d services", len(services))
         
         # Check if we got any results
         if not services:
             # Try a more lenient search if exact match fails
             if service_type:
-                print("Debug - No results with exact service type, trying partial match")
                 lenient_query = db.session.query(Service).filter(
                     Service.name.ilike(f'%{service_type}%') | 
                     Service.description.ilike(f'%{service_type}%')
                 )
                 services = lenient_query.all()
-                print(f"Debug - Found {len(services)} services with lenient search")
+                current_app.logger.debug("Lenient service search found %d services", len(services))
         
         result = [service.as_dict() for service in services]
         
@@ -361,7 +502,7 @@ def search_services():
         return jsonify(result)
         
     except Exception as e:
-        print(f"Error searching services: {str(e)}")
+        current_app.logger.exception("Error searching services")
         return jsonify({
             "category": "danger",
             "message": f"Error searching services: {str(e)}",
@@ -373,22 +514,21 @@ def search_services():
 def create_review(service_request_id):
     """Create a review for a completed service request"""
     current_user_id = get_jwt_identity()
-    print(f"Debug - Attempting review creation: service_request_id={service_request_id}, current_user_id={current_user_id}")
     
     # Get the service request
     service_request = ServiceRequest.query.get_or_404(service_request_id)
-    print(f"Debug - Service Request found: customer_id={service_request.customer_id}, status={service_request.service_status}")
+    current_app.logger.debug(
+        "Review of service request %s by user %s: customer_id=%s status=%s",
+        service_request_id, current_user_id, service_request.customer_id, service_request.service_status
+    )
     
     # Ensure both IDs are converted to the same type for comparison
     # JWT identity is usually returned as a string, while database IDs are often integers
     current_user_id = int(current_user_id)
     customer_id = int(service_request.customer_id)
     
-    print(f"Debug - After conversion - current_user_id: {current_user_id} ({type(current_user_id)}), customer_id: {customer_id} ({type(customer_id)})")
-    
     # Verify this is the customer's service request
     if customer_id != current_user_id:
-        print(f"Debug - Authorization failed: request customer_id={customer_id} does not match current_user_id={current_user_id}")
         return jsonify({"category": "danger", 
                        "message": "This service request belongs to a different customer"}), 403
     
@@ -440,6 +580,7 @@ def create_review(service_request_id):
 
 @customer_bp.route('/reviews/given', methods=['GET'])
 @jwt_required()
+@etag_cached(Review, ProfessionalProfile)
 def get_my_reviews():
     """Get all reviews given by the current customer"""
     current_user_id = get_jwt_identity()
@@ -472,51 +613,23 @@ def get_professional_reviews(professional_id):
 @jwt_required()
 def close_service_request(request_id):
     """Close a service request by the customer"""
-    current_user_id = get_jwt_identity()
-    print(f"Debug - Attempting to close service request: request_id={request_id}, current_user_id={current_user_id}")
-    print(f"Debug - Type of current_user_id: {type(current_user_id)}")
-    
-    # Get the service request
-    service_request = ServiceRequest.query.get_or_404(request_id)
-    print(f"Debug - Service Request found: customer_id={service_request.customer_id}, status={service_request.service_status}")
-    print(f"Debug - Type of service_request.customer_id: {type(service_request.customer_id)}")
-    
-    # Convert IDs to integers for comparison
-    current_user_id = int(current_user_id)
-    customer_id = int(service_request.customer_id)
-    
-    print(f"Debug - After conversion - current_user_id: {current_user_id} ({type(current_user_id)}), customer_id: {customer_id} ({type(customer_id)})")
-    
-    # Verify this is the customer's service request
-    if customer_id != current_user_id:
-        print(f"Debug - Authorization failed: request customer_id={customer_id} does not match current_user_id={current_user_id}")
-        return jsonify({
-            "message": f"You are not authorized to close this service request. Request belongs to customer {customer_id}, but you are {current_user_id}",
-            "category": "danger"
-        }), 403
-    
-    # Verify service request is in accepted status
-    if service_request.service_status != 'accepted':
-        print(f"Debug - Invalid status: current status is {service_request.service_status}")
-        return jsonify({
-            "message": "Only accepted service requests can be closed",
-            "category": "danger"
-        }), 400
+    current_user_id = int(get_jwt_identity())
+    data = request.get_json(silent=True) or {}
+    current_app.logger.debug("Closing service request %s by user %s", request_id, current_user_id)
     
     try:
-        # Update the service request status to completed
-        service_request.service_status = 'completed'
-        service_request.date_of_completion = datetime.utcnow()
-        db.session.commit()
-        print(f"Debug - Service request closed successfully")
+        # Moves the customer's request from accepted to completed in one conditional update
+        transition(request_id, 'completed', data.get('version'), customer_id=current_user_id)
         
         return jsonify({
             "message": "Service request closed successfully",
             "category": "success"
         }), 200
+    except TransitionRefused as e:
+        return jsonify({"message": e.message, "category": "danger"}), e.http_status
     except Exception as e:
         db.session.rollback()
-        print(f"Debug - Error closing service request: {str(e)}")
+        current_app.logger.exception("Error closing service request %s", request_id)
         return jsonify({
             "message": f"Error closing service request: {str(e)}",
             "category": "danger"
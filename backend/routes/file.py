@@ -1,6 +1,10 @@
-from flask import Blueprint, send_from_directory, current_app
+from flask import Blueprint, current_app, jsonify
 from flask_jwt_extended import jwt_required
 import os
+from werkzeug.exceptions import NotFound
+from models import ProfessionalProfile
+from utils.downloads import send_download
+from utils.storage import CONTENT_HASH_RE, send_preview, send_upload
 
 file_bp = Blueprint('file', __name__)
 
@@ -12,6 +16,8 @@ def allowed_file(filename):
 def download_file(filename):
     """
     Download a file from the uploads directory
+
+    Supports Range and conditional requests.
     ---
     tags:
       - File Management
@@ -20,12 +26,51 @@ def download_file(filename):
         in: path
         type: string
         required: true
-        description: Name of the file to download
+        description: Content hash of the document to download, or the name of a file uploaded before documents were stored by hash
     responses:
       200:
         description: File downloaded successfully
+      206:
+        description: Requested byte range of the file
+      304:
+        description: File not modified
       404:
         description: File not found
     """
+    if CONTENT_HASH_RE.match(filename):
+        profile = ProfessionalProfile.query.filter_by(content_hash=filename).first()
+        if not profile:
+            return jsonify({"category": "danger", "message": "File not found"}), 404
+        return send_upload(filename, profile.filename)
+
     file_directory = os.path.join(current_app.root_path, current_app.config['UPLOAD_FOLDER'])
-    return send_from_directory(file_directory, filename, as_attachment=True) 
\ No newline at end of file
+    return send_download(file_directory, filename, 'uploads') 
+@file_bp.route('/documents/<string:content_hash>/preview', methods=['GET'])
+@jwt_required()
+def document_preview(content_hash):
+    """
+    PNG preview of an uploaded document, made in the background after the upload
+    ---
+    tags:
+      - File Management
+    parameters:
+      - name: content_hash
+        in: path
+        type: string
+        required: true
+        description: Content hash of the document
+    responses:
+      200:
+        description: Preview image
+      304:
+        description: Preview not modified
+      404:
+        description: No preview for this document
+    """
+    # Served straight from the storage, the preview only exists once the document was processed
+    try:
+        if not CONTENT_HASH_RE.match(content_hash):
+            raise NotFound()
+        return send_preview(content_hash)
+    except NotFound:
+        return jsonify({"category": "danger", "message": "No preview available"}), 404
@@ -5,10 +5,20 @@ import os
 from models import db, ProfessionalProfile, ServiceRequest, User, Review, CustomerProfile, Service
 from datetime import datetime, timedelta
 from routes.file import allowed_file
-from utils.helpers import save_file
+from utils.helpers import requested_fields
+from utils.http_cache import etag_cached
+from utils.document_tasks import queue_document
+from utils.request_status import TransitionRefused, transition
+from utils.storage import store_upload
 
 professional_bp = Blueprint('professional', __name__)
 
+# Columns returned by the service requests summary
+SUMMARY_REQUEST_FIELDS = {
+    'id', 'customer_id', 'professional_id', 'service_id', 'service_status',
+    'date_of_request', 'date_of_accept_reject', 'date_of_completion'
+}
+
 @professional_bp.route('/professional/profile', methods=['POST'])
 @jwt_required()
 def create_professional_profile():
@@ -49,21 +59,22 @@ def create_professional_profile():
     # Check if profile already exists
     existing_profile = ProfessionalProfile.query.filter_by(user_id=user_id).first()
     
+    # The document is stored under the hash of its content, the name is kept for downloads
+    uploaded = False
+    saved_filename = existing_profile.filename if existing_profile else None
+    content_hash = existing_profile.content_hash if existing_profile else None
     if 'file' in request.files:
         file = request.files['file']
         if file.filename != '':
             if not allowed_file(file.filename):
                 return jsonify({"category": "danger", "message": "Invalid file type"}), 400
             
-            filename = secure_filename(file.filename)
-            saved_filename = save_file(file)
+            content_hash = store_upload(file)
             
-            if not saved_filename:
+            if not content_hash:
                 return jsonify({"category": "danger", "message": "Error saving file"}), 500
-        else:
-            saved_filename = existing_profile.filename if existing_profile else None
-    else:
-        saved_filename = existing_profile.filename if existing_profile else None
+            saved_filename = secure_filename(file.filename)
+            uploaded = True
     
     try:
         if existing_profile:
@@ -75,6 +86,7 @@ def create_professional_profile():
             existing_profile.pin_code = data['pin_code']
             if saved_filename:
                 existing_profile.filename = saved_filename
+                existing_profile.content_hash = content_hash
         else:
             # Create new profile
             new_profile = ProfessionalProfile(
@@ -84,11 +96,15 @@ def create_professional_profile():
                 experience=data['experience'],
                 address=data['address'],
                 pin_code=data['pin_code'],
-                filename=saved_filename
+                filename=saved_filename,
+                content_hash=content_hash
             )
             db.session.add(new_profile)
         
         db.session.commit()
+        if uploaded:
+            # Validate the document and make its preview for the admins in the background
+            queue_document(content_hash, saved_filename)
         return jsonify({"category": "success", "message": "Profile updated successfully"}), 200
     except Exception as e:
         db.session.rollback()
@@ -96,35 +112,58 @@ def create_professional_profile():
 
 @professional_bp.route('/professional/requests', methods=['GET'])
 @jwt_required()
+@etag_cached(ServiceRequest, CustomerProfile, Service)
 def get_professional_requests():
     """
     Get all service requests for a professional
     ---
     tags:
       - Professional
+    parameters:
+      - name: fields
+        in: query
+        type: string
+        required: false
+        description: Comma separated list of columns to return for each entity, e.g. id,service_status,full_name
     responses:
       200:
         description: List of service requests
     """
     user_id = get_jwt()['sub']
+    fields = requested_fields()
+    req_fields = ServiceRequest.select_fields(fields)
+    cust_fields = CustomerProfile.select_fields(fields)
+    service_fields = Service.select_fields(fields)
     
     # Get all service requests for this professional
-    requests = ServiceRequest.query.filter_by(professional_id=user_id).all()
+    query = ServiceRequest.query.filter_by(professional_id=user_id)
+    if req_fields:
+        query = query.options(ServiceRequest.load_fields(req_fields, 'customer_id', 'service_id'))
+    requests = query.all()
     
     # Get all customer IDs and service IDs from these requests
     customer_ids = set(req.customer_id for req in requests)
     service_ids = set(req.service_id for req in requests)
     
     # Get customer profiles and services
-    customers = CustomerProfile.query.filter(CustomerProfile.user_id.in_(customer_ids)).all()
-    services = Service.query.filter(Service.id.in_(service_ids)).all()
+    customer_query = CustomerProfile.query.filter(CustomerProfile.user_id.in_(customer_ids))
+    if cust_fields:
+        customer_query = customer_query.options(CustomerProfile.load_fields(cust_fields, 'user_id'))
+    service_query = Service.query.filter(Service.id.in_(service_ids))
+    if service_fields:
+        service_query = service_query.options(Service.load_fields(service_fields, 'id'))
+    customers = customer_query.all()
+    services = service_query.all()
     
     # Create dictionaries for easy lookup
-    customer_dict = {cust.user_id: cust.as_dict() for cust in customers}
-    service_dict = {service.id: service.as_dict() for service in services}
+    serialize_cust = CustomerProfile.serializer(cust_fields)
+    serialize_service = Service.serializer(service_fields)
+    customer_dict = {cust.user_id: serialize_cust(cust) for cust in customers}
+    service_dict = {service.id: serialize_service(service) for service in services}
     
+    serialize_req = ServiceRequest.serializer(req_fields)
     return jsonify({
-        "requests": [request.as_dict() for request in requests],
+        "requests": [serialize_req(req) for req in requests],
         "customers": customer_dict,
         "services": service_dict
     }), 200
@@ -151,37 +190,37 @@ def update_request_status(request_id):
             status:
               type: string
               enum: [accepted, rejected, completed]
+            version:
+              type: integer
+              description: Version of the request as last seen, the update fails with 409 if it changed since
     responses:
       200:
         description: Status updated successfully
+      400:
+        description: Invalid status
       404:
         description: Request not found
+      409:
+        description: The request's status does not allow the change, or it changed since
     """
     user_id = get_jwt()['sub']
     data = request.get_json()
     
     if 'status' not in data:
         return jsonify({"category": "danger", "message": "Status is required"}), 400
-        
-    service_request = ServiceRequest.query.filter_by(id=request_id, professional_id=user_id).first()
-    if not service_request:
-        return jsonify({"category": "danger", "message": "Request not found"}), 404
-        
-    service_request.service_status = data['status']
-    service_request.date_of_accept_reject = datetime.utcnow()
-    
-    if data['status'] == 'completed':
-        service_request.date_of_completion = datetime.utcnow()
     
     try:
-        db.session.commit()
+        transition(request_id, data['status'], data.get('version'), professional_id=user_id)
         return jsonify({"category": "success", "message": "Status updated successfully"}), 200
+    except TransitionRefused as e:
+        return jsonify({"category": "danger", "message": e.message}), e.http_status
     except Exception as e:
         db.session.rollback()
         return jsonify({"category": "danger", "message": str(e)}), 500
 
 @professional_bp.route('/reviews/received', methods=['GET'])
 @jwt_required()
+@etag_cached(Review, CustomerProfile)
 def get_my_reviews():
     """Get all reviews received by the current professional"""
     current_user_id = get_jwt_identity()
@@ -415,19 +454,14 @@ def get_service_requests_summary(user_id):
             "message": "Unauthorized access"
         }), 403
     
-    # Get all service requests for this professional
-    service_requests = ServiceRequest.query.filter_by(professional_id=user_id).all()
+    # Get all service requests for this professional as plain rows
+    fields = ServiceRequest.select_fields(SUMMARY_REQUEST_FIELDS)
+    service_requests = (
+        db.session.query(*(getattr(ServiceRequest, key) for key in fields))
+        .filter(ServiceRequest.professional_id == user_id)
+        .all()
+    )
     
     # Return the complete service request objects so frontend can categorize them
-    return jsonify([
-        {
-            'id': req.id,
-            'customer_id': req.customer_id,
-            'professional_id': req.professional_id,
-            'service_id': req.service_id,
-            'service_status': req.service_status,
-            'date_of_request': req.date_of_request.isoformat() if req.date_of_request else None,
-            'date_of_accept_reject': req.date_of_accept_reject.isoformat() if req.date_of_accept_reject else None,
-            'date_of_completion': req.date_of_completion.isoformat() if req.date_of_completion else None
-        } for req in service_requests
-    ])
\ No newline at end of file
+    serialize = ServiceRequest.serializer(fields)
+    return jsonify([serialize(req) for req in service_requests])
\ No newline at end of file
@@ -0,0 +1,119 @@
+#!/usr/bin/env python
+"""
+Test script for concurrent service request status changes.
+
+Races the professional's accept and reject and the customer's close of the
+same request from several threads, against a throwaway database, and checks
+that every request ends in one consistent state: exactly one of accept and
+reject wins, a close only succeeds after the accept, every loser gets a 409
+and the request's version counts the successful transitions.
+
+Usage:
+    python test_status_transitions.py [rounds] [threads]
+"""
+import sys
+import threading
+from collections import Counter
+
+from benchmarks.harness import auth_header, benchmark_app
+from models import db, User, Service, ServiceRequest
+
+rounds = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+threads = int(sys.argv[2]) if len(sys.argv) > 2 else 6
+
+app = benchmark_app()
+with app.app_context():
+    customer = User(username='race_customer', password='-', role='Customer', approve=True, blocked=False)
+    professional = User(username='race_professional', password='-', role='Professional', approve=True, blocked=False)
+    service = Service(name='Race Cleaning', price=100, description='Race', service_type='Cleaning')
+    db.session.add_all([customer, professional, service])
+    db.session.flush()
+    request_ids = []
+    for _ in range(rounds):
+        service_request = ServiceRequest(service_id=service.id, customer_id=customer.id,
+                                         professional_id=professional.id, service_status='requested')
+        db.session.add(service_request)
+        db.session.flush()
+        request_ids.append(service_request.id)
+    db.session.commit()
+    customer_id, professional_id, service_id = customer.id, professional.id, service.id
+
+headers = {'customer': auth_header(app, customer_id), 'professional': auth_header(app, professional_id)}
+ACTIONS = {
+    'accept': ('professional', '/professional/request/{}', {'status': 'accepted'}),
+    'reject': ('professional', '/professional/request/{}', {'status': 'rejected'}),
+    'close': ('customer', '/customer/request/{}/close', {}),
+}
+
+def race(request_id):
+    """Send ``threads`` transitions of the request at once; returns (action, status code) pairs"""
+    barrier = threading.Barrier(threads)
+    results = []
+    names = list(ACTIONS)
+
+    def worker(i):
+        action = names[i % len(names)]
+        role, path, body = ACTIONS[action]
+        client = app.test_client()
+        barrier.wait()
+        response = client.put(path.format(request_id), json=body, headers=headers[role])
+        results.append((action, response.status_code))
+
+    workers = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    return results
+
+failures = []
+outcomes = Counter()
+for request_id in request_ids:
+    results = race(request_id)
+    succeeded = Counter(action for action, status in results if status == 200)
+    unexpected = [(action, status) for action, status in results if status not in (200, 409)]
+    with app.app_context():
+        final = db.session.get(ServiceRequest, request_id)
+        status, version = final.service_status, final.version
+
+    expected_status = 'rejected' if succeeded['reject'] else 'completed' if succeeded['close'] else 'accepted'
+    problems = []
+    if unexpected:
+        problems.append(f"unexpected responses {unexpected}")
+    if succeeded['accept'] + succeeded['reject'] != 1:
+        problems.append(f"{succeeded['accept']} accepts and {succeeded['reject']} rejects succeeded")
+    if succeeded['close'] > 1 or (succeeded['close'] and not succeeded['accept']):
+        problems.append(f"{succeeded['close']} closes succeeded")
+    if status != expected_status:
+        problems.append(f"ended {status}, expected {expected_status}")
+    if version != 1 + sum(succeeded.values()):
+        problems.append(f"version {version} after {sum(succeeded.values())} transitions")
+    if problems:
+        failures.append((request_id, problems))
+    outcomes[status] += 1
+
+# A stale version is refused even when the status allows the transition
+with app.app_context():
+    service_request = ServiceRequest(service_id=service_id, customer_id=customer_id,
+                                     professional_id=professional_id, service_status='requested')
+    db.session.add(service_request)
+    db.session.commit()
+    stale_id, stale_version = service_request.id, service_request.version
+client = app.test_client()
+client.put(f'/professional/request/{stale_id}', json={'status': 'accepted'}, headers=headers['professional'])
+response = client.put(f'/customer/request/{stale_id}/close', json={'version': stale_version},
+                      headers=headers['customer'])
+if response.status_code != 409:
+    failures.append((stale_id, [f"close with a stale version answered {response.status_code}"]))
+response = client.put(f'/professional/request/{stale_id}', json={'status': 'requested'},
+                      headers=headers['professional'])
+if response.status_code != 400:
+    failures.append((stale_id, [f"moving back to requested answered {response.status_code}"]))
+
+print(f"{rounds} requests raced by {threads} threads each, final states: {dict(outcomes)}")
+if failures:
+    for request_id, problems in failures:
+        print(f"  request {request_id}: {'; '.join(problems)}")
+    print("❌ Concurrent status changes were not consistent.")
+    sys.exit(1)
+print("✅ Every request ended in one consistent state, losers got 409.")
@@ -0,0 +1,111 @@
+"""
+API documentation
+
+The OpenAPI spec at ``/apispec_1.json`` is written by ``build_apispec.py``
+from the YAML in the route docstrings into ``APISPEC_FILE``, once at build
+time. Web processes read that file on the first request for the spec and
+serve its bytes with an ETag from then on, so no process imports flasgger
+(and jsonschema, yaml and mistune with it) or parses a docstring. Only
+without the file is the spec built from the docstrings by flasgger, on the
+first request for it.
+
+The Swagger UI at ``/apidocs`` is rendered from flasgger's template, also
+without importing flasgger. The routes have the same ``flasgger`` endpoint
+names and URLs as ``Swagger(app)`` registers.
+"""
+import hashlib
+import importlib.metadata
+import importlib.util
+import json
+import os
+from flask import Blueprint, current_app, jsonify, redirect, render_template, request, url_for
+
+SPEC_ENDPOINT = 'apispec_1'
+TITLE = 'Flasgger'  # of the UI page, as Swagger(app) titles it
+
+def _flasgger_ui_dir():
+    # Located without importing flasgger
+    return os.path.join(os.path.dirname(importlib.util.find_spec('flasgger').origin), 'ui3')
+
+def swagger():
+    """The flasgger extension of the current app, created on first use"""
+    extensions = current_app.extensions
+    if 'swagger' not in extensions:
+        from flasgger import Swagger
+        swag = Swagger()
+        # Swagger.init_app would register its own views; only the spec building is needed
+        swag.app = current_app._get_current_object()
+        swag.load_config(current_app)
+        extensions['swagger'] = swag
+    return extensions['swagger']
+
+def apispec():
+    """The OpenAPI spec built from the route docstrings"""
+    return swagger().get_apispecs(SPEC_ENDPOINT)
+
+def dump_apispec(spec):
+    """Serialize a spec the way build_apispec.py writes it, so equal specs give equal bytes"""
+    return json.dumps(spec, indent=1, sort_keys=True, ensure_ascii=False) + '\n'
+
+def apispec_path(app):
+    return os.path.join(app.root_path, app.config['APISPEC_FILE'])
+
+def precompiled_apispec():
+    """The bytes of the built spec and their ETag, read once per process; None if it was not built"""
+    extensions = current_app.extensions
+    if 'apispec' not in extensions:
+        try:
+            with open(apispec_path(current_app), 'rb') as f:
+                data = f.read()
+        except FileNotFoundError:
+            current_app.logger.warning("%s not found, building the API spec from the docstrings; "
+                                       "run build_apispec.py", current_app.config['APISPEC_FILE'])
+            extensions['apispec'] = None
+        else:
+            extensions['apispec'] = (data, hashlib.sha256(data).hexdigest()[:32])
+    return extensions['apispec']
+
+def init_apidocs(app):
+    """Serve the Swagger UI and the OpenAPI spec"""
+    ui_dir = _flasgger_ui_dir()
+    apidocs_bp = Blueprint('flasgger', __name__, template_folder=os.path.join(ui_dir, 'templates'),
+                           static_folder=os.path.join(ui_dir, 'static'), static_url_path='/flasgger_static')
+
+    @apidocs_bp.route('/apidocs/')
+    def apidocs():
+        specs = [{'url': url_for(f'flasgger.{SPEC_ENDPOINT}'), 'title': 'API Spec 1', 'name': None,
+                  'version': '0.0.1', 'endpoint': SPEC_ENDPOINT}]
+        if request.args.get('json'):
+            return jsonify({'specs': specs, 'urls': [], 'title': TITLE})
+        static = lambda filename: url_for('flasgger.static', filename=filename)
+        return render_template(
+            'flasgger/index.html',
+            specs=specs, urls=[], title=TITLE, flasgger_config={'specs': specs}, json=json,
+            flasgger_version=importlib.metadata.version('flasgger'),
+            favicon=static('favicon-32x32.png'),
+            swagger_ui_bundle_js=static('swagger-ui-bundle.js'),
+            swagger_ui_standalone_preset_js=static('swagger-ui-standalone-preset.js'),
+            jquery_js=static('lib/jquery.min.js'),
+            swagger_ui_css=static('swagger-ui.css'),
+        )
+
+    @apidocs_bp.route('/apidocs/index.html')
+    def apidocs_index():
+        return redirect(url_for('flasgger.apidocs'))
+
+    @apidocs_bp.route('/oauth2-redirect.html')
+    def oauth_redirect():
+        return render_template('flasgger/oauth2-redirect.html')
+
+    @apidocs_bp.route(f'/{SPEC_ENDPOINT}.json', endpoint=SPEC_ENDPOINT)
+    def spec():
+        compiled = precompiled_apispec()
+        if compiled is None:
+            return jsonify(apispec())
+        data, etag = compiled
+        response = current_app.response_class(data, mimetype='application/json')
+        response.set_etag(etag)
+        response.cache_control.no_cache = True  # revalidated, a 304 while the deployed spec is unchanged
+        return response.make_conditional(request)
+
+    app.register_blueprint(apidocs_bp)
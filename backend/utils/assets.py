@@ -0,0 +1,44 @@
+"""
+Serving of the built frontend (see build_assets.py)
+
+Built assets have content hashed filenames, so they are cached by browsers
+forever with ``Cache-Control: immutable``. The precompressed .br/.gz sibling
+is sent when the client accepts it, so nothing is compressed per request.
+"""
+import mimetypes
+import os
+from flask import current_app, request, send_from_directory
+
+DIST_DIR = '../frontend/dist'
+ASSETS_DIR = '../frontend/dist/assets'
+
+# (accept-encoding token, file extension) in order of preference
+PRECOMPRESSED = (('br', '.br'), ('gzip', '.gz'))
+
+ONE_YEAR = 365 * 24 * 60 * 60
+
+def frontend_built():
+    """Whether build_assets.py has been run"""
+    return os.path.exists(os.path.join(current_app.root_path, DIST_DIR, 'index.html'))
+
+def send_asset(filename):
+    """Send a hashed asset, preferring a precompressed variant"""
+    directory = os.path.join(current_app.root_path, ASSETS_DIR)
+    mimetype = mimetypes.guess_type(filename)[0]
+    accepted = request.accept_encodings
+
+    for encoding, extension in PRECOMPRESSED:
+        if accepted[encoding] and os.path.isfile(os.path.join(directory, filename + extension)):
+            response = send_from_directory(directory, filename + extension, mimetype=mimetype, max_age=ONE_YEAR)
+            response.headers['Content-Encoding'] = encoding
+            break
+    else:
+        response = send_from_directory(directory, filename, max_age=ONE_YEAR)
+
+    response.vary.add('Accept-Encoding')
+    response.cache_control.immutable = True
+    return response
+
+def send_index():
+    """Send the built index.html, revalidated on every load"""
+    return send_from_directory(os.path.join(current_app.root_path, DIST_DIR), 'index.html')
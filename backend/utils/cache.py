@@ -0,0 +1,88 @@
+"""
+Application cache and per-table data version counters
+
+Every committed write to a table bumps that table's version counter in the
+cache. Responses derived from a set of tables can be validated against the
+current versions without touching the database (see ``utils.http_cache``).
+
+The counters live in the configured cache backend, so they are shared across
+workers with ``RedisCache``. With ``SimpleCache`` they are per process and
+only safe for single process deployments.
+"""
+import time
+from flask import current_app
+from flask_caching import Cache
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from utils.metrics import record_cache
+
+cache = Cache()
+
+VERSION_KEY_PREFIX = 'data-version:'
+
+def _version_key(table):
+    return f'{VERSION_KEY_PREFIX}{table}'
+
+def _table_name(table):
+    return table if isinstance(table, str) else table.__tablename__
+
+def data_versions(*tables):
+    """
+    Return the current version of each table, or None if the cache is unavailable.
+    Missing counters are seeded with the current time so a flushed cache
+    never hands out a version that was already used for older data.
+    """
+    keys = [_version_key(_table_name(table)) for table in tables]
+    try:
+        versions = cache.get_many(*keys)
+        missing = any(version is None for version in versions)
+        record_cache('data_version', not missing)
+        if missing:
+            seed = time.time_ns()
+            for key, version in zip(keys, versions):
+                if version is None:
+                    cache.add(key, seed, timeout=0)
+            versions = cache.get_many(*keys)
+    except Exception as e:
+        current_app.logger.warning("Data version lookup failed: %s", e)
+        return None
+    if any(version is None for version in versions):
+        return None
+    return tuple(versions)
+
+def bump_versions(*tables):
+    """Invalidate everything derived from the given tables"""
+    for table in {_table_name(table) for table in tables}:
+        try:
+            cache.cache.inc(_version_key(table))
+        except Exception as e:
+            current_app.logger.warning("Data version bump failed for %s: %s", table, e)
+
+def _changed_tables(session):
+    return session.info.setdefault('changed_tables', set())
+
+@event.listens_for(Session, 'after_flush')
+def _record_flushed_tables(session, flush_context):
+    changed = _changed_tables(session)
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        table = getattr(obj, '__tablename__', None)
+        if table:
+            changed.add(table)
+
+@event.listens_for(Session, 'do_orm_execute')
+def _record_bulk_statements(orm_execute_state):
+    # Bulk INSERT/UPDATE/DELETE statements bypass the unit of work
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        table = getattr(orm_execute_state.statement, 'table', None)
+        if table is not None:
+            _changed_tables(orm_execute_state.session).add(table.name)
+
+@event.listens_for(Session, 'after_commit')
+def _bump_committed_tables(session):
+    changed = session.info.pop('changed_tables', None)
+    if changed:
+        bump_versions(*changed)
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_rolled_back_tables(session):
+    session.info.pop('changed_tables', None)
@@ -4,16 +4,22 @@ from models import db, CustomerProfile, ServiceRequest, ProfessionalProfile, Ser
 from datetime import datetime as DateTime
 from .email import send_report_email
 from .helpers import generate_report_html
-import requests
+from .export_tasks import register_export_tasks
+from .document_tasks import register_document_tasks
+from .metrics import connect_task_signals
+from config import Config
 from flask import current_app
 
+# Record task durations in workers
+connect_task_signals()
+
 # Initialize Celery
 celery = Celery('tasks')
 
 # Configure Celery
 celery.conf.update(
-    broker_url='redis://localhost:6379/0',
-    result_backend='redis://localhost:6379/0',
+    broker_url=Config.BROKER_URL,
+    result_backend=Config.RESULT_BACKEND,
     task_serializer='json',
     accept_content=['json'],
     result_serializer='json',
@@ -40,6 +46,7 @@ def init_celery(app):
     
     @celery.task(name="tasks.send_daily_reminders")
     def send_daily_reminders():
+        import requests
         pending_requests = (
             ServiceRequest.query.filter_by(service_status='requested')
             .join(ProfessionalProfile, ServiceRequest.professional_id == ProfessionalProfile.user_id)
@@ -59,7 +66,7 @@ def init_celery(app):
                 response = requests.post(chat_hook_url, json=message, timeout=10)
                 response.raise_for_status()
             except requests.RequestException as e:
-                print(f"Failed to send reminder to {professional_name}: {e}")
+                current_app.logger.warning("Failed to send reminder to %s: %s", professional_name, e)
                 continue
         return "Daily reminders sent successfully!"
 
@@ -75,6 +82,8 @@ def init_celery(app):
                 )
         return "Monthly activity reports sent successfully!"
 
+    register_export_tasks(celery)
+    register_document_tasks(celery)
     return celery
 
 def generate_customer_report(customer_id):
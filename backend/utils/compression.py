@@ -0,0 +1,79 @@
+"""
+Response compression
+
+Compresses text responses (JSON, HTML, JS, CSS) with brotli when the client
+accepts it and the ``brotli`` package is installed, otherwise with gzip.
+Responses smaller than ``COMPRESS_MIN_SIZE`` are sent as is.
+"""
+import gzip
+from flask import request
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - depends on the environment
+    brotli = None
+
+COMPRESSIBLE_MIMETYPES = {
+    'application/json',
+    'application/javascript',
+    'text/javascript',
+    'text/css',
+    'text/html',
+    'text/plain',
+}
+
+def _choose_encoding():
+    accepted = request.accept_encodings
+    if brotli is not None and accepted['br']:
+        return 'br'
+    if accepted['gzip']:
+        return 'gzip'
+    return None
+
+def _should_compress(response, config):
+    if response.status_code != 200 or 'Content-Encoding' in response.headers:
+        return False
+    if response.mimetype not in COMPRESSIBLE_MIMETYPES:
+        return False
+    length = response.content_length
+    if length is None and not response.is_sequence and not response.direct_passthrough:
+        # Streamed response of unknown size
+        return False
+    if length is not None and not (config['COMPRESS_MIN_SIZE'] <= length <= config['COMPRESS_MAX_SIZE']):
+        return False
+    return True
+
+def compress_response(response, config):
+    """Compress ``response`` in place if the client and response allow it"""
+    response.vary.add('Accept-Encoding')
+    if not _should_compress(response, config):
+        return response
+
+    encoding = _choose_encoding()
+    if encoding is None:
+        return response
+
+    # File responses are passed through by default, read them to compress
+    response.direct_passthrough = False
+    data = response.get_data()
+    if len(data) < config['COMPRESS_MIN_SIZE']:
+        return response
+
+    if encoding == 'br':
+        compressed = brotli.compress(data, quality=config['COMPRESS_BR_QUALITY'])
+    else:
+        compressed = gzip.compress(data, compresslevel=config['COMPRESS_LEVEL'], mtime=0)
+
+    response.set_data(compressed)
+    response.headers['Content-Encoding'] = encoding
+    # The representation changed, a strong validator of the identity body no longer applies
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(etag, weak=True)
+    return response
+
+def init_compression(app):
+    """Register the compression hook on the app"""
+    @app.after_request
+    def compress(response):
+        return compress_response(response, app.config)
@@ -0,0 +1,212 @@
+"""
+Celery tasks processing uploaded documents
+
+When a professional uploads a document, ``documents.process`` runs in the
+background (on a Celery worker or the local task pool) and records on its
+``Document`` row:
+
+- whether the content matches the file extension, from the magic bytes
+- a PNG preview: a thumbnail of images (needs Pillow) or the first page of
+  PDFs (needs PyMuPDF)
+- the text of PDFs, for the admin professional search (PyMuPDF)
+
+Previews are stored next to the documents by content hash, so the admin
+pages show them without reading the originals. Without Pillow or PyMuPDF
+documents are still validated, only without previews or text. Both are
+imported when the first document is processed, not by the web processes
+that only queue them.
+
+The verdict is for the extension the document was last queued with
+(``expected_type``): the same content uploaded under an extension naming
+another type is checked again.
+
+A document that could not be queued (task queue down), whose task was lost
+(pending for ``DOCUMENT_REQUEUE_AFTER``) or whose processing failed is
+queued again when the same content is uploaded again, and by
+``flask --app app requeue-documents``, which can be run from cron.
+"""
+import importlib
+import io
+import mimetypes
+from datetime import datetime, timedelta
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from sqlalchemy import or_
+from sqlalchemy.exc import IntegrityError
+from models import db, Document, ProfessionalProfile
+from utils.storage import content_key, preview_key, storage
+from utils.tasks import submit_task
+
+# Leading bytes of each accepted type
+SIGNATURES = [
+    (b'%PDF-', 'application/pdf'),
+    (b'\x89PNG\r\n\x1a\n', 'image/png'),
+    (b'\xff\xd8\xff', 'image/jpeg'),
+    (b'GIF87a', 'image/gif'),
+    (b'GIF89a', 'image/gif'),
+]
+
+def optional_module(name):
+    """The module, or None if it is not installed"""
+    try:
+        return importlib.import_module(name)
+    except ImportError:  # pragma: no cover - depends on the environment
+        return None
+
+def detect_type(head):
+    """The mime type the content starts like, or None"""
+    for signature, mime_type in SIGNATURES:
+        if head.startswith(signature):
+            return mime_type
+    return None
+
+def image_preview(Image, data, size):
+    image = Image.open(io.BytesIO(data))
+    image.draft('RGB', (size, size))  # decode JPEGs at a reduced scale
+    image.thumbnail((size, size))
+    if image.mode not in ('RGB', 'RGBA'):
+        image = image.convert('RGBA')
+    output = io.BytesIO()
+    image.save(output, 'PNG', optimize=True)
+    return output.getvalue()
+
+def pdf_preview_and_text(fitz, data, size, text_limit):
+    with fitz.open(stream=data, filetype='pdf') as pdf:
+        preview = None
+        if pdf.page_count:
+            page = pdf[0]
+            zoom = size / max(page.rect.width, page.rect.height)
+            preview = page.get_pixmap(matrix=fitz.Matrix(zoom, zoom)).tobytes('png')
+        text = []
+        length = 0
+        for page in pdf:
+            if length >= text_limit:
+                break
+            page_text = page.get_text()
+            text.append(page_text)
+            length += len(page_text)
+        return preview, ''.join(text)[:text_limit]
+
+def process_document(content_hash, filename):
+    """Validate a stored document and make its preview and text"""
+    document = db.session.get(Document, content_hash)
+    if document is None:
+        document = Document(content_hash=content_hash)
+        db.session.add(document)
+
+    config = current_app.config
+    target = storage()
+    try:
+        with target.open(content_key(content_hash)) as f:
+            data = f.read()
+        document.size = len(data)
+        document.mime_type = detect_type(data[:16])
+        expected = document.expected_type = mimetypes.guess_type(filename)[0]
+        document.has_preview = False
+        document.text = None
+        document.error = None
+        if document.mime_type is None or document.mime_type != expected:
+            document.status = 'invalid'
+            document.error = f"Content is {document.mime_type or 'not an accepted type'}, not {expected}"
+        else:
+            document.status = 'valid'
+            preview = None
+            if document.mime_type == 'application/pdf':
+                fitz = optional_module('fitz')  # PyMuPDF
+                if fitz is not None:
+                    preview, document.text = pdf_preview_and_text(fitz, data, config['DOCUMENT_PREVIEW_SIZE'],
+                                                                  config['DOCUMENT_TEXT_LIMIT'])
+            else:
+                Image = optional_module('PIL.Image')
+                if Image is not None:
+                    preview = image_preview(Image, data, config['DOCUMENT_PREVIEW_SIZE'])
+            if preview:
+                target.write(preview_key(content_hash), preview)
+                document.has_preview = True
+    except Exception as e:
+        current_app.logger.exception("Processing document %s failed", content_hash)
+        document.status = 'failed'
+        document.error = str(e)[:200]
+    document.processed_at = datetime.utcnow()
+    db.session.commit()
+    return {"status": document.status, "content_hash": content_hash, "has_preview": document.has_preview}
+
+def _stuck():
+    """Filter of the documents to queue again: failed, or pending and not queued recently"""
+    queued_before = datetime.utcnow() - timedelta(seconds=current_app.config['DOCUMENT_REQUEUE_AFTER'])
+    return or_(
+        Document.status == 'failed',
+        (Document.status == 'pending') & (Document.queued_at.is_(None) | (Document.queued_at < queued_before)),
+    )
+
+def _submit(document, filename):
+    """
+    Mark the document queued and queue its processing; returns whether it was
+    queued. It is marked first, as the task may finish before submit_task returns.
+    """
+    document.status = 'pending'
+    document.expected_type = mimetypes.guess_type(filename)[0]
+    document.queued_at = datetime.utcnow()
+    db.session.commit()
+    try:
+        submit_task('documents.process', document.content_hash, filename)
+    except Exception as e:
+        # The upload itself must not fail because the task queue is down; queued again later
+        current_app.logger.warning("Could not queue processing of document %s: %s", document.content_hash, e)
+        document.queued_at = None
+        db.session.commit()
+        return False
+    return True
+
+def queue_document(content_hash, filename):
+    """
+    Process a newly stored document in the background, unless the same
+    content was processed before or is queued already, for the same type
+    """
+    document = db.session.get(Document, content_hash)
+    if document is None:
+        document = Document(content_hash=content_hash)
+        try:
+            db.session.add(document)
+            db.session.commit()
+        except IntegrityError:
+            db.session.rollback()  # the same content was just uploaded by someone else
+            return
+    elif (document.expected_type == mimetypes.guess_type(filename)[0]
+          and not db.session.query(Document.content_hash).filter(Document.content_hash == content_hash, _stuck()).first()):
+        return
+    _submit(document, filename)
+
+def requeue_documents():
+    """Queue the stuck documents again, with the filename of a profile they were uploaded for"""
+    filenames = dict(
+        db.session.query(Document.content_hash, db.func.max(ProfessionalProfile.filename))
+        .join(ProfessionalProfile, ProfessionalProfile.content_hash == Document.content_hash)
+        .filter(_stuck())
+        .group_by(Document.content_hash)
+        .all()
+    )
+    queued = 0
+    for content_hash, filename in filenames.items():
+        queued += _submit(db.session.get(Document, content_hash), filename)
+    return queued, len(filenames)
+
+def init_documents(app):
+    """Add the ``flask requeue-documents`` command"""
+    @click.command('requeue-documents')
+    @with_appcontext
+    def requeue_documents_command():
+        """Queue the documents whose processing failed or was lost again"""
+        queued, stuck = requeue_documents()
+        click.echo(f'{queued} of {stuck} stuck documents queued.')
+
+    app.cli.add_command(requeue_documents_command)
+
+def register_document_tasks(celery_app):
+    """
+    Register document processing tasks with the Celery app
+    """
+    @celery_app.task(name="documents.process")
+    def process(content_hash, filename):
+        return process_document(content_hash, filename)
@@ -0,0 +1,62 @@
+"""
+File downloads
+
+Documents and reports are sent with ``send_download``, which answers
+conditional requests (``If-None-Match``, ``If-Modified-Since``) with 304 and
+``Range`` requests with 206, so interrupted downloads resume instead of
+starting over.
+
+``DOWNLOAD_OFFLOAD`` hands the transfer to the web server so the worker is
+free as soon as the response headers are written:
+
+- ``'x-accel-redirect'``: nginx serves the file from the internal location
+  in ``DOWNLOAD_ACCEL_LOCATIONS``, e.g.::
+
+      location /protected/uploads/ { internal; alias /srv/app/backend/uploads/; }
+      location /protected/reports/ { internal; alias /srv/app/backend/reports/; }
+
+- ``'x-sendfile'``: Apache (mod_xsendfile) or lighttpd serve the absolute path.
+
+Without offloading the file is passed to the WSGI server's
+``wsgi.file_wrapper``, which gunicorn sends with ``sendfile(2)`` without
+copying it through Python.
+"""
+import mimetypes
+import os
+from urllib.parse import quote
+from flask import current_app, send_file
+from werkzeug.exceptions import NotFound
+from werkzeug.security import safe_join
+
+def _accel_redirect(location, filename, download_name, as_attachment):
+    response = current_app.response_class(
+        mimetype=mimetypes.guess_type(download_name)[0] or 'application/octet-stream'
+    )
+    response.headers['X-Accel-Redirect'] = location.rstrip('/') + '/' + quote(filename)
+    if as_attachment:
+        response.headers.set('Content-Disposition', 'attachment', filename=download_name)
+    return response
+
+def send_download(directory, filename, location, download_name=None, etag=True, max_age=None, as_attachment=True):
+    """
+    Send ``filename`` from ``directory``, as an attachment unless
+    ``as_attachment`` is false. ``location`` names the directory's entry in
+    ``DOWNLOAD_ACCEL_LOCATIONS``. ``etag`` may be a precomputed tag, e.g. the
+    content hash; a ``max_age`` is cached privately as the downloads need a token.
+    """
+    path = safe_join(directory, filename)
+    if path is None or not os.path.isfile(path):
+        raise NotFound()
+    download_name = download_name or os.path.basename(path)
+
+    if current_app.config['DOWNLOAD_OFFLOAD'] == 'x-accel-redirect':
+        return _accel_redirect(current_app.config['DOWNLOAD_ACCEL_LOCATIONS'][location], filename, download_name,
+                               as_attachment)
+
+    # X-Sendfile is added by send_file itself when USE_X_SENDFILE is set
+    response = send_file(path, as_attachment=as_attachment, download_name=download_name, etag=etag, max_age=max_age)
+    response.accept_ranges = 'bytes'  # werkzeug only sets it on range responses
+    if max_age:
+        response.cache_control.public = False
+        response.cache_control.private = True
+    return response
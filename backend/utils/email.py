@@ -17,7 +17,7 @@ def send_email(subject, recipients, body=None, html=None):
         current_app.extensions['mail'].send(msg)
         return True
     except Exception as e:
-        print(f"Error sending email: {e}")
+        current_app.logger.exception("Error sending email")
         return False
 
 def send_report_email(recipient, report_data, month=None):
@@ -6,12 +6,22 @@ import csv
 from datetime import datetime
 from models import db, ServiceRequest, ProfessionalProfile, CustomerProfile, User, Service
 from sqlalchemy import func, and_, desc
+from utils.metrics import record_export
 
 # Constants
 REPORTS_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'reports')
 if not os.path.exists(REPORTS_DIR):
     os.makedirs(REPORTS_DIR)
 
+def first_profiles(model):
+    """
+    Subquery of one profile per user, their first, with ``user_id`` and
+    ``full_name``. A user may have more than one profile row, and joining the
+    profile table directly would repeat their requests in the export.
+    """
+    first_ids = db.session.query(func.min(model.id)).group_by(model.user_id)
+    return db.session.query(model.user_id, model.full_name).filter(model.id.in_(first_ids)).subquery()
+
 def register_export_tasks(celery_app):
     """
     Register export-related Celery tasks with the Celery app
@@ -35,10 +45,16 @@ def register_export_tasks(celery_app):
         filename = f'professional_{professional_id}_{timestamp}.csv'
         filepath = os.path.join(REPORTS_DIR, filename)
         
-        # Get service requests for the professional
-        requests = ServiceRequest.query.filter_by(professional_id=professional_id).order_by(
-            desc(ServiceRequest.date_of_request)
-        ).all()
+        # Get service requests for the professional, with service and customer names in the same query
+        customers = first_profiles(CustomerProfile)
+        requests = (
+            db.session.query(ServiceRequest, Service.name, customers.c.full_name)
+            .outerjoin(Service, Service.id == ServiceRequest.service_id)
+            .outerjoin(customers, customers.c.user_id == ServiceRequest.customer_id)
+            .filter(ServiceRequest.professional_id == professional_id)
+            .order_by(desc(ServiceRequest.date_of_request))
+            .all()
+        )
         
         # Get service types provided by professional
         service_types = professional.service_type.split(',') if professional.service_type else []
@@ -62,7 +78,7 @@ def register_export_tasks(celery_app):
             
             # Write service request statistics
             total_requests = len(requests)
-            completed_requests = sum(1 for req in requests if req.service_status == 'completed')
+            completed_requests = sum(1 for req, _, _ in requests if req.service_status == 'completed')
             accepted_rate = (completed_requests / total_requests * 100) if total_requests > 0 else 0
             
             writer.writerow(['Service Request Statistics'])
@@ -75,19 +91,17 @@ def register_export_tasks(celery_app):
             writer.writerow(['Service Requests'])
             writer.writerow(['Request ID', 'Service', 'Customer', 'Status', 'Request Date', 'Completion Date', 'Remarks'])
             
-            for req in requests:
-                service = Service.query.get(req.service_id)
-                customer = CustomerProfile.query.filter_by(user_id=req.customer_id).first()
-                
+            for req, service_name, customer_name in requests:
                 writer.writerow([
                     req.id,
-                    service.name if service else 'Unknown Service',
-                    customer.full_name if customer else 'Unknown Customer',
+                    service_name or 'Unknown Service',
+                    customer_name or 'Unknown Customer',
                     req.service_status,
                     req.date_of_request.strftime('%Y-%m-%d') if req.date_of_request else 'Unknown',
                     req.date_of_completion.strftime('%Y-%m-%d') if req.date_of_completion else 'N/A',
                     req.remarks or 'No remarks'
                 ])
+        record_export('service_professional', len(requests))
                 
         return {
             "status": "success", 
@@ -107,8 +121,15 @@ def register_export_tasks(celery_app):
             - date_from: Filter requests after this date
             - date_to: Filter requests before this date
         """
-        # Build query with filters
-        query = ServiceRequest.query
+        # Build query with filters, joining the names shown in the export
+        professionals = first_profiles(ProfessionalProfile)
+        customers = first_profiles(CustomerProfile)
+        query = (
+            db.session.query(ServiceRequest, Service.name, professionals.c.full_name, customers.c.full_name)
+            .outerjoin(Service, Service.id == ServiceRequest.service_id)
+            .outerjoin(professionals, professionals.c.user_id == ServiceRequest.professional_id)
+            .outerjoin(customers, customers.c.user_id == ServiceRequest.customer_id)
+        )
         
         if filters:
             if 'status' in filters and filters['status']:
@@ -160,22 +181,19 @@ def register_export_tasks(celery_app):
             writer.writerow(['Request ID', 'Service', 'Professional', 'Customer', 'Status', 
                              'Request Date', 'Accept/Reject Date', 'Completion Date', 'Remarks'])
             
-            for req in requests:
-                service = Service.query.get(req.service_id)
-                professional = ProfessionalProfile.query.filter_by(user_id=req.professional_id).first()
-                customer = CustomerProfile.query.filter_by(user_id=req.customer_id).first()
-                
+            for req, service_name, professional_name, customer_name in requests:
                 writer.writerow([
                     req.id,
-                    service.name if service else 'Unknown Service',
-                    professional.full_name if professional else 'Not Assigned',
-                    customer.full_name if customer else 'Unknown Customer',
+                    service_name or 'Unknown Service',
+                    professional_name or 'Not Assigned',
+                    customer_name or 'Unknown Customer',
                     req.service_status,
                     req.date_of_request.strftime('%Y-%m-%d') if req.date_of_request else 'Unknown',
                     req.date_of_accept_reject.strftime('%Y-%m-%d') if req.date_of_accept_reject else 'N/A',
                     req.date_of_completion.strftime('%Y-%m-%d') if req.date_of_completion else 'N/A',
                     req.remarks or 'No remarks'
                 ])
+        record_export('service_requests', len(requests))
                 
         return {
             "status": "success", 
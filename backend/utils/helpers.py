@@ -1,36 +1,23 @@
-from flask import current_app
-import os
-from werkzeug.utils import secure_filename
+from flask import request
 from datetime import datetime
 
+def requested_fields():
+    """
+    Parse the ``fields`` query parameter (e.g. ``?fields=id,name,service_status``)
+    Returns a set of field names, or None if no projection was requested.
+    Each model keeps only the names that are its own columns, or only its
+    primary key if none are, see ``SerializerMixin.select_fields``.
+    """
+    fields = request.args.get('fields', '')
+    names = {name.strip() for name in fields.split(',') if name.strip()}
+    return names or None
+
 def format_datetime(dt):
     """Format datetime object to string"""
     if dt is None:
         return None
     return dt.strftime('%Y-%m-%d %H:%M:%S')
 
-def save_file(file, directory=None):
-    """
-    Save a file to the specified directory
-    Returns the filename if successful, None if failed
-    """
-    if file and file.filename:
-        filename = secure_filename(file.filename)
-        upload_dir = directory or current_app.config['UPLOAD_FOLDER']
-        
-        # Create directory if it doesn't exist
-        if not os.path.exists(upload_dir):
-            os.makedirs(upload_dir)
-            
-        try:
-            file_path = os.path.join(upload_dir, filename)
-            file.save(file_path)
-            return filename
-        except Exception as e:
-            print(f"Error saving file: {e}")
-            return None
-    return None
-
 def generate_report_html(report_data):
     """
     Generate HTML content for reports
@@ -0,0 +1,52 @@
+"""
+Conditional GET support for API list endpoints
+
+The ETag of a response is derived from the request (path, query string and
+user) and the data version counters of the tables it reads. Repeat polls
+with a matching ``If-None-Match`` get a ``304 Not Modified`` before the view
+runs, so no query or serialization is done.
+"""
+import hashlib
+from functools import wraps
+from flask import current_app, request
+from flask_jwt_extended import get_jwt
+from utils.cache import data_versions
+from utils.metrics import record_cache
+
+def _compute_etag(versions):
+    claims = get_jwt() or {}
+    key = f"{request.method}:{request.full_path}:{claims.get('sub')}:{versions}"
+    return hashlib.sha1(key.encode('utf-8')).hexdigest()
+
+def etag_cached(*models):
+    """
+    Decorator adding a strong ETag to a GET endpoint whose response only
+    depends on the given models, the request arguments and the current user.
+    Must be applied after ``jwt_required`` so the user is known.
+    """
+    def wrapper(fn):
+        @wraps(fn)
+        def decorator(*args, **kwargs):
+            if not current_app.config.get('DATA_VERSION_ETAGS', True):
+                return fn(*args, **kwargs)
+
+            versions = data_versions(*models)
+            if versions is None:
+                # Cache unavailable, serve without validators
+                return fn(*args, **kwargs)
+
+            etag = _compute_etag(versions)
+            hit = request.if_none_match.contains_weak(etag)
+            record_cache('etag', hit)
+            if hit:
+                response = current_app.response_class(status=304)
+            else:
+                response = current_app.make_response(fn(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+            response.set_etag(etag)
+            response.cache_control.private = True
+            response.cache_control.no_cache = True
+            return response
+        return decorator
+    return wrapper
@@ -0,0 +1,86 @@
+"""
+JSON provider built on orjson, falling back to the standard library
+when orjson is not installed.
+
+Datetimes are serialized as ISO-8601. Naive datetimes are stored in UTC
+by the application and are emitted with a ``+00:00`` offset.
+"""
+import dataclasses
+import decimal
+import json
+import uuid
+from datetime import date, datetime
+
+from flask.json.provider import DefaultJSONProvider
+from sqlalchemy.engine import Row
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - depends on the environment
+    orjson = None
+
+def _default(obj):
+    """Serialize the types neither encoder handles natively"""
+    if isinstance(obj, Row):
+        return obj._asdict()
+    if hasattr(obj, 'as_dict'):
+        return obj.as_dict()
+    if isinstance(obj, decimal.Decimal):
+        return str(obj)
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+def _stdlib_default(obj):
+    """Fallback encoder mirroring the orjson output for the standard library"""
+    if isinstance(obj, datetime):
+        if obj.tzinfo is None:
+            return obj.isoformat() + '+00:00'
+        return obj.isoformat()
+    if isinstance(obj, date):
+        return obj.isoformat()
+    if isinstance(obj, uuid.UUID):
+        return str(obj)
+    if dataclasses.is_dataclass(obj) and not isinstance(obj, type):
+        return dataclasses.asdict(obj)
+    return _default(obj)
+
+class FastJSONProvider(DefaultJSONProvider):
+    """
+    Flask JSON provider that encodes responses with orjson.
+    Install it with ``app.json = FastJSONProvider(app)``.
+    """
+    # Sorting keys costs time on every response and the frontend does not rely on it
+    sort_keys = False
+
+    def _orjson_option(self):
+        option = orjson.OPT_NON_STR_KEYS | orjson.OPT_NAIVE_UTC
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        if self.compact is False or (self.compact is None and self._app.debug):
+            option |= orjson.OPT_INDENT_2
+        return option
+
+    def dumps_bytes(self, obj):
+        """Serialize ``obj`` to newline terminated, UTF-8 encoded JSON bytes"""
+        if orjson is not None:
+            option = self._orjson_option() | orjson.OPT_APPEND_NEWLINE
+            return orjson.dumps(obj, default=_default, option=option)
+        return (self.dumps(obj) + '\n').encode('utf-8')
+
+    def dumps(self, obj, **kwargs):
+        if orjson is not None and not kwargs:
+            return orjson.dumps(obj, default=_default, option=self._orjson_option()).decode('utf-8')
+        kwargs.setdefault('default', _stdlib_default)
+        kwargs.setdefault('ensure_ascii', self.ensure_ascii)
+        kwargs.setdefault('sort_keys', self.sort_keys)
+        return json.dumps(obj, **kwargs)
+
+    def loads(self, s, **kwargs):
+        if orjson is not None and not kwargs:
+            return orjson.loads(s)
+        return json.loads(s, **kwargs)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(self.dumps_bytes(obj), mimetype=self.mimetype)
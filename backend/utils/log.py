@@ -0,0 +1,107 @@
+"""
+Structured, asynchronous logging
+
+Log records are written as JSON lines. Request threads only put records on
+an in-memory queue (``QueueHandler``); a ``QueueListener`` thread formats and
+writes them, so no stdout I/O happens while a request is handled.
+
+Messages use %-style arguments (``logger.debug("found %d", n)``) so they are
+only formatted when the level is enabled; disabled debug calls return after
+a cached level check.
+"""
+import atexit
+import datetime
+import json
+import logging
+import os
+import queue
+import sys
+import traceback
+from logging.handlers import QueueHandler, QueueListener
+from flask import has_request_context, request
+from flask.logging import default_handler
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - depends on the environment
+    orjson = None
+
+# LogRecord attributes that are not user supplied ``extra`` fields
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord('', 0, '', 0, '', None, None))) | {'message', 'asctime'}
+
+def _stdlib_default(value):
+    # Dates as orjson writes them, anything else as its str()
+    if isinstance(value, (datetime.date, datetime.time)):
+        return value.isoformat()
+    return str(value)
+
+class JSONFormatter(logging.Formatter):
+    """Formats a record as one JSON object per line"""
+
+    def format(self, record):
+        entry = {
+            'time': '%s.%03d' % (self.formatTime(record, '%Y-%m-%dT%H:%M:%S'), record.msecs),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES:
+                entry[key] = value
+        if record.exc_text:
+            entry['exception'] = record.exc_text
+        elif record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        if orjson is None:
+            return json.dumps(entry, default=_stdlib_default, ensure_ascii=False, separators=(',', ':'))
+        return orjson.dumps(entry, default=str).decode('utf-8')
+
+class _RequestQueueHandler(QueueHandler):
+    """
+    Queues records with their message and traceback rendered and the request
+    they were logged in, leaving the JSON encoding and the write to the listener
+    """
+
+    def prepare(self, record):
+        record = logging.makeLogRecord(vars(record))
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = ''.join(traceback.format_exception(*record.exc_info)).rstrip()
+            record.exc_info = None
+        if has_request_context() and not hasattr(record, 'path'):
+            record.method = request.method
+            record.path = request.path
+        return record
+
+_listener = None
+
+def _restart_listener():
+    # The listener thread does not survive a fork (gunicorn --preload)
+    if _listener is not None:
+        _listener._thread = None
+        _listener.start()
+
+def init_logging(app):
+    """Route all logging through a queue to a JSON lines handler on stdout"""
+    global _listener
+    level = app.config['LOG_LEVEL']
+    root = logging.getLogger()
+    root.setLevel(level)
+    app.logger.removeHandler(default_handler)
+    app.logger.setLevel(level)
+
+    if _listener is not None:
+        # Already set up by an earlier create_app()
+        return
+
+    stream_handler = logging.StreamHandler(sys.stdout)
+    stream_handler.setFormatter(JSONFormatter())
+    log_queue = queue.SimpleQueue()
+    root.handlers = [_RequestQueueHandler(log_queue)]
+
+    _listener = QueueListener(log_queue, stream_handler, respect_handler_level=True)
+    _listener.start()
+    atexit.register(_listener.stop)
+    if hasattr(os, 'register_at_fork'):
+        os.register_at_fork(after_in_child=_restart_listener)
@@ -0,0 +1,180 @@
+"""
+Prometheus metrics
+
+Request latency and status counts, database pool usage, cache hits, rate
+limited requests, background task durations (Celery or the local task pools)
+and export throughput are recorded with prometheus_client and exposed at
+``/metrics``.
+
+With several gunicorn workers (and Celery workers) every process keeps its
+own counters. Set the ``PROMETHEUS_MULTIPROC_DIR`` environment variable to
+an empty, shared directory before the processes start: the counters are then
+written to memory mapped files there and ``/metrics`` aggregates all of them.
+Call ``mark_worker_dead`` from gunicorn's ``child_exit`` hook so the gauges
+of exited workers are dropped.
+"""
+import os
+import time
+from flask import Response, current_app, g, request
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge, Histogram, generate_latest, multiprocess
+)
+from prometheus_client.core import GaugeMetricFamily
+from sqlalchemy import event
+
+MULTIPROC_DIR = os.environ.get('PROMETHEUS_MULTIPROC_DIR')
+
+HTTP_REQUEST_DURATION = Histogram(
+    'http_request_duration_seconds', 'HTTP request latency', ['method', 'endpoint'],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+)
+HTTP_REQUESTS = Counter(
+    'http_requests_total', 'HTTP requests by status', ['method', 'endpoint', 'status']
+)
+DB_POOL_CONNECTIONS = Gauge(
+    'db_pool_connections', 'Database connections held by the pool', ['state'],
+    multiprocess_mode='livesum'
+)
+CACHE_REQUESTS = Counter(
+    'cache_requests_total', 'Cache lookups by result', ['cache', 'result']
+)
+CELERY_TASK_DURATION = Histogram(
+    'celery_task_duration_seconds', 'Background task run time', ['task'],
+    buckets=(0.1, 0.5, 1, 5, 10, 30, 60, 300, 900)
+)
+CELERY_TASKS = Counter(
+    'celery_tasks_total', 'Background tasks by final state', ['task', 'state']
+)
+RATE_LIMITED = Counter(
+    'rate_limited_requests_total', 'Requests refused by the rate limiter', ['endpoint', 'key']
+)
+EXPORT_ROWS = Counter(
+    'export_rows_total', 'Rows written to CSV exports', ['export']
+)
+
+def record_cache(cache, hit):
+    CACHE_REQUESTS.labels(cache, 'hit' if hit else 'miss').inc()
+
+def record_task(task, state, duration=None):
+    """A finished background task, from a Celery worker or the local task pools"""
+    if duration is not None:
+        CELERY_TASK_DURATION.labels(task).observe(duration)
+    CELERY_TASKS.labels(task, state).inc()
+
+def record_rate_limited(endpoint, key):
+    RATE_LIMITED.labels(endpoint, key).inc()
+
+def record_export(export, rows):
+    EXPORT_ROWS.labels(export).inc(rows)
+
+def mark_worker_dead(pid):
+    """gunicorn ``child_exit`` hook: drop the live gauges of an exited worker"""
+    if MULTIPROC_DIR:
+        multiprocess.mark_process_dead(pid)
+
+# Requests
+
+def _start_timer():
+    g.metrics_started = time.perf_counter()
+
+def _record_request(response):
+    started = g.pop('metrics_started', None)
+    if started is None:
+        return response
+    # The URL rule rather than the path keeps the number of label values bounded
+    endpoint = request.url_rule.rule if request.url_rule else 'unmatched'
+    HTTP_REQUEST_DURATION.labels(request.method, endpoint).observe(time.perf_counter() - started)
+    HTTP_REQUESTS.labels(request.method, endpoint, response.status_code).inc()
+    return response
+
+# Database pool
+
+def _instrument_pool(engine):
+    open_connections = DB_POOL_CONNECTIONS.labels('open')
+    checked_out = DB_POOL_CONNECTIONS.labels('checked_out')
+    event.listen(engine, 'connect', lambda *args: open_connections.inc())
+    event.listen(engine, 'close', lambda *args: open_connections.dec())
+    event.listen(engine, 'close_detached', lambda *args: open_connections.dec())
+    event.listen(engine, 'checkout', lambda *args: checked_out.inc())
+    event.listen(engine, 'checkin', lambda *args: checked_out.dec())
+
+# Celery, recorded in the worker processes; postrun is also sent for failed tasks
+
+_task_started = {}
+
+def _task_prerun(task_id=None, task=None, **kwargs):
+    _task_started[task_id] = time.perf_counter()
+
+def _task_postrun(task_id=None, task=None, state=None, **kwargs):
+    started = _task_started.pop(task_id, None)
+    duration = time.perf_counter() - started if started is not None else None
+    record_task(task.name, state or 'UNKNOWN', duration)
+
+def connect_task_signals():
+    """Record the Celery task durations, from utils/celery_tasks.py so web processes need not import Celery"""
+    from celery.signals import task_postrun, task_prerun
+    task_prerun.connect(_task_prerun)
+    task_postrun.connect(_task_postrun)
+
+class QueueDepthCollector:
+    """Reads the length of the Celery queues from the Redis broker at scrape time"""
+
+    def __init__(self, broker_url, queues):
+        self.broker_url = broker_url
+        self.queues = queues
+        self._client = None
+
+    def collect(self):
+        gauge = GaugeMetricFamily('celery_queue_length', 'Tasks waiting in the broker queue', labels=['queue'])
+        try:
+            if self._client is None:
+                import redis
+                self._client = redis.Redis.from_url(self.broker_url, socket_timeout=0.5, socket_connect_timeout=0.5)
+            pipe = self._client.pipeline()
+            for queue in self.queues:
+                pipe.llen(queue)
+            for queue, length in zip(self.queues, pipe.execute()):
+                gauge.add_metric([queue], length)
+        except Exception as e:
+            current_app.logger.warning("Celery queue length lookup failed: %s", e)
+            return
+        yield gauge
+
+# Endpoint
+
+def metrics():
+    """
+    Prometheus metrics
+    ---
+    tags:
+      - Monitoring
+    responses:
+      200:
+        description: Metrics in the Prometheus text format
+    """
+    if MULTIPROC_DIR:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    output = generate_latest(registry)
+    queue_collector = current_app.extensions.get('queue_depth_collector')
+    if queue_collector is not None:
+        queue_registry = CollectorRegistry()
+        queue_registry.register(queue_collector)
+        output += generate_latest(queue_registry)
+    return Response(output, content_type=CONTENT_TYPE_LATEST)
+
+def init_metrics(app, db):
+    """Register the request hooks, pool listeners and the /metrics endpoint"""
+    if not app.config['METRICS_ENABLED']:
+        return
+    app.before_request(_start_timer)
+    app.after_request(_record_request)
+    with app.app_context():
+        _instrument_pool(db.engine)
+    if app.config['METRICS_CELERY_QUEUES'] and app.config['TASK_BACKEND'] == 'celery':
+        app.extensions['queue_depth_collector'] = QueueDepthCollector(
+            app.config['BROKER_URL'], app.config['METRICS_CELERY_QUEUES']
+        )
+    app.add_url_rule('/metrics', 'metrics', metrics)
@@ -0,0 +1,154 @@
+"""
+Password hashing off the request threads
+
+scrypt/pbkdf2 hashing is deliberately slow and CPU bound. Hashing and
+verification run in a dedicated process pool of ``PASSWORD_HASH_WORKERS``
+processes, so a burst of logins is queued there instead of pinning the CPU of
+every web worker. At most ``PASSWORD_HASH_QUEUE_LIMIT`` hashes may be waiting
+or running per web process; beyond that the request is answered with 503 and
+``Retry-After`` rather than piling up. A hash that times out keeps its place
+in the queue until the pool has finished it. ``PASSWORD_HASH_WORKERS = 0``
+hashes inline on the request thread.
+
+The pool is shut down when the web process exits, also on SIGTERM unless the
+server installed its own handler (gunicorn exits normally on it); pool
+processes whose parent was killed outright exit on their own.
+
+New hashes use ``PASSWORD_HASH_METHOD`` (werkzeug's ``method`` argument,
+e.g. ``scrypt:32768:8:1`` or ``pbkdf2:sha256:600000``). A stored hash made
+with other parameters is replaced on the next successful login.
+"""
+import atexit
+import functools
+import multiprocessing
+import os
+import signal
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from flask import current_app, jsonify
+from werkzeug.security import check_password_hash, generate_password_hash
+
+class HasherBusy(Exception):
+    """The hashing queue is full"""
+
+@functools.lru_cache(maxsize=None)
+def _method_prefix(method):
+    # werkzeug spells out the defaults in the stored hash, e.g. 'scrypt' -> 'scrypt:32768:8:1'
+    return generate_password_hash('', method).split('$', 1)[0]
+
+def _hash(password, method):
+    return generate_password_hash(password, method)
+
+def _verify(stored_hash, password, method, prefix):
+    """Check the password; also return a new hash when ``stored_hash`` does not start with ``prefix``"""
+    if not check_password_hash(stored_hash, password):
+        return False, None
+    if stored_hash.split('$', 1)[0] != prefix:
+        return True, generate_password_hash(password, method)
+    return True, None
+
+def _exit_with_parent(parent_pid):
+    # Pool initializer: a forked pool process shares the call queue's write end
+    # with its parent, so it never sees EOF when the parent is killed
+    def watch():
+        while os.getppid() == parent_pid:
+            time.sleep(1)
+        os._exit(0)
+    threading.Thread(target=watch, daemon=True).start()
+
+def _exit_on_sigterm(signum, frame):
+    # Unwinds the server loop so the atexit handlers run
+    raise SystemExit(128 + signum)
+
+class PasswordHasher:
+    def __init__(self, method, workers, queue_limit, timeout):
+        self.method = method
+        self.workers = workers
+        self.queue_limit = queue_limit
+        self.timeout = timeout
+        self._executor = None
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._prefix = None
+
+    def _pool(self):
+        # Started on first use, after any fork of the web workers
+        if self._executor is None:
+            # Forked workers only need werkzeug, spawned ones would re-import the app module
+            methods = multiprocessing.get_all_start_methods()
+            context = multiprocessing.get_context('fork' if 'fork' in methods else None)
+            self._executor = ProcessPoolExecutor(self.workers, mp_context=context,
+                                                 initializer=_exit_with_parent, initargs=(os.getpid(),))
+            atexit.register(self.shutdown)
+        return self._executor
+
+    def shutdown(self):
+        """Stop the pool processes, cancelling the hashes that have not started"""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def _release(self, future):
+        with self._lock:
+            self._pending -= 1
+
+    def _call(self, fn, *args):
+        if not self.workers:
+            return fn(*args)
+        with self._lock:
+            if self._pending >= self.queue_limit:
+                raise HasherBusy()
+            self._pending += 1
+            pool = self._pool()
+        try:
+            future = pool.submit(fn, *args)
+        except BaseException:
+            self._release(None)
+            raise
+        # The slot is freed when the pool is done with the job, not when the request gives up on it
+        future.add_done_callback(self._release)
+        try:
+            return future.result(self.timeout)
+        except FutureTimeoutError:
+            future.cancel()  # only possible while it waits, a running hash keeps its slot
+            raise HasherBusy()
+
+    def method_prefix(self):
+        """The parameters ``method`` is stored with; needs one hash, computed once per web process"""
+        if self._prefix is None:
+            self._prefix = self._call(_method_prefix, self.method)
+        return self._prefix
+
+    def hash(self, password):
+        return self._call(_hash, password, self.method)
+
+    def verify(self, stored_hash, password):
+        """Return ``(valid, new_hash)``, ``new_hash`` being set when the stored hash should be replaced"""
+        return self._call(_verify, stored_hash, password, self.method, self.method_prefix())
+
+def hash_password(password):
+    return current_app.extensions['password_hasher'].hash(password)
+
+def verify_password(stored_hash, password):
+    return current_app.extensions['password_hasher'].verify(stored_hash, password)
+
+def _busy(e):
+    response = jsonify({"category": "danger", "message": "Too many logins at the moment, please try again"})
+    response.headers['Retry-After'] = '1'
+    return response, 503
+
+def init_passwords(app):
+    """Set up the password hasher and the 503 answer when its queue is full"""
+    app.extensions['password_hasher'] = PasswordHasher(
+        app.config['PASSWORD_HASH_METHOD'],
+        app.config['PASSWORD_HASH_WORKERS'],
+        app.config['PASSWORD_HASH_QUEUE_LIMIT'],
+        app.config['PASSWORD_HASH_TIMEOUT'],
+    )
+    app.register_error_handler(HasherBusy, _busy)
+    if (app.config['PASSWORD_HASH_WORKERS'] and threading.current_thread() is threading.main_thread()
+            and signal.getsignal(signal.SIGTERM) == signal.SIG_DFL):
+        signal.signal(signal.SIGTERM, _exit_on_sigterm)
@@ -0,0 +1,166 @@
+"""
+On-demand request profiling
+
+A request is profiled when an admin sends the ``X-Profile: 1`` header or the
+``_profile=1`` query argument, or when it is picked by 1-in-N sampling
+(``PROFILE_SAMPLE_RATE``). The profile is kept with the route and timing in
+a bounded in-memory ring buffer, listed and downloaded through
+``/admin/profiles``. Requests that are not profiled only pay for the header
+and argument lookups.
+
+cProfile is used by default, pyinstrument when ``PROFILER = 'pyinstrument'``
+and the package is installed. The buffer is per process.
+"""
+import cProfile
+import io
+import itertools
+import marshal
+import pstats
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from flask import current_app, g, request
+from flask_jwt_extended import get_jwt, verify_jwt_in_request
+from models import db, User
+
+try:
+    from pyinstrument import Profiler as InstrumentProfiler
+except ImportError:
+    InstrumentProfiler = None
+
+PROFILE_HEADER = 'X-Profile'
+PROFILE_ARG = '_profile'
+
+class ProfileStore:
+    """Ring buffer of the most recent profiles"""
+
+    def __init__(self, size):
+        self._profiles = deque(maxlen=size)
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def add(self, profile):
+        """Store the profile and return the id it was given"""
+        with self._lock:
+            profile['id'] = next(self._ids)
+            self._profiles.append(profile)
+            return profile['id']
+
+    def list(self):
+        with self._lock:
+            return [{k: v for k, v in profile.items() if k != 'data'} for profile in reversed(self._profiles)]
+
+    def get(self, profile_id):
+        with self._lock:
+            for profile in self._profiles:
+                if profile['id'] == profile_id:
+                    return profile
+        return None
+
+def profile_store():
+    return current_app.extensions['profiles']
+
+def pstats_text(profile, limit=50):
+    """Render a cProfile profile as a pstats report sorted by cumulative time"""
+    output = io.StringIO()
+    stats = pstats.Stats(_MarshalledStats(profile['data']), stream=output)
+    stats.sort_stats('cumulative').print_stats(limit)
+    return output.getvalue()
+
+class _MarshalledStats:
+    """Adapter giving pstats.Stats the ``create_stats``/``stats`` interface of a profiler"""
+
+    def __init__(self, data):
+        self.stats = marshal.loads(data)
+
+    def create_stats(self):
+        pass
+
+def _is_admin():
+    try:
+        verify_jwt_in_request(optional=True)
+        user_id = (get_jwt() or {}).get('sub')
+    except Exception:
+        return False
+    user = db.session.get(User, user_id) if user_id else None
+    return user is not None and user.role == 'Admin'
+
+def _trigger():
+    """How this request asked to be profiled, or None"""
+    if request.headers.get(PROFILE_HEADER) == '1':
+        return 'header' if _is_admin() else None
+    if request.args.get(PROFILE_ARG) == '1':
+        return 'query' if _is_admin() else None
+    rate = current_app.config['PROFILE_SAMPLE_RATE']
+    if rate and next(current_app.extensions['profile_sample_counter']) % rate == 0:
+        return 'sample'
+    return None
+
+def _start_profile():
+    trigger = _trigger()
+    if trigger is None:
+        return
+    if current_app.config['PROFILER'] == 'pyinstrument' and InstrumentProfiler is not None:
+        profiler = InstrumentProfiler(async_mode='disabled')
+        profiler.start()
+        engine = 'pyinstrument'
+    else:
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            # Another profiler is active on this interpreter (Python 3.12+)
+            return
+        engine = 'cprofile'
+    g.profile = (profiler, engine, trigger, datetime.utcnow(), time.perf_counter())
+
+def _stop(profiler, engine):
+    if engine == 'pyinstrument':
+        profiler.stop()
+    else:
+        profiler.disable()
+
+def _finish_profile(response):
+    active = g.pop('profile', None)
+    if active is None:
+        return response
+    profiler, engine, trigger, started_at, started = active
+    _stop(profiler, engine)
+    duration = time.perf_counter() - started
+
+    if engine == 'pyinstrument':
+        data = profiler.output_html().encode('utf-8')
+    else:
+        profiler.create_stats()
+        data = marshal.dumps(profiler.stats)
+
+    profile_id = profile_store().add({
+        'method': request.method,
+        'path': request.full_path.rstrip('?'),
+        'endpoint': request.url_rule.rule if request.url_rule else None,
+        'status': response.status_code,
+        'duration_ms': round(duration * 1000, 2),
+        'started_at': started_at,
+        'engine': engine,
+        'trigger': trigger,
+        'data': data,
+    })
+    response.headers['X-Profile-Id'] = str(profile_id)
+    return response
+
+def _discard_profile(exc):
+    # after_request did not run, make sure the profiler is not left enabled
+    active = g.pop('profile', None)
+    if active is not None:
+        _stop(active[0], active[1])
+
+def init_profiling(app):
+    """Register the profiling request hooks"""
+    if not app.config['PROFILING_ENABLED']:
+        return
+    app.extensions['profiles'] = ProfileStore(app.config['PROFILE_BUFFER_SIZE'])
+    app.extensions['profile_sample_counter'] = itertools.count(1)
+    app.before_request(_start_profile)
+    app.after_request(_finish_profile)
+    app.teardown_request(_discard_profile)
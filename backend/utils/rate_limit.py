@@ -0,0 +1,141 @@
+"""
+Token bucket rate limiting
+
+``RATE_LIMITS`` maps endpoint names to a bucket: ``rate`` requests per
+``per`` seconds on average with bursts of up to ``burst``. Every client IP
+gets its own bucket per endpoint, and so does every user identified by the
+JWT the request carries. A request over either limit is answered with 429 and
+``Retry-After``; it takes a token only when both buckets have one.
+
+The logins are limited per IP only, before the password is hashed. A bucket
+per ``username`` sent would let anyone lock a user out with bad passwords.
+
+Buckets are kept in process (``RATE_LIMIT_STORAGE = 'memory'``) or in Redis
+(``'redis'``), which shares them between workers and nodes. If Redis cannot
+be reached requests are let through rather than failing.
+
+Behind a reverse proxy, make ``request.remote_addr`` the client address
+(werkzeug's ``ProxyFix``) or every client shares the proxy's buckets.
+"""
+import math
+import threading
+import time
+from flask import current_app, jsonify, request
+from flask_jwt_extended import get_jwt, verify_jwt_in_request
+from utils.metrics import record_rate_limited
+
+class MemoryBuckets:
+    """Buckets of this process, for single process deployments and tests"""
+
+    PRUNE_SIZE = 10000
+
+    def __init__(self):
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def take(self, keys, rate, burst):
+        """
+        Take a token from each bucket if all of them have one. Returns the
+        seconds until each bucket has a token, all 0 when they were taken.
+        """
+        now = time.monotonic()
+        with self._lock:
+            tokens = []
+            for key in keys:
+                available, updated, _, _ = self._buckets.get(key, (burst, now, rate, burst))
+                tokens.append(min(burst, available + (now - updated) * rate))
+            waits = [0 if available >= 1 else (1 - available) / rate for available in tokens]
+            taken = not any(waits)
+            for key, available in zip(keys, tokens):
+                self._buckets[key] = (available - 1 if taken else available, now, rate, burst)
+            if len(self._buckets) > self.PRUNE_SIZE:
+                self._prune(now)
+        return waits
+
+    def _prune(self, now):
+        # Buckets refilled by now are the same as missing ones
+        self._buckets = {
+            key: bucket for key, bucket in self._buckets.items()
+            if bucket[0] + (now - bucket[1]) * bucket[2] < bucket[3]
+        }
+
+# Refill and take atomically; the waits are returned as strings as Lua numbers are truncated to integers
+_TAKE_SCRIPT = """
+local now = redis.call('TIME')
+now = tonumber(now[1]) + tonumber(now[2]) / 1000000
+local rate, burst = tonumber(ARGV[1]), tonumber(ARGV[2])
+local tokens, waits, taken = {}, {}, true
+for i, key in ipairs(KEYS) do
+    local bucket = redis.call('HMGET', key, 'tokens', 'updated')
+    tokens[i] = math.min(burst, (tonumber(bucket[1]) or burst) + (now - (tonumber(bucket[2]) or now)) * rate)
+    waits[i] = '0'
+    if tokens[i] < 1 then
+        waits[i] = tostring((1 - tokens[i]) / rate)
+        taken = false
+    end
+end
+for i, key in ipairs(KEYS) do
+    if taken then
+        tokens[i] = tokens[i] - 1
+    end
+    redis.call('HSET', key, 'tokens', tokens[i], 'updated', now)
+    redis.call('EXPIRE', key, math.ceil(burst / rate) + 1)
+end
+return waits
+"""
+
+class RedisBuckets:
+    """Buckets shared by all workers through Redis"""
+
+    def __init__(self, url, prefix='rate-limit:'):
+        import redis
+        self.client = redis.Redis.from_url(url, socket_timeout=0.5, socket_connect_timeout=0.5)
+        self.prefix = prefix
+        self._take = self.client.register_script(_TAKE_SCRIPT)
+
+    def take(self, keys, rate, burst):
+        try:
+            waits = self._take(keys=[self.prefix + key for key in keys], args=[rate, burst])
+            return [float(wait) for wait in waits]
+        except Exception as e:
+            current_app.logger.warning("Rate limit lookup failed, allowing the request: %s", e)
+            return [0] * len(keys)
+
+def _user_key():
+    try:
+        verify_jwt_in_request(optional=True)
+        user_id = (get_jwt() or {}).get('sub')
+    except Exception:
+        user_id = None
+    return f'user:{user_id}' if user_id else None
+
+def _check_rate_limit():
+    limit = current_app.config['RATE_LIMITS'].get(request.endpoint)
+    if limit is None or request.method == 'OPTIONS':
+        return None
+    rate = limit['rate'] / limit['per']
+    burst = limit.get('burst', limit['rate'])
+    buckets = current_app.extensions['rate_limit_buckets']
+
+    kinds, keys = ['ip'], [f'{request.endpoint}:ip:{request.remote_addr}']
+    user_key = _user_key()
+    if user_key:
+        kinds.append('user')
+        keys.append(f'{request.endpoint}:{user_key}')
+    for kind, wait in zip(kinds, buckets.take(keys, rate, burst)):
+        if wait:
+            record_rate_limited(request.endpoint, kind)
+            response = jsonify({"category": "danger", "message": "Too many requests, please try again later"})
+            response.headers['Retry-After'] = str(math.ceil(wait))
+            return response, 429
+    return None
+
+def init_rate_limit(app):
+    """Register the rate limit check for the endpoints in ``RATE_LIMITS``"""
+    if not app.config['RATE_LIMIT_ENABLED']:
+        return
+    if app.config['RATE_LIMIT_STORAGE'] == 'redis':
+        app.extensions['rate_limit_buckets'] = RedisBuckets(app.config['REDIS_URL'])
+    else:
+        app.extensions['rate_limit_buckets'] = MemoryBuckets()
+    app.before_request(_check_rate_limit)
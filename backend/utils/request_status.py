@@ -0,0 +1,82 @@
+"""
+Service request status transitions
+
+A service request only moves along ``TRANSITIONS``::
+
+    requested -> accepted -> completed
+             \\-> rejected
+
+Each transition is a single conditional ``UPDATE ... WHERE id = ? AND
+service_status = ?`` that also bumps the row's ``version``. Of two
+concurrent transitions of the same request exactly one matches the row, and
+the other finds it already moved on, without locks and without reading the
+row first. A client may send the ``version`` it last saw to act only on the
+state it showed the user. The row is only read when a transition is
+refused, to tell a missing request (404) from a conflict (409).
+"""
+from datetime import datetime
+from sqlalchemy import update
+from models import db, ServiceRequest
+
+TRANSITIONS = {
+    'requested': ('accepted', 'rejected'),
+    'accepted': ('completed',),
+    'rejected': (),
+    'completed': (),
+}
+
+# Column stamped with the time a request moves into the status
+TIMESTAMPS = {
+    'accepted': 'date_of_accept_reject',
+    'rejected': 'date_of_accept_reject',
+    'completed': 'date_of_completion',
+}
+
+def allowed_from(status):
+    """The statuses a request may move to ``status`` from"""
+    return tuple(source for source, targets in TRANSITIONS.items() if status in targets)
+
+class TransitionRefused(Exception):
+    """The request was not found, or its status or version did not allow the transition"""
+
+    def __init__(self, message, http_status):
+        super().__init__(message)
+        self.message = message
+        self.http_status = http_status
+
+def transition(request_id, status, version=None, **owner):
+    """
+    Move the service request to ``status`` and commit. ``owner`` restricts it
+    to the requests of a user, e.g. ``customer_id=...``; ``version`` to the
+    request as the client last saw it. Raises ``TransitionRefused`` otherwise.
+    """
+    sources = allowed_from(status)
+    if not sources:
+        raise TransitionRefused(f"Invalid status: {status}", 400)
+
+    criteria = [ServiceRequest.id == request_id, ServiceRequest.service_status.in_(sources)]
+    criteria += [getattr(ServiceRequest, column) == value for column, value in owner.items()]
+    if version is not None:
+        criteria.append(ServiceRequest.version == version)
+    statement = (
+        update(ServiceRequest)
+        .where(*criteria)
+        .values({'service_status': status, 'version': ServiceRequest.version + 1,
+                 TIMESTAMPS[status]: datetime.utcnow()})
+        .execution_options(synchronize_session=False)
+    )
+    if db.session.execute(statement).rowcount == 1:
+        db.session.commit()
+        return
+    db.session.rollback()
+
+    current = (
+        db.session.query(ServiceRequest.service_status, ServiceRequest.version)
+        .filter_by(id=request_id, **owner)
+        .first()
+    )
+    if current is None:
+        raise TransitionRefused("Request not found", 404)
+    if current.service_status in sources:
+        raise TransitionRefused("The request was changed in the meantime, reload it and try again", 409)
+    raise TransitionRefused(f"A {current.service_status} request cannot be {status}", 409)
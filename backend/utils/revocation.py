@@ -0,0 +1,171 @@
+"""
+JWT revocation
+
+Revoked tokens are kept in memory by every process: the ``jti`` of each
+revoked token until it expires, and for users whose tokens were revoked
+together (a blocked professional) the time before which their tokens were
+issued. Checking a token is a set and dict lookup, with no I/O.
+
+Token ``iat`` claims are whole seconds, so a token issued in the second a
+user's tokens are revoked, but after it, counts as revoked too. That only
+matters once the user may log in again, and unblocking or approving them
+lifts the revocation (``restore_user_tokens``).
+
+Revocations reach the other workers through the application cache: each one
+is stored under the next value of a shared version counter, with a timeout
+equal to the lifetime of the tokens it revokes. A background thread of every
+process reads the counter every ``JWT_REVOCATION_SYNC_INTERVAL`` seconds and
+fetches the revocations it has not seen yet, so a revocation takes effect in
+other processes within that interval, and at once in the revoking process.
+Requests only read the cache for the first token a process checks. With
+``SimpleCache`` the revocations are per process.
+
+A publisher takes the next version before it writes the entry, so a missing
+entry may not be written yet. A process only moves past a missing entry once
+its version was already counted ``GAP_GRACE`` seconds ago, when the entry is
+either written or expired (or its publisher died in between); until then it
+fetches it again on every sync.
+"""
+import os
+import threading
+import time
+from datetime import timedelta
+from flask import current_app, jsonify
+from utils.cache import cache
+
+VERSION_KEY = 'revocations-version'
+ENTRY_KEY_PREFIX = 'revocation:'
+GAP_GRACE = 10  # seconds a publisher has to write the entry of the version it took
+
+def _seconds(expires):
+    if isinstance(expires, timedelta):
+        return expires.total_seconds()
+    return expires or 0
+
+class RevocationList:
+    def __init__(self, sync_interval, user_ttl):
+        self.sync_interval = sync_interval
+        self.user_ttl = user_ttl  # the longest token lifetime, 0 for tokens that never expire
+        self._tokens = {}  # jti -> expiry
+        self._users = {}  # user id -> tokens issued at or before this time are revoked
+        self._version = 0  # every entry up to this one is applied
+        self._settled = 0  # entries up to this one are written or expired by now
+        self._observed = (0, 0)  # (time, version) of the counter as read at a sync
+        self._syncing_pid = None  # process the sync thread runs in
+        self._lock = threading.Lock()
+
+    def is_revoked(self, payload):
+        if self._syncing_pid != os.getpid():
+            self._start_syncing()
+        if payload.get('jti') in self._tokens:
+            return True
+        revoked_before = self._users.get(str(payload.get('sub')))
+        return revoked_before is not None and payload.get('iat', 0) < revoked_before
+
+    def _start_syncing(self):
+        # Once per process, forked web workers included; the first sync is the caller's
+        with self._lock:
+            if self._syncing_pid == os.getpid():
+                return
+            self._syncing_pid = os.getpid()
+        self.sync()
+        app = current_app._get_current_object()
+        threading.Thread(target=self._sync_loop, args=(app, os.getpid()), name='revocation-sync', daemon=True).start()
+
+    def _sync_loop(self, app, pid):
+        while self._syncing_pid == pid:
+            time.sleep(self.sync_interval)
+            with app.app_context():
+                self.sync()
+
+    def revoke_token(self, jti, expires_at):
+        self._publish(('token', jti, expires_at), timeout=max(1, int(expires_at - time.time())) if expires_at else 0)
+
+    def revoke_user(self, user_id):
+        """Revoke every token issued to the user so far"""
+        self._publish(('user', str(user_id), time.time()), timeout=int(self.user_ttl))
+
+    def restore_user(self, user_id):
+        """Lift the revocations of the user's tokens made so far"""
+        self._publish(('restore', str(user_id), time.time()), timeout=int(self.user_ttl))
+
+    def _apply(self, entry):
+        kind, key, value = entry
+        if kind == 'token':
+            self._tokens[key] = value
+        elif kind == 'user':
+            self._users[key] = max(value, self._users.get(key, 0))
+        elif self._users.get(key, value) <= value:
+            self._users.pop(key, None)
+
+    def _publish(self, entry, timeout):
+        with self._lock:
+            self._apply(entry)
+        try:
+            version = cache.cache.inc(VERSION_KEY)
+            cache.set(f'{ENTRY_KEY_PREFIX}{version}', entry, timeout=timeout)
+        except Exception as e:
+            current_app.logger.warning("Revocation could not be shared with the other workers: %s", e)
+
+    def sync(self):
+        """Apply the revocations published by other processes since the last sync"""
+        with self._lock:
+            now = time.monotonic()
+            try:
+                version = int(cache.get(VERSION_KEY) or 0)
+                if version < self._version:
+                    # The cache was flushed and the counter restarted
+                    self._version = self._settled = 0
+                    self._observed = (now, 0)
+                if now - self._observed[0] >= GAP_GRACE:
+                    self._settled = self._observed[1]
+                    self._observed = (now, version)
+                if version > self._version:
+                    numbers = range(self._version + 1, version + 1)
+                    entries = cache.get_many(*[f'{ENTRY_KEY_PREFIX}{n}' for n in numbers])
+                    waiting = False
+                    for n, entry in zip(numbers, entries):
+                        if entry is not None:
+                            self._apply(tuple(entry))  # again on the next sync if it follows a gap, harmlessly
+                        elif n > self._settled:
+                            waiting = True  # maybe not written yet, fetched again from here on the next sync
+                        if not waiting:
+                            self._version = n
+            except Exception as e:
+                current_app.logger.warning("Revocation sync failed: %s", e)
+            self._prune()
+
+    def _prune(self):
+        now = time.time()
+        self._tokens = {jti: expires for jti, expires in self._tokens.items() if not expires or expires > now}
+        if self.user_ttl:
+            self._users = {user: at for user, at in self._users.items() if at + self.user_ttl > now}
+
+def revocations():
+    return current_app.extensions['revocations']
+
+def revoke_token(payload):
+    """Revoke the token with this decoded payload, e.g. on logout"""
+    revocations().revoke_token(payload['jti'], payload.get('exp'))
+
+def revoke_user_tokens(user_id):
+    """Revoke all tokens issued to a user so far, e.g. when they are blocked"""
+    revocations().revoke_user(user_id)
+
+def restore_user_tokens(user_id):
+    """Lift the revocation of a user's tokens, e.g. when they are unblocked"""
+    revocations().restore_user(user_id)
+
+def init_revocation(app, jwt):
+    """Check every token against the revocation list"""
+    lifetimes = [_seconds(app.config[key]) for key in ('JWT_ACCESS_TOKEN_EXPIRES', 'JWT_REFRESH_TOKEN_EXPIRES')]
+    user_ttl = 0 if 0 in lifetimes else max(lifetimes)
+    app.extensions['revocations'] = RevocationList(app.config['JWT_REVOCATION_SYNC_INTERVAL'], user_ttl)
+
+    @jwt.token_in_blocklist_loader
+    def is_revoked(jwt_header, jwt_payload):
+        return revocations().is_revoked(jwt_payload)
+
+    @jwt.revoked_token_loader
+    def revoked(jwt_header, jwt_payload):
+        return jsonify({"category": "danger", "message": "Token has been revoked, please log in again"}), 401
@@ -0,0 +1,58 @@
+"""
+Schema management
+
+Creating the app does not touch the database, so web workers, Celery
+workers and scripts start without inspecting it. The schema is created by
+whoever owns the database: ``flask --app app init-db`` (run it once per
+deployment, before starting the workers), ``python app.py`` for development,
+``populate_db.py`` and the benchmarks.
+
+``db.create_all()`` creates missing tables but leaves existing ones alone, so
+columns and indexes added to the models later are missing from databases
+created before. ``upgrade_schema`` adds them: new columns must be nullable
+or have a server default, which is all ``ALTER TABLE ... ADD COLUMN`` allows
+on SQLite.
+"""
+import click
+from flask.cli import with_appcontext
+from sqlalchemy import inspect, text
+from sqlalchemy.schema import CreateIndex
+
+def upgrade_schema(db):
+    """Add the model columns and indexes missing from the existing tables"""
+    engine = db.engine
+    inspector = inspect(engine)
+    existing_tables = set(inspector.get_table_names())
+    with engine.begin() as connection:
+        for table in db.metadata.sorted_tables:
+            if table.name not in existing_tables:
+                continue
+            columns = {column['name'] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in columns:
+                    continue
+                column_type = column.type.compile(dialect=engine.dialect)
+                definition = f'{column.name} {column_type}'
+                if column.server_default is not None:
+                    definition += f' DEFAULT {column.server_default.arg}'
+                connection.execute(text(f'ALTER TABLE {table.name} ADD COLUMN {definition}'))
+            indexes = {index['name'] for index in inspector.get_indexes(table.name)}
+            for index in table.indexes:
+                if index.name not in indexes:
+                    connection.execute(CreateIndex(index))
+
+def create_schema(db):
+    """Create the missing tables, and the columns added since an existing database was created"""
+    db.create_all()
+    upgrade_schema(db)
+
+def init_schema(app, db):
+    """Add the ``flask init-db`` command"""
+    @click.command('init-db')
+    @with_appcontext
+    def init_db_command():
+        """Create or upgrade the database schema"""
+        create_schema(db)
+        click.echo('Database schema is up to date.')
+
+    app.cli.add_command(init_db_command)
@@ -0,0 +1,147 @@
+"""
+Per-request SQL instrumentation
+
+Records the number of queries, the total database time and the slowest
+statement of every request using SQLAlchemy engine events. The numbers are
+exposed in a ``Server-Timing`` header and logged. Statements repeated with
+the same shape many times in one request are reported as a likely N+1.
+
+A query budget can be set globally (``SQL_QUERY_BUDGET``) or per view with
+``query_budget``. When ``SQL_QUERY_BUDGET_ENFORCE`` is on (test mode), a
+request exceeding its budget fails with a 500 instead of only being logged.
+"""
+import re
+import time
+from collections import Counter
+from functools import wraps
+from flask import current_app, g, has_app_context, jsonify, request
+from sqlalchemy import event
+
+# Longest statement text written to the log
+LOGGED_STATEMENT_LENGTH = 300
+
+# Collapse the placeholder lists of expanding IN clauses, "IN (?, ?, ?)" -> "IN (?)"
+_PLACEHOLDER_LIST_RE = re.compile(r'\((?:\s*(?:\?|%\(\w+\)s|:\w+)\s*,)+\s*(?:\?|%\(\w+\)s|:\w+)\s*\)')
+
+def statement_shape(statement):
+    """Normalize a statement so repeated queries differing only in parameters compare equal"""
+    return _PLACEHOLDER_LIST_RE.sub('(?)', ' '.join(statement.split()))
+
+class RequestSQLStats:
+    """Query statistics collected for one request"""
+
+    __slots__ = ('count', 'total', 'slowest', 'slowest_statement', 'shapes', 'started')
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.slowest = 0.0
+        self.slowest_statement = None
+        self.shapes = Counter()
+        self.started = time.perf_counter()
+
+    def record(self, statement, duration):
+        self.count += 1
+        self.total += duration
+        self.shapes[statement] += 1
+        if duration > self.slowest:
+            self.slowest = duration
+            self.slowest_statement = statement
+
+    def repeated_shapes(self, threshold):
+        """Statement shapes executed at least ``threshold`` times"""
+        repeated = Counter()
+        for statement, count in self.shapes.items():
+            repeated[statement_shape(statement)] += count
+        return [(shape, count) for shape, count in repeated.most_common() if count >= threshold]
+
+def current_stats():
+    """Statistics of the request being handled, or None outside a request"""
+    if not has_app_context():
+        return None
+    return g.get('sql_stats')
+
+def query_budget(max_queries):
+    """Decorator setting the maximum number of queries a view may issue"""
+    def wrapper(fn):
+        @wraps(fn)
+        def decorator(*args, **kwargs):
+            g.sql_query_budget = max_queries
+            return fn(*args, **kwargs)
+        return decorator
+    return wrapper
+
+def _truncate(statement):
+    if statement is None:
+        return None
+    statement = ' '.join(statement.split())
+    if len(statement) > LOGGED_STATEMENT_LENGTH:
+        return statement[:LOGGED_STATEMENT_LENGTH] + '...'
+    return statement
+
+# The start time is kept on the statement's execution context, so a statement
+# that fails leaves nothing behind; on the connection only for the few
+# statements SQLAlchemy runs without one, where the next statement overwrites it.
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = time.perf_counter()
+    if context is not None:
+        context._query_start = started
+    else:
+        conn.info['query_start_time'] = started
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        started = context._query_start
+    else:
+        started = conn.info.pop('query_start_time')
+    stats = current_stats()
+    if stats is not None:
+        stats.record(statement, time.perf_counter() - started)
+
+def _start_request():
+    g.sql_stats = RequestSQLStats()
+
+def _finish_request(response):
+    stats = g.pop('sql_stats', None)
+    if stats is None:
+        return response
+    config = current_app.config
+    elapsed = time.perf_counter() - stats.started
+
+    response.headers.add(
+        'Server-Timing',
+        f'db;dur={stats.total * 1000:.2f};desc="{stats.count} queries", app;dur={elapsed * 1000:.2f}'
+    )
+    current_app.logger.info(
+        "sql %s %s status=%s queries=%d db_ms=%.2f total_ms=%.2f slowest_ms=%.2f slowest=%r",
+        request.method, request.path, response.status_code, stats.count, stats.total * 1000,
+        elapsed * 1000, stats.slowest * 1000, _truncate(stats.slowest_statement)
+    )
+
+    for shape, count in stats.repeated_shapes(config['SQL_N_PLUS_ONE_THRESHOLD']):
+        current_app.logger.warning(
+            "Possible N+1 in %s %s: statement executed %d times: %s",
+            request.method, request.path, count, _truncate(shape)
+        )
+
+    budget = g.pop('sql_query_budget', None) or config['SQL_QUERY_BUDGET']
+    if budget and stats.count > budget:
+        message = f"Query budget exceeded: {stats.count} queries (budget {budget})"
+        current_app.logger.warning("%s %s %s", request.method, request.path, message)
+        if config['SQL_QUERY_BUDGET_ENFORCE']:
+            error = jsonify({"category": "danger", "message": message})
+            error.status_code = 500
+            error.headers['Server-Timing'] = response.headers['Server-Timing']
+            return error
+    return response
+
+def init_sql_instrumentation(app, db):
+    """Attach the engine listeners and request hooks"""
+    if not app.config['SQL_INSTRUMENTATION']:
+        return
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+    event.listen(engine, 'after_cursor_execute', _after_cursor_execute)
+    app.before_request(_start_request)
+    app.after_request(_finish_request)
@@ -0,0 +1,215 @@
+"""
+Content addressed upload storage
+
+Uploaded files are stored once per content, under the sha256 of their bytes
+in a sharded layout (``ab/cd/abcd...``), so two uploads of the same document
+share one copy and uploads with the same name never overwrite each other.
+
+The hash is computed while the upload is received: ``StorageRequest`` makes
+werkzeug's multipart parser write each file part in chunks to a temporary
+file that hashes what is written, instead of spooling it in memory and
+copying it afterwards. Storing the upload then only links that file into
+place (``LocalStorage``) or uploads it unless the object exists
+(``S3Storage``, for S3 or a compatible stand-in such as MinIO through
+``S3_ENDPOINT_URL``). ``STORAGE_BACKEND`` picks one of them; ``s3`` needs
+boto3, which is not in requirements.txt (``pip install boto3``). Stored files
+are sent with ``utils.downloads``, or streamed from the bucket.
+"""
+import hashlib
+import importlib.util
+import mimetypes
+import os
+import re
+import shutil
+import tempfile
+from flask import Request, Response, current_app, request
+from werkzeug.exceptions import NotFound
+from utils.downloads import send_download
+
+CONTENT_HASH_RE = re.compile(r'^[0-9a-f]{64}$')
+CHUNK_SIZE = 64 * 1024
+
+def content_key(content_hash):
+    return f'{content_hash[:2]}/{content_hash[2:4]}/{content_hash}'
+
+def preview_key(content_hash):
+    """Key of the PNG preview made from a document, see utils/document_tasks.py"""
+    return f'previews/{content_key(content_hash)}.png'
+
+class HashingFile:
+    """A temporary file that hashes the bytes written to it, deleted when closed"""
+
+    def __init__(self, directory):
+        os.makedirs(directory, exist_ok=True)
+        self._file = tempfile.NamedTemporaryFile(dir=directory, prefix='upload-')
+        self.name = self._file.name
+        self._hash = hashlib.sha256()
+        self.size = 0
+
+    def write(self, data):
+        self._hash.update(data)
+        self.size += len(data)
+        return self._file.write(data)
+
+    def hexdigest(self):
+        return self._hash.hexdigest()
+
+    def __getattr__(self, name):
+        # read, seek, tell, flush, close... of the underlying file
+        return getattr(self._file, name)
+
+class StorageRequest(Request):
+    """Request whose uploaded files are hashed into the storage's temporary directory as they arrive"""
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        return HashingFile(storage().temp_dir)
+
+class LocalStorage:
+    def __init__(self, root):
+        self.root = root
+        self.temp_dir = os.path.join(root, 'tmp')
+
+    def path(self, key):
+        return os.path.join(self.root, key)
+
+    def exists(self, key):
+        return os.path.exists(self.path(key))
+
+    def open(self, key):
+        return open(self.path(key), 'rb')
+
+    def write(self, key, data):
+        """Store small derived files such as previews"""
+        path = self.path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with tempfile.NamedTemporaryFile(dir=os.path.dirname(path), delete=False) as f:
+            f.write(data)
+        os.replace(f.name, path)
+
+    def put(self, temp, key):
+        path = self.path(key)
+        if os.path.exists(path):
+            return
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp.flush()
+        try:
+            # Same filesystem as temp_dir; the temporary name goes away when the upload is closed
+            os.link(temp.name, path)
+        except FileExistsError:
+            pass  # stored by a concurrent upload of the same content
+
+    def send(self, key, download_name, etag, as_attachment=True):
+        return send_download(self.root, key, 'uploads', download_name, etag=etag,
+                             max_age=current_app.config['DOCUMENT_MAX_AGE'], as_attachment=as_attachment)
+
+class S3Storage:
+    def __init__(self, bucket, endpoint_url=None, temp_dir=None):
+        import boto3
+        self.client = boto3.client('s3', endpoint_url=endpoint_url)
+        self.bucket = bucket
+        self.temp_dir = temp_dir or os.path.join(tempfile.gettempdir(), 'uploads')
+
+    def exists(self, key):
+        from botocore.exceptions import ClientError
+        try:
+            self.client.head_object(Bucket=self.bucket, Key=key)
+            return True
+        except ClientError as e:
+            if e.response['Error']['Code'] in ('404', 'NoSuchKey', 'NotFound'):
+                return False
+            raise
+
+    def open(self, key):
+        return self.client.get_object(Bucket=self.bucket, Key=key)['Body']
+
+    def write(self, key, data):
+        self.client.put_object(Bucket=self.bucket, Key=key, Body=data)
+
+    def put(self, temp, key):
+        if not self.exists(key):
+            temp.flush()
+            self.client.upload_file(temp.name, self.bucket, key)
+
+    def send(self, key, download_name, etag, as_attachment=True):
+        """Stream the object, passing Range and If-None-Match on to the bucket"""
+        from botocore.exceptions import ClientError
+        params = {'Bucket': self.bucket, 'Key': key}
+        if request.headers.get('Range'):
+            params['Range'] = request.headers['Range']
+        if request.headers.get('If-None-Match'):
+            params['IfNoneMatch'] = request.headers['If-None-Match']
+        try:
+            obj = self.client.get_object(**params)
+        except ClientError as e:
+            status = int(e.response['ResponseMetadata']['HTTPStatusCode'])
+            if status in (304, 416):
+                return Response(status=status)
+            if status == 404:
+                raise NotFound()
+            raise
+
+        response = Response(obj['Body'].iter_chunks(CHUNK_SIZE), status=206 if 'ContentRange' in obj else 200,
+                            mimetype=mimetypes.guess_type(download_name)[0] or 'application/octet-stream')
+        if as_attachment:
+            response.headers.set('Content-Disposition', 'attachment', filename=download_name)
+        response.headers['Accept-Ranges'] = 'bytes'
+        response.content_length = obj['ContentLength']
+        if 'ContentRange' in obj:
+            response.headers['Content-Range'] = obj['ContentRange']
+        response.headers['ETag'] = obj['ETag']
+        response.last_modified = obj['LastModified']
+        response.cache_control.private = True
+        response.cache_control.max_age = current_app.config['DOCUMENT_MAX_AGE']
+        return response
+
+def storage():
+    """The configured storage, created on first use so tests and benchmarks can point UPLOAD_FOLDER elsewhere"""
+    extensions = current_app.extensions
+    if 'storage' not in extensions:
+        config = current_app.config
+        if config['STORAGE_BACKEND'] == 's3':
+            extensions['storage'] = S3Storage(config['S3_BUCKET'], config['S3_ENDPOINT_URL'])
+        else:
+            extensions['storage'] = LocalStorage(os.path.join(current_app.root_path, config['UPLOAD_FOLDER']))
+    return extensions['storage']
+
+def store_upload(file):
+    """
+    Store an uploaded ``FileStorage`` and return the sha256 of its content.
+    Returns None if it could not be stored.
+    """
+    target = storage()
+    temp = file.stream
+    try:
+        if not isinstance(temp, HashingFile):
+            # Not parsed by StorageRequest, hash it while copying
+            temp = HashingFile(target.temp_dir)
+            shutil.copyfileobj(file.stream, temp, CHUNK_SIZE)
+        content_hash = temp.hexdigest()
+        target.put(temp, content_key(content_hash))
+        return content_hash
+    except Exception:
+        current_app.logger.exception("Error storing upload")
+        return None
+    finally:
+        if temp is not file.stream:
+            temp.close()
+
+def send_upload(content_hash, download_name):
+    return storage().send(content_key(content_hash), download_name, etag=content_hash)
+
+def send_preview(content_hash):
+    return storage().send(preview_key(content_hash), f'{content_hash}.png', etag=f'preview-{content_hash}',
+                          as_attachment=False)
+
+STORAGE_BACKENDS = ('local', 's3')
+
+def init_storage(app):
+    """Check the storage backend can be used and hash uploads while they are received"""
+    kind = app.config['STORAGE_BACKEND']
+    if kind not in STORAGE_BACKENDS:
+        raise ValueError(f"STORAGE_BACKEND must be one of {', '.join(STORAGE_BACKENDS)}, not {kind!r}")
+    # Located without importing it, boto3 takes a while to import
+    if kind == 's3' and importlib.util.find_spec('boto3') is None:
+        raise ValueError("STORAGE_BACKEND 's3' needs boto3, install it with pip install boto3")
+    app.request_class = StorageRequest
@@ -0,0 +1,201 @@
+"""
+Background task backends
+
+Routes dispatch background work with ``submit_task(name, *args)`` and look
+it up with ``task_status(task_id)``, whichever backend runs it:
+
+- ``celery``: the tasks are sent to the Celery broker (Redis)
+- ``thread``: a local thread pool in the web process
+- ``process``: a local process pool, for CPU bound tasks
+
+The local pools need no broker, so single node and test deployments keep
+exports and reports non-blocking without Redis. Their task status is kept in
+memory by the process that submitted the task, which makes them suitable for
+a single web process only. Tasks are the ones registered on the Celery app,
+looked up by name, and report the same states (PENDING, STARTED, SUCCESS,
+FAILURE); the process pool cannot see a task start, it goes from PENDING to
+its final state.
+
+The Celery app and its tasks are set up on the first task submitted or
+looked up: importing Celery is a large part of starting a web process, and
+most requests never start a task.
+"""
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime
+from flask import current_app
+from utils.metrics import record_task
+
+BACKENDS = ('celery', 'thread', 'process')
+
+class LazyCelery:
+    """The app's Celery app with the tasks registered, created on first use"""
+
+    def __init__(self, app):
+        self.app = app
+        self._celery = None
+        self._lock = threading.Lock()
+
+    def get(self):
+        with self._lock:
+            if self._celery is None:
+                from utils.celery_tasks import init_celery
+                self._celery = init_celery(self.app)
+            return self._celery
+
+class CeleryBackend:
+    """Dispatches to the Celery workers through the broker"""
+
+    def __init__(self, celery_app):
+        self._celery_app = celery_app
+
+    @property
+    def celery(self):
+        return self._celery_app.get()
+
+    def has(self, name):
+        return name in self.celery.tasks
+
+    def submit(self, name, *args, **kwargs):
+        # Fail right away instead of blocking the request on connection retries when the broker is down
+        return self.celery.tasks[name].apply_async(args, kwargs, retry=False).id
+
+    def status(self, task_id):
+        result = self.celery.AsyncResult(task_id)
+        status = {'task_id': task_id, 'name': result.name, 'state': result.state}
+        if result.successful():
+            status['result'] = result.result
+        elif result.failed():
+            status['error'] = str(result.result)
+        return status
+
+# The app of a process pool worker, inherited from the parent when it forks
+_worker_app = None
+
+def _init_worker():
+    global _worker_app
+    if _worker_app is None:
+        # Spawned rather than forked, build the app like the web process did
+        from app import app as _worker_app
+    else:
+        # Connections inherited from the parent must not be used by the child
+        with _worker_app.app_context():
+            _worker_app.extensions['sqlalchemy'].engine.dispose(close=False)
+
+def _run(app, name, args, kwargs):
+    task = app.extensions['tasks'].celery.tasks[name]
+    started = time.perf_counter()
+    with app.app_context():
+        result = task.run(*args, **kwargs)
+    return result, time.perf_counter() - started
+
+def _run_in_worker(name, args, kwargs):
+    return _run(_worker_app, name, args, kwargs)
+
+class ExecutorBackend:
+    """Runs the tasks in a local thread or process pool"""
+
+    def __init__(self, app, celery_app, kind, workers, status_limit):
+        global _worker_app
+        self.app = app
+        self._celery_app = celery_app
+        self.kind = kind
+        self.workers = workers
+        self.status_limit = status_limit
+        self._executor = None
+        self._statuses = OrderedDict()
+        self._lock = threading.Lock()
+        if kind == 'process':
+            _worker_app = app
+
+    @property
+    def celery(self):
+        return self._celery_app.get()
+
+    def has(self, name):
+        return name in self.celery.tasks
+
+    def _pool(self):
+        # Started on first use, so processes fork from a fully initialized app
+        with self._lock:
+            if self._executor is None:
+                if self.kind == 'process':
+                    self._executor = ProcessPoolExecutor(self.workers, initializer=_init_worker)
+                else:
+                    self._executor = ThreadPoolExecutor(self.workers, thread_name_prefix='task')
+            return self._executor
+
+    def submit(self, name, *args, **kwargs):
+        if name not in self.celery.tasks:
+            raise KeyError(f"Unknown task {name}")
+        task_id = str(uuid.uuid4())
+        self._set(task_id, {
+            'task_id': task_id, 'name': name, 'state': 'PENDING',
+            'submitted_at': datetime.utcnow().isoformat(),
+        })
+        if self.kind == 'process':
+            future = self._pool().submit(_run_in_worker, name, args, kwargs)
+        else:
+            future = self._pool().submit(self._run_thread, task_id, name, args, kwargs)
+        future.add_done_callback(lambda future: self._finished(task_id, name, future))
+        return task_id
+
+    def _run_thread(self, task_id, name, args, kwargs):
+        self._update(task_id, state='STARTED', started_at=datetime.utcnow().isoformat())
+        return _run(self.app, name, args, kwargs)
+
+    def _finished(self, task_id, name, future):
+        finished_at = datetime.utcnow().isoformat()
+        try:
+            result, duration = future.result()
+        except Exception as e:
+            self.app.logger.error("Task %s (%s) failed", name, task_id, exc_info=e)
+            record_task(name, 'FAILURE')
+            self._update(task_id, state='FAILURE', error=str(e), finished_at=finished_at)
+        else:
+            record_task(name, 'SUCCESS', duration)
+            self._update(task_id, state='SUCCESS', result=result, finished_at=finished_at)
+
+    def _set(self, task_id, status):
+        with self._lock:
+            self._statuses[task_id] = status
+            while len(self._statuses) > self.status_limit:
+                self._statuses.popitem(last=False)
+
+    def _update(self, task_id, **fields):
+        with self._lock:
+            status = self._statuses.get(task_id)
+            if status is not None:
+                status.update(fields)
+
+    def status(self, task_id):
+        with self._lock:
+            status = self._statuses.get(task_id)
+            return dict(status) if status is not None else None
+
+def task_backend():
+    return current_app.extensions['tasks']
+
+def submit_task(name, *args, **kwargs):
+    """Run the named task in the background, returning its task id"""
+    return task_backend().submit(name, *args, **kwargs)
+
+def task_status(task_id):
+    """The task's state and, once finished, its result or error; None if it is unknown"""
+    return task_backend().status(task_id)
+
+def init_tasks(app):
+    """Set up the configured task backend for the tasks registered by ``init_celery``"""
+    kind = app.config['TASK_BACKEND']
+    if kind not in BACKENDS:
+        raise ValueError(f"TASK_BACKEND must be one of {', '.join(BACKENDS)}, not {kind!r}")
+    celery_app = LazyCelery(app)
+    if kind == 'celery':
+        app.extensions['tasks'] = CeleryBackend(celery_app)
+    else:
+        app.extensions['tasks'] = ExecutorBackend(
+            app, celery_app, kind, app.config['TASK_WORKERS'], app.config['TASK_STATUS_LIMIT']
+        )
@@ -8,6 +8,7 @@ export default {
       users: [],
       serviceRequests: [],
       profDict: {},
+      previews: {},
       message: null,
       category: null,
     };
@@ -87,9 +88,20 @@ export default {
                 <td>{{ professional.experience || 'N/A' }}</td>
                 <td>{{ professional.reviews || 'N/A' }}</td>
                 <td>
-                  <a v-if="professional.has_profile" href="#" @click.prevent="downloadFile(professional.filename)">
-                    {{ professional.filename }}
-                  </a>
+                  <template v-if="professional.has_profile">
+                    <img
+                      v-if="previews[professional.content_hash]"
+                      :src="previews[professional.content_hash]"
+                      :alt="professional.filename"
+                      class="d-block mb-1 border"
+                      style="max-width: 80px; max-height: 80px;"
+                    />
+                    <a href="#" @click.prevent="downloadFile(professional)">
+                      {{ professional.filename }}
+                    </a>
+                    <span v-if="professional.document_status === 'invalid'" class="badge bg-danger">Invalid file</span>
+                    <span v-else-if="professional.document_status === 'pending'" class="badge bg-secondary">Processing</span>
+                  </template>
                   <span v-else>No document</span>
                 </td>
                 <td>
@@ -149,6 +161,9 @@ export default {
     this.fetchProfessionals();
     this.fetchServiceRequests();
   },
+  beforeDestroy() {
+    Object.values(this.previews).forEach((url) => window.URL.revokeObjectURL(url));
+  },
   methods: {
     formatDate(dateString) {
       if (!dateString) return "";
@@ -193,6 +208,7 @@ export default {
           this.professionalProfile = data;
           // No need for userDict anymore as we get all data directly
           console.log("Fetched professionals:", data);
+          this.fetchPreviews();
         } else {
           const errorData = await response.json();
           this.message = errorData.message;
@@ -204,6 +220,30 @@ export default {
         console.error("Error:", error);
       }
     },
+    async fetchPreviews() {
+      // Previews are small images made when the document was uploaded, cached by the browser
+      const hashes = this.professionalProfile
+        .filter((professional) => professional.has_preview)
+        .map((professional) => professional.content_hash)
+        .filter((hash) => !this.previews[hash]);
+      await Promise.all(
+        [...new Set(hashes)].map(async (hash) => {
+          try {
+            const response = await fetch(`/documents/${hash}/preview`, {
+              headers: {
+                Authorization: "Bearer " + localStorage.getItem("token"),
+              },
+            });
+            if (response.ok) {
+              const blob = await response.blob();
+              this.$set(this.previews, hash, window.URL.createObjectURL(blob));
+            }
+          } catch (error) {
+            console.error("Error fetching preview:", error);
+          }
+        })
+      );
+    },
     async fetchServiceRequests() {
       try {
         const response = await fetch("/admin/service-requests", {
@@ -405,13 +445,18 @@ export default {
         this.category = "danger";
       }
     },
-    async downloadFile(filename) {
+    async downloadFile(professional) {
+      // Documents are stored by content hash, older uploads by name
+      const filename = professional.filename;
       try {
-        const response = await fetch(`/download/${filename}`, {
-          headers: {
-            Authorization: "Bearer " + localStorage.getItem("token"),
-          },
-        });
+        const response = await fetch(
+          `/download/${professional.content_hash || filename}`,
+          {
+            headers: {
+              Authorization: "Bearer " + localStorage.getItem("token"),
+            },
+          }
+        );
 
         if (!response.ok) {
           const errorData = await response.json();
@@ -101,6 +101,9 @@ export default {
 
         if (response.ok) {
           this.showMessage(data.message, data.category);
+          if (data.task_id) {
+            await this.waitForTask(data.task_id); // Exports run in the background
+          }
           await this.fetchDownloads(); // Refresh the downloads list
         } else {
           this.showMessage(
@@ -119,6 +122,30 @@ export default {
       }
     },
 
+    async waitForTask(taskId) {
+      for (let attempt = 0; attempt < 60; attempt++) {
+        await new Promise((resolve) => setTimeout(resolve, 1000));
+        const response = await fetch("/admin/tasks/" + taskId, {
+          method: "GET",
+          headers: {
+            Authorization: "Bearer " + localStorage.getItem("token"),
+          },
+        });
+        if (!response.ok) {
+          return;
+        }
+        const task = await response.json();
+        if (task.state === "SUCCESS") {
+          this.showMessage("Export completed successfully", "success");
+          return;
+        }
+        if (task.state === "FAILURE") {
+          this.showMessage(task.error || "Export failed", "danger");
+          return;
+        }
+      }
+    },
+
     async fetchDownloads() {
       try {
         const response = await fetch("/admin/reports/list", {
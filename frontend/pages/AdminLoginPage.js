@@ -45,7 +45,7 @@ export default {
         });
         if (res.ok) {
           const data = await res.json();
-          this.$root.login("admin", data.access_token);
+          this.$root.login("admin", data);
           this.$router.push("/admin/dashboard");
         } else {
           const errorData = await res.json();
@@ -277,12 +277,17 @@ export default {
               Authorization: "Bearer " + localStorage.getItem("token"),
               "Content-Type": "application/json",
             },
+            // Fails with 409 if the request changed since it was shown
+            body: JSON.stringify({ version: this.selectedRequestToClose.version }),
           }
         );
 
         const data = await response.json();
         console.log("Debug - Close service response:", data);
 
+        if (response.status === 409) {
+          await this.fetchServiceRequests();
+        }
         if (!response.ok) {
           throw new Error(data.message || "Failed to close service request");
         }
@@ -1,3 +1,5 @@
+import auth from "/utils/auth.js";
+
 export default {
   template: `
     <div class="container my-5">
@@ -145,6 +147,8 @@ export default {
         this.category = data.category;
 
         if (response.ok) {
+          // Renew the token, its claims still say the profile is missing
+          await auth.refreshTokens();
           // If profile was created successfully, redirect to dashboard
           setTimeout(() => {
             this.$router.push("/customer/dashboard");
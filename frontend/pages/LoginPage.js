@@ -1,3 +1,5 @@
+import auth from "/utils/auth.js";
+
 export default {
   template: `
     <div class="container d-flex align-items-center justify-content-center vh-100">
@@ -81,25 +83,17 @@ export default {
           return;
         }
 
-        // Get claims after successful login
-        const claimsResponse = await fetch("/get-claims", {
-          method: "GET",
-          headers: {
-            "Content-Type": "application/json",
-            Authorization: `Bearer ${loginData.access_token}`,
-          },
-        });
-
-        const claimsData = await claimsResponse.json();
+        // The access token carries the claims, no /get-claims round trip
+        const claims = auth.decodeClaims(loginData.access_token);
 
-        if (!claimsResponse.ok) {
-          this.message = claimsData.message || "Failed to get user claims";
-          this.category = claimsData.category || "danger";
+        if (!claims || claims.cv !== auth.CLAIMS_VERSION) {
+          this.message = "Invalid token received from server";
+          this.category = "danger";
           return;
         }
 
         // Check if user is blocked
-        if (claimsData.claims.blocked) {
+        if (claims.blocked) {
           this.message =
             "Your account has been blocked. Please contact support.";
           this.category = "danger";
@@ -108,8 +102,8 @@ export default {
 
         // For professionals, check if approved
         if (
-          claimsData.claims.role === "Professional" &&
-          !claimsData.claims.approved
+          claims.role === "Professional" &&
+          !claims.approved
         ) {
           this.message =
             "Your account is pending approval. Please wait for admin approval.";
@@ -118,22 +112,22 @@ export default {
         }
 
         // Login successful, update root state
-        this.$root.login(claimsData.claims.role, loginData.access_token);
+        this.$root.login(claims.role, loginData);
 
         // Handle redirects based on role and redirect path
-        if (claimsData.claims.role === "Customer") {
+        if (claims.role === "Customer") {
           this.$router.push(
-            claimsData.claims.redirect === "customer_profile"
+            claims.redirect === "customer_profile"
               ? "/customer/profile"
               : "/customer/dashboard"
           );
-        } else if (claimsData.claims.role === "Professional") {
+        } else if (claims.role === "Professional") {
           this.$router.push(
-            claimsData.claims.redirect === "professional_profile"
+            claims.redirect === "professional_profile"
               ? "/professional/profile"
               : "/professional/dashboard"
           );
-        } else if (claimsData.claims.role === "Admin") {
+        } else if (claims.role === "Admin") {
           this.$router.push("/admin/dashboard");
         } else {
           this.message = "Invalid role received from server";
@@ -153,5 +147,6 @@ export default {
     localStorage.removeItem("isAuthenticated");
     localStorage.removeItem("userRole");
     localStorage.removeItem("token");
+    localStorage.removeItem("refreshToken");
   },
 };
@@ -35,14 +35,14 @@ export default {
                   </td>
                   <td class="text-center">
                     <button 
-                      @click="updateRequestStatus(request.id, 'accepted')" 
+                      @click="updateRequestStatus(request, 'accepted')" 
                       class="btn btn-success btn-sm me-2"
                       :disabled="isUpdating"
                     >
                       Accept
                     </button>
                     <button 
-                      @click="updateRequestStatus(request.id, 'rejected')" 
+                      @click="updateRequestStatus(request, 'rejected')" 
                       class="btn btn-danger btn-sm"
                       :disabled="isUpdating"
                     >
@@ -301,23 +301,24 @@ export default {
         this.category = "danger";
       }
     },
-    async updateRequestStatus(requestId, status) {
+    async updateRequestStatus(serviceRequest, status) {
       this.isUpdating = true;
       try {
-        const response = await fetch(`/professional/request/${requestId}`, {
+        const response = await fetch(`/professional/request/${serviceRequest.id}`, {
           method: "PUT",
           headers: {
             "Content-Type": "application/json",
             Authorization: "Bearer " + localStorage.getItem("token"),
           },
-          body: JSON.stringify({ status }),
+          // Fails with 409 if the request changed since it was shown
+          body: JSON.stringify({ status, version: serviceRequest.version }),
         });
 
         const data = await response.json();
         this.message = data.message;
         this.category = data.category;
 
-        if (response.ok) {
+        if (response.ok || response.status === 409) {
           await this.fetchServiceRequests();
         }
       } catch (error) {
@@ -1,3 +1,5 @@
+import auth from "/utils/auth.js";
+
 export default {
   template: `
       <div class="container my-5">
@@ -205,6 +207,8 @@ export default {
         this.category = data.category;
 
         if (response.ok) {
+          // Renew the token, its claims still say the profile is missing
+          await auth.refreshTokens();
           // Wait a moment to show the success message
           setTimeout(() => {
             this.$router.push("/professional/dashboard");
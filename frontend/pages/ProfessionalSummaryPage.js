@@ -1,3 +1,5 @@
+import auth from "/utils/auth.js";
+
 export default {
   template: `
       <div class="container my-5">
@@ -77,44 +79,21 @@ export default {
     async fetchUserClaims() {
       if (!this.checkToken()) return;
 
-      try {
-        const response = await fetch("/get-claims", {
-          method: "GET",
-          headers: {
-            "Content-Type": "application/json",
-            Authorization: "Bearer " + localStorage.getItem("token"),
-          },
-        });
-
-        if (response.status === 401 || response.status === 403) {
-          this.error = "Session expired. Please login again.";
-          this.$router.push("/login");
-          return;
-        }
-
-        if (!response.ok) {
-          throw new Error(
-            `Failed to fetch user claims: ${response.statusText}`
-          );
-        }
-
-        const data = await response.json();
-        if (!data.claims || !data.claims.user_id) {
-          throw new Error("User ID not found in claims");
-        }
-
-        if (data.claims.role !== "Professional") {
-          this.error = "Unauthorized access. Professional role required.";
-          this.$router.push("/login");
-          return;
-        }
+      // Read from the access token, refreshed first if it is about to expire
+      const claims = await auth.getClaims();
+      if (!claims) {
+        this.error = "Session expired. Please login again.";
+        this.$router.push("/login");
+        return;
+      }
 
-        this.userId = data.claims.user_id;
-      } catch (error) {
-        console.error("Error fetching claims:", error);
-        this.error = error.message || "Failed to fetch user information";
-        return null;
+      if (claims.role !== "Professional") {
+        this.error = "Unauthorized access. Professional role required.";
+        this.$router.push("/login");
+        return;
       }
+
+      this.userId = claims.user_id;
     },
     async fetchReviewsData() {
       if (!this.userId) return;
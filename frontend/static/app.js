@@ -1,5 +1,6 @@
 import Navbar from "/components/Navbar.js";
 import router from "/utils/router.js";
+import auth from "/utils/auth.js";
 
 const app = new Vue({
   el: "#app",
@@ -17,32 +18,65 @@ const app = new Vue({
     return {
       isAuthenticated: false,
       userRole: null,
+      refreshTimer: null,
     };
   },
   methods: {
-    login(role, token) {
+    login(role, tokens) {
       this.isAuthenticated = true;
       this.userRole = role;
       localStorage.setItem("isAuthenticated", true);
       localStorage.setItem("userRole", role);
-      localStorage.setItem("token", token);
+      auth.storeTokens(tokens);
+      this.scheduleRefresh();
     },
     logout() {
+      const token = localStorage.getItem("token");
+      if (token) {
+        // Revoke the tokens on the server, the local logout does not wait for it
+        fetch("/logout", {
+          method: "POST",
+          headers: {
+            "Content-Type": "application/json",
+            Authorization: "Bearer " + token,
+          },
+          body: JSON.stringify({
+            refresh_token: localStorage.getItem("refreshToken"),
+          }),
+        }).catch((error) => console.error("Error logging out:", error));
+      }
+      clearTimeout(this.refreshTimer);
       this.isAuthenticated = false;
       this.userRole = null;
       localStorage.removeItem("isAuthenticated");
       localStorage.removeItem("userRole");
       localStorage.removeItem("token");
+      localStorage.removeItem("refreshToken");
       this.$router.push("/");
     },
+    scheduleRefresh() {
+      // Renew the access token shortly before it expires, pages keep reading it from localStorage
+      clearTimeout(this.refreshTimer);
+      const seconds = auth.secondsUntilRefresh();
+      if (seconds === null) return;
+      this.refreshTimer = setTimeout(async () => {
+        if (await auth.refreshTokens()) {
+          this.scheduleRefresh();
+        }
+      }, Math.max(0, seconds) * 1000);
+    },
     checkAuthentication() {
       this.isAuthenticated = localStorage.getItem("isAuthenticated") === "true";
       this.userRole = localStorage.getItem("userRole");
+      if (this.isAuthenticated) {
+        this.scheduleRefresh();
+      }
     },
     handleWindowClose() {
       localStorage.removeItem("isAuthenticated");
       localStorage.removeItem("userRole");
       localStorage.removeItem("token");
+      localStorage.removeItem("refreshToken");
     },
   },
   mounted() {
@@ -54,5 +88,6 @@ const app = new Vue({
   },
   beforeDestroy() {
     window.removeEventListener("beforeunload", this.handleWindowClose);
+    clearTimeout(this.refreshTimer);
   },
 });
@@ -0,0 +1,84 @@
+// Access tokens carry the claims the app routes on (role, redirect, approved,
+// blocked), so pages read them from the token instead of calling /get-claims.
+// Tokens are renewed with the refresh token before they expire, or when their
+// claims version is older than the one this code expects.
+
+const CLAIMS_VERSION = 1;
+
+// Refresh this many seconds before the access token expires
+const REFRESH_MARGIN = 60;
+
+function decodeClaims(token) {
+  if (!token) return null;
+  try {
+    const payload = token.split(".")[1].replace(/-/g, "+").replace(/_/g, "/");
+    const claims = JSON.parse(atob(payload));
+    return { ...claims, user_id: Number(claims.sub) };
+  } catch (error) {
+    return null;
+  }
+}
+
+function storeTokens(data) {
+  localStorage.setItem("token", data.access_token);
+  if (data.refresh_token) {
+    localStorage.setItem("refreshToken", data.refresh_token);
+  }
+}
+
+let pendingRefresh = null;
+
+function refreshTokens() {
+  // Refresh tokens are single use, concurrent callers share one refresh
+  if (!pendingRefresh) {
+    pendingRefresh = (async () => {
+      const refreshToken = localStorage.getItem("refreshToken");
+      if (!refreshToken) return null;
+      try {
+        const response = await fetch("/refresh", {
+          method: "POST",
+          headers: { Authorization: "Bearer " + refreshToken },
+        });
+        if (!response.ok) return null;
+        const data = await response.json();
+        storeTokens(data);
+        return decodeClaims(data.access_token);
+      } catch (error) {
+        console.error("Error refreshing token:", error);
+        return null;
+      }
+    })().finally(() => {
+      pendingRefresh = null;
+    });
+  }
+  return pendingRefresh;
+}
+
+function secondsUntilRefresh() {
+  const claims = decodeClaims(localStorage.getItem("token"));
+  if (!claims || !claims.exp) return null;
+  return claims.exp - REFRESH_MARGIN - Date.now() / 1000;
+}
+
+// Claims of the current access token, refreshed first when stale.
+// Returns null when there is no session or it could not be renewed.
+async function getClaims() {
+  const claims = decodeClaims(localStorage.getItem("token"));
+  if (
+    claims &&
+    claims.cv === CLAIMS_VERSION &&
+    (!claims.exp || claims.exp - Date.now() / 1000 > REFRESH_MARGIN)
+  ) {
+    return claims;
+  }
+  return refreshTokens();
+}
+
+export default {
+  CLAIMS_VERSION,
+  decodeClaims,
+  storeTokens,
+  refreshTokens,
+  secondsUntilRefresh,
+  getClaims,
+};